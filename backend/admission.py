@@ -0,0 +1,193 @@
+"""
+Admission control and load shedding.
+Expensive routes get a concurrency limit with a short bounded wait queue,
+a per-client token bucket, and a latency guard. Requests over a limit are
+rejected right away (429 for rate limits, 503 for shedding, both with
+Retry-After) instead of queueing behind the synchronous workers. Routes
+without a limit are always admitted.
+
+Limits are keyed by Flask endpoint name and can be overridden with a JSON
+file named by ADMISSION_CONFIG, for example:
+    {"skill_gap": {"max_concurrent": 2, "rate": 1, "burst": 5}}
+"""
+
+import json
+import math
+import threading
+import time
+
+# Per-route limits:
+#   max_concurrent: requests processed at once
+#   max_queue: requests allowed to wait for a slot; more are shed
+#   queue_timeout: seconds a queued request waits before it is shed
+#   rate / burst: per-client token bucket (requests per second / bucket size)
+#   max_latency: shed new requests while the route's average latency (EWMA,
+#                seconds) is above this and requests are still in flight
+DEFAULT_LIMITS = {
+    'recommend': {'max_concurrent': 8, 'max_queue': 16, 'queue_timeout': 2.0,
+                  'rate': 10, 'burst': 20, 'max_latency': 2.0},
+    'replan': {'max_concurrent': 8, 'max_queue': 16, 'queue_timeout': 2.0,
+               'rate': 10, 'burst': 20, 'max_latency': 2.0},
+    'recommend_with_budget': {'max_concurrent': 4, 'max_queue': 8, 'queue_timeout': 2.0,
+                              'rate': 5, 'burst': 10, 'max_latency': 3.0},
+    'skill_gap': {'max_concurrent': 4, 'max_queue': 8, 'queue_timeout': 2.0,
+                  'rate': 5, 'burst': 10, 'max_latency': 3.0},
+    'generate_quiz_endpoint': {'max_concurrent': 8, 'max_queue': 16, 'queue_timeout': 2.0,
+                               'rate': 10, 'burst': 20, 'max_latency': 2.0},
+}
+
+# Weight of the newest sample in the latency average
+LATENCY_SMOOTHING = 0.2
+
+
+def load_limits(config_path=None):
+    """Return DEFAULT_LIMITS with per-route overrides from a JSON file merged in."""
+    limits = {route: dict(settings) for route, settings in DEFAULT_LIMITS.items()}
+    if config_path:
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading admission config {config_path}: {e}")
+            overrides = {}
+        for route, settings in overrides.items():
+            if settings is None:
+                limits.pop(route, None)
+            else:
+                limits.setdefault(route, {}).update(settings)
+    return limits
+
+
+class Rejected(Exception):
+    """A request was not admitted."""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBuckets:
+    """Per-client token buckets for one route, held in memory."""
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_clients = max_clients
+        # client -> [tokens, last refill time]
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, client, now=None):
+        """Take one token for client. Returns 0 on success, else seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self._buckets[client] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate if self.rate > 0 else 60
+
+    def _prune(self, now):
+        """Forget clients whose buckets have refilled; they would start full anyway."""
+        full = [client for client, (tokens, last) in self._buckets.items()
+                if tokens + (now - last) * self.rate >= self.burst]
+        for client in full:
+            del self._buckets[client]
+        if len(self._buckets) >= self.max_clients:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RouteGate:
+    """Concurrency slots, wait queue and latency tracking for one route."""
+
+    def __init__(self, max_concurrent=None, max_queue=0, queue_timeout=0.0,
+                 rate=None, burst=None, max_latency=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_latency = max_latency
+        self.buckets = TokenBuckets(rate, burst or rate) if rate else None
+        self.in_flight = 0
+        self.queued = 0
+        self.latency = 0.0
+        self.admitted = 0
+        self.shed = 0
+        self.rate_limited = 0
+        self._cond = threading.Condition()
+
+    def enter(self, client):
+        """Admit a request or raise Rejected."""
+        if self.buckets is not None:
+            wait = self.buckets.take(client)
+            if wait:
+                with self._cond:
+                    self.rate_limited += 1
+                raise Rejected(429, 'Rate limit exceeded', wait)
+
+        with self._cond:
+            if self.max_latency and self.in_flight and self.latency > self.max_latency:
+                self.shed += 1
+                raise Rejected(503, 'Server busy (high latency)', self.latency)
+
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                if self.queued >= self.max_queue:
+                    self.shed += 1
+                    raise Rejected(503, 'Server busy (queue full)', self.latency or 1)
+                self.queued += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self.in_flight >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.shed += 1
+                            raise Rejected(503, 'Server busy (queue timeout)', self.latency or 1)
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+
+            self.in_flight += 1
+            self.admitted += 1
+
+    def leave(self, elapsed):
+        """Release a slot and record the request's latency in seconds."""
+        with self._cond:
+            self.in_flight -= 1
+            self.latency += LATENCY_SMOOTHING * (elapsed - self.latency)
+            self._cond.notify()
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'latency_ms': round(self.latency * 1000, 1),
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'rate_limited': self.rate_limited,
+            'clients': len(self.buckets) if self.buckets is not None else 0
+        }
+
+
+class AdmissionController:
+    """RouteGates for every limited route."""
+
+    def __init__(self, limits):
+        self.gates = {route: RouteGate(**settings) for route, settings in limits.items()}
+
+    def gate(self, route):
+        """RouteGate for a route, or None when the route is not limited."""
+        return self.gates.get(route)
+
+    def stats(self):
+        return {route: gate.stats() for route, gate in self.gates.items()}
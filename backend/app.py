@@ -3,22 +3,298 @@ Flask backend for Learning Path Recommender.
 Main application with REST API endpoints.
 """
 
-from flask import Flask, jsonify, request, send_from_directory
-from recommender import generate_path, get_course_dependencies, calculate_path_stats
-from skill_gap import analyze_profile, get_mentioned_skills, calculate_skill_coverage
-from utils import load_courses, get_all_skills, get_courses_by_skill
+from flask import Flask, g, jsonify, request
+from werkzeug.middleware.proxy_fix import ProxyFix
+from recommender import (
+    PrerequisiteClosures, decode_path_token, encode_path_token, get_course_dependencies, plan_with_budget
+)
+from skill_gap import (
+    analyze_profile, get_mentioned_skills, calculate_skill_coverage, get_skill_gap_index, normalize_text
+)
+from catalog_snapshot import load_catalog
+from course_repository import JsonCourseRepository, SqliteCourseRepository
+from sharding import ShardedCourseRepository
+from path_table import PathTable
+from records import normalize_skill
+from single_flight import SingleFlight
+from admission import AdmissionController, Rejected, load_limits
+from fragments import get_fragments, json_response
+from path_graph import get_graph_layouts
+from co_completion import CoCompletionIndex, order_by_affinity
+from question_stats import QuestionStats
+from skill_resolver import get_skill_resolver
+from memory_profile import MemoryProfiler, structure_sizes
+from startup import Startup
+from static_assets import AssetTable
+from tenants import (
+    DEFAULT_TENANT_ID, ENVIRON_KEY, TENANT_HEADER, Tenant, TenantPathPrefix, TenantRegistry, UnknownTenant
+)
+import quiz_generator
+import progress_manager
 from quiz_generator import generate_quiz, evaluate_quiz, get_available_skills, get_question_count
-from progress_manager import calculate_level, check_achievements, calculate_xp_for_action, get_all_achievements
+from progress_manager import (
+    MAX_EVENTS, apply_events, calculate_level, check_achievements, calculate_xp_for_action, get_all_achievements
+)
+import atexit
+import math
 import os
+import time
 import traceback
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='../frontend')
 app.config['JSON_SORT_KEYS'] = False
 
-# Load course data
+# Subsystem warm-up: eager (at import), background (while serving) or lazy (on first use)
+STARTUP = Startup(os.environ.get('STARTUP_MODE', 'background'))
+
+# Load course data: shard processes when SHARD_URLS is set, SQLite when COURSE_DB
+# is set, otherwise the JSON file (from the binary snapshot when it is fresh)
 DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'courses.json')
-COURSES = load_courses(DATA_FILE)
+COURSE_DB = os.environ.get('COURSE_DB')
+SHARD_URLS = [url.strip() for url in os.environ.get('SHARD_URLS', '').split(',') if url.strip()]
+_started = time.perf_counter()
+if SHARD_URLS:
+    CATALOG = ShardedCourseRepository(SHARD_URLS, timeout=float(os.environ.get('SHARD_TIMEOUT', '10')))
+    CATALOG_SOURCE = 'shards'
+elif COURSE_DB:
+    CATALOG = SqliteCourseRepository(COURSE_DB)
+    CATALOG_SOURCE = 'sqlite'
+else:
+    COURSES, COURSE_INDEX, CATALOG_SOURCE = load_catalog(DATA_FILE)
+    CATALOG = JsonCourseRepository(COURSES, DATA_FILE, COURSE_INDEX)
+
+STARTUP.record('catalog', time.perf_counter() - _started)
+
+# Precomputed paths for every (skill, level) pair, kept current through catalog change listeners
+PATH_TABLE = PathTable(CATALOG)
+
+# Cumulative prerequisite costs shared by budget planning requests
+CLOSURES = PrerequisiteClosures(CATALOG)
+
+# "Learners also took" counts gathered from completed_courses in recommend requests
+# (read from disk by the co_completion subsystem below)
+CO_COMPLETION = CoCompletionIndex(
+    os.environ.get('CO_COMPLETION_FILE', os.path.join(os.path.dirname(__file__), '..', 'data', 'co_completion.json')),
+    max_pairs=int(os.environ.get('CO_COMPLETION_MAX_PAIRS', '200000')),
+    save_interval=float(os.environ.get('CO_COMPLETION_SAVE_INTERVAL', '60')),
+    load=False
+)
+
+# Per-question attempt/correct counts from evaluated quizzes, behind adaptive quiz selection
+# (read from disk by the question_stats subsystem below)
+QUESTION_STATS = QuestionStats(
+    os.environ.get('QUESTION_STATS_FILE', os.path.join(os.path.dirname(__file__), '..', 'data', 'question_stats.json')),
+    flush_every=int(os.environ.get('QUESTION_STATS_FLUSH_EVERY', '200')),
+    flush_interval=float(os.environ.get('QUESTION_STATS_FLUSH_INTERVAL', '30')),
+    load=False
+)
+quiz_generator.DEFAULT_BANK.stats = QUESTION_STATS
+
+# Partner catalogs under TENANTS_DIR, selected per request by the X-Tenant header or a
+# /t/<tenant>/ path prefix; the catalog above is the default tenant
+DEFAULT_TENANT = Tenant(DEFAULT_TENANT_ID, CATALOG, CATALOG_SOURCE, quiz_generator.DEFAULT_BANK,
+                        PATH_TABLE, CLOSURES, CO_COMPLETION)
+TENANTS = TenantRegistry(
+    os.environ.get('TENANTS_DIR', os.path.join(os.path.dirname(__file__), '..', 'data', 'tenants')),
+    DEFAULT_TENANT,
+    memory_budget=int(float(os.environ.get('TENANT_MEMORY_BUDGET_MB', '256')) * 1024 * 1024),
+    co_completion_options={
+        'max_pairs': CO_COMPLETION.max_pairs,
+        'save_interval': CO_COMPLETION.save_interval
+    },
+    question_stats_options={
+        'flush_every': QUESTION_STATS.flush_every,
+        'flush_interval': QUESTION_STATS.flush_interval
+    }
+)
+app.wsgi_app = TenantPathPrefix(app.wsgi_app)
+
+
+def flush_counts():
+    """Save counts still waiting for their next background save."""
+    CO_COMPLETION.flush()
+    QUESTION_STATS.flush()
+    TENANTS.flush()
+
+
+atexit.register(flush_counts)
+
+# Coalesces concurrent identical recommend/skill-gap computations
+SINGLE_FLIGHT = SingleFlight()
+
+# Concurrency, rate and latency limits for expensive routes (ADMISSION_CONTROL=0 disables)
+ADMISSION = None
+if os.environ.get('ADMISSION_CONTROL', '1') == '1':
+    ADMISSION = AdmissionController(load_limits(os.environ.get('ADMISSION_CONFIG')))
+
+# Reverse proxies in front of the app (TRUSTED_PROXIES=N). Their X-Forwarded-For entries
+# set request.remote_addr to the real client, which admission rate limits are keyed on;
+# without this every client behind the proxy shares the proxy's bucket
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', '0'))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+# Memory accounting and tracemalloc windows behind /api/admin/memory (MEMORY_PROFILING=1 enables)
+MEMORY_PROFILER = MemoryProfiler() if os.environ.get('MEMORY_PROFILING') == '1' else None
+
+# Frontend files, fingerprinted and compressed once and served from memory
+# (built by the static_assets subsystem below)
+STATIC_ASSETS = AssetTable(app.static_folder)
+
+# Default /api/courses page for catalogs not held in memory (in-memory catalogs list everything)
+COURSE_PAGE_SIZE = int(os.environ.get('COURSE_PAGE_SIZE', '100'))
+
+# Seconds between checks of the catalog change journal for edits made by other processes
+JOURNAL_POLL_INTERVAL = float(os.environ.get('JOURNAL_POLL_INTERVAL', '1.0'))
+
+
+def check_topology():
+    """Validate the prerequisite graph; paths are ordered by its topological ranks."""
+    topology = CATALOG.topology()
+    if topology.cycles or topology.dangling or topology.duplicates:
+        print(f"Catalog issues: {len(topology.cycles)} prerequisite cycles "
+              f"({len(topology.quarantined)} courses quarantined), "
+              f"{len(topology.dangling)} dangling prerequisites, "
+              f"{len(topology.duplicates)} duplicate IDs")
+
+
+def warm_fragments():
+    """Encode every course and path item once."""
+    fragments = get_fragments(CATALOG)
+    for course in CATALOG.all():
+        fragments.course(course)
+        fragments.path_item({'id': course.id})
+
+
+# Required subsystems hold state a request must not run without, so requests wait for them.
+STARTUP.register('co_completion', CO_COMPLETION.load, required=True)
+STARTUP.register('question_stats', QUESTION_STATS.load, required=True)
+STARTUP.register('static_assets', STATIC_ASSETS.build, required=True)
+STARTUP.register('topology', check_topology)
+# Everything else builds itself on first use; warming moves that cost out of the first requests.
+# Warm-ups that touch every course are skipped for catalogs not held in memory, which would
+# otherwise be pulled into this process; the skill gap index and resolver only need skill counts.
+if CATALOG.in_memory and os.environ.get('PATH_TABLE_WARM', '1') == '1':
+    STARTUP.register('path_table', lambda: PATH_TABLE.warm(workers=int(os.environ.get('PATH_TABLE_WORKERS', '0'))))
+STARTUP.register('skill_gap', lambda: get_skill_gap_index(CATALOG))
+STARTUP.register('skill_resolver', lambda: get_skill_resolver(CATALOG))
+if CATALOG.in_memory:
+    STARTUP.register('fragments', warm_fragments)
+STARTUP.register('quiz', quiz_generator.get_question_records)
+STARTUP.register('progress', progress_manager.load_achievements)
+STARTUP.start()
+
+# Subsystems each endpoint needs, warmed through STARTUP.use before the request runs
+ENDPOINT_SUBSYSTEMS = {
+    'get_courses': ('fragments',),
+    'get_course': ('fragments',),
+    'suggest_skills': ('skill_resolver',),
+    'get_courses_for_skill': ('skill_resolver', 'fragments'),
+    'recommend': ('topology', 'skill_resolver', 'path_table', 'fragments', 'co_completion'),
+    'also_took': ('co_completion',),
+    'replan': ('topology', 'path_table', 'fragments', 'co_completion'),
+    'recommend_with_budget': ('topology', 'fragments'),
+    'path_graph': ('topology', 'skill_resolver', 'path_table'),
+    'skill_gap': ('skill_gap',),
+    'get_dependencies': ('fragments',),
+    'generate_quiz_endpoint': ('quiz', 'question_stats'),
+    'evaluate_quiz_endpoint': ('quiz', 'question_stats'),
+    'get_quiz_skills': ('quiz',),
+    'get_quiz_count': ('quiz',),
+    'check_user_achievements': ('progress',),
+    'get_achievements': ('progress',),
+    'ingest_progress_events': ('progress',),
+    'serve_frontend': ('static_assets',)
+}
+
+# Subsystems not tied to the default tenant's catalog or counts
+SHARED_SUBSYSTEMS = ('progress', 'static_assets')
+
+
+@app.before_request
+def admit_request():
+    """Apply the route's admission limits; runs before any other work for the request."""
+    gate = ADMISSION.gate(request.endpoint) if ADMISSION else None
+    if gate is None:
+        return None
+    try:
+        gate.enter(request.remote_addr)
+    except Rejected as e:
+        response = jsonify({
+            'success': False,
+            'error': e.reason
+        })
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    g.admission = (gate, time.monotonic())
+    return None
+
+
+@app.teardown_request
+def release_request(error=None):
+    """Free the admission slot taken by admit_request."""
+    admitted = g.pop('admission', None)
+    if admitted is not None:
+        gate, started = admitted
+        gate.leave(time.monotonic() - started)
+
+
+def count_profiled_request(response):
+    """Count the request toward an open tracemalloc window."""
+    if MEMORY_PROFILER.active and not request.path.startswith('/api/admin/'):
+        MEMORY_PROFILER.on_request()
+    return response
+
+
+# Registered only when profiling is enabled, so other deployments pay nothing per request
+if MEMORY_PROFILER is not None:
+    app.after_request(count_profiled_request)
+
+
+@app.before_request
+def select_tenant():
+    """Pick the request's tenant from the path prefix or header, loading it on first use."""
+    tenant_id = request.environ.get(ENVIRON_KEY) or request.headers.get(TENANT_HEADER)
+    try:
+        g.tenant = TENANTS.get(tenant_id)
+    except UnknownTenant:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown tenant: {tenant_id}'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Could not load tenant {tenant_id}: {e}',
+            'traceback': traceback.format_exc()
+        }), 500
+    return None
+
+
+def current_tenant():
+    """The Tenant selected for the current request."""
+    return g.get('tenant', DEFAULT_TENANT)
+
+
+@app.before_request
+def refresh_catalog():
+    """Apply catalog changes journaled since the last check."""
+    tenant = current_tenant()
+    now = time.time()
+    if now - tenant.last_refresh >= JOURNAL_POLL_INTERVAL:
+        tenant.last_refresh = now
+        tenant.catalog.refresh()
+
+
+@app.before_request
+def warm_subsystems():
+    """Warm the subsystems the endpoint needs (see Startup.use); other tenants bring their own."""
+    default = current_tenant() is DEFAULT_TENANT
+    for name in ENDPOINT_SUBSYSTEMS.get(request.endpoint, ()):
+        if default or name in SHARED_SUBSYSTEMS:
+            STARTUP.use(name)
 
 
 # ==================== UTILITY ROUTES ====================
@@ -28,43 +304,170 @@ def health_check():
     """Health check endpoint."""
     return jsonify({
         'status': 'ok',
-        'courses_loaded': len(COURSES),
+        'courses_loaded': CATALOG.count(),
+        'catalog_source': CATALOG_SOURCE,
+        'shards': CATALOG.stats() if SHARD_URLS else None,
+        'path_table': PATH_TABLE.stats(),
+        'single_flight': SINGLE_FLIGHT.stats(),
+        'admission': ADMISSION.stats() if ADMISSION else None,
+        'graph_layouts': get_graph_layouts(CATALOG).stats(),
+        'co_completion': CO_COMPLETION.stats(),
+        'question_stats': QUESTION_STATS.stats(),
+        'tenants': TENANTS.stats(),
+        'static_assets': STATIC_ASSETS.stats(),
         'message': 'Learning Path Recommender API is running'
     }), 200
 
 
+def memory_structures():
+    """(name, object) pairs for every long-lived dataset and index, catalog first."""
+    structures = [('catalog', CATALOG)]
+    structures += [(f'derived.{name}', value) for name, value in CATALOG.__dict__.get('_derived', {}).items()]
+    structures += [
+        ('path_table', PATH_TABLE),
+        ('closures', CLOSURES),
+        ('co_completion', CO_COMPLETION),
+        ('questions', quiz_generator.DEFAULT_BANK),
+        ('question_stats', QUESTION_STATS),
+        ('static_assets', STATIC_ASSETS),
+        ('achievements', progress_manager._achievement_cache),
+        ('single_flight', SINGLE_FLIGHT),
+        ('admission', ADMISSION)
+    ]
+    structures += [(f'tenant.{tenant.id}', tenant) for tenant in TENANTS.loaded()]
+    return structures
+
+
+@app.route('/api/admin/memory', methods=['GET'])
+def memory_report():
+    """Deep size of each dataset and index, plus the last tracemalloc window."""
+    if MEMORY_PROFILER is None:
+        return not_found(None)
+    try:
+        return jsonify({
+            'success': True,
+            'sizes': structure_sizes(memory_structures()),
+            'trace': MEMORY_PROFILER.status()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
+@app.route('/api/admin/memory/trace', methods=['GET', 'POST', 'DELETE'])
+def memory_trace():
+    """
+    Open (POST), inspect (GET) or close early (DELETE) a tracemalloc window.
+
+    POST body (all optional):
+        requests: Requests in the window (default 100)
+        frames: Stack frames recorded per allocation (default 1)
+        limit: Allocation sites reported (default 20)
+        group_by: 'lineno', 'filename' or 'traceback'
+        include: Filename patterns to restrict the report to
+    """
+    if MEMORY_PROFILER is None:
+        return not_found(None)
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            try:
+                window = parse_count(data.get('requests'), 100)
+                frames = parse_count(data.get('frames'), 1)
+                limit = parse_count(data.get('limit'), 20)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'requests, frames and limit must be non-negative integers'
+                }), 400
+            group_by = data.get('group_by', 'lineno')
+            if group_by not in ('lineno', 'filename', 'traceback'):
+                return jsonify({
+                    'success': False,
+                    'error': "group_by must be 'lineno', 'filename' or 'traceback'"
+                }), 400
+            include = data.get('include') or []
+            if not isinstance(include, list):
+                include = [include]
+            if not MEMORY_PROFILER.start(max(window, 1), max(frames, 1), limit, group_by, include):
+                return jsonify({
+                    'success': False,
+                    'error': 'A tracemalloc window is already open'
+                }), 409
+        elif request.method == 'DELETE':
+            MEMORY_PROFILER.stop()
+
+        return jsonify({
+            'success': True,
+            'trace': MEMORY_PROFILER.status()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 until every subsystem has been warmed (or has failed to warm)."""
+    status = STARTUP.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
 # ==================== COURSE ROUTES ====================
 
 @app.route('/api/courses', methods=['GET'])
 def get_courses():
-    """Get all available courses."""
-    return jsonify({
+    """Get available courses in catalog order (?offset=0&limit=100)."""
+    tenant = current_tenant()
+    catalog = tenant.catalog
+    try:
+        offset = parse_count(request.args.get('offset'), 0)
+        limit = parse_count(request.args.get('limit'), None if catalog.in_memory else COURSE_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'offset and limit must be non-negative integers'
+        }), 400
+
+    courses = get_fragments(catalog).courses(catalog.page(offset, limit))
+    total = catalog.count()
+    return json_response({
         'success': True,
-        'data': COURSES,
-        'total': len(COURSES)
-    }), 200
+        'data': courses,
+        'total': total,
+        'offset': offset,
+        'next_offset': offset + len(courses) if offset + len(courses) < total else None
+    })
 
 
 @app.route('/api/courses/<course_id>', methods=['GET'])
 def get_course(course_id):
     """Get a specific course by ID."""
-    course = next((c for c in COURSES if c['id'] == course_id), None)
+    tenant = current_tenant()
+    course = tenant.catalog.get(course_id)
     if not course:
         return jsonify({
             'success': False,
             'error': 'Course not found'
         }), 404
     
-    return jsonify({
+    return json_response({
         'success': True,
-        'data': course
-    }), 200
+        'data': get_fragments(tenant.catalog).course(course)
+    })
 
 
 @app.route('/api/skills', methods=['GET'])
 def get_skills():
     """Get all unique skills in the database."""
-    skills = get_all_skills(COURSES)
+    tenant = current_tenant()
+    skills = tenant.catalog.skills()
     return jsonify({
         'success': True,
         'skills': skills,
@@ -72,16 +475,45 @@ def get_skills():
     }), 200
 
 
+@app.route('/api/skills/suggest', methods=['GET'])
+def suggest_skills():
+    """Suggest catalog skills for partial or misspelled input (?q=pyth&limit=5)."""
+    tenant = current_tenant()
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(parse_count(request.args.get('limit'), 5), 50)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'limit must be a non-negative integer'
+        }), 400
+    
+    matches = get_skill_resolver(tenant.catalog).search(query, limit=limit, min_score=0.2) if query else []
+    return jsonify({
+        'success': True,
+        'query': query,
+        'suggestions': [{'skill': name, 'score': score} for name, score in matches]
+    }), 200
+
+
+def resolve_skill(skill):
+    """Map free-text skill input to a catalog skill name, or return it unchanged."""
+    return get_skill_resolver(current_tenant().catalog).resolve(skill) or skill
+
+
 @app.route('/api/courses/by-skill/<skill>', methods=['GET'])
 def get_courses_for_skill(skill):
-    """Get all courses teaching a specific skill."""
-    courses = get_courses_by_skill(COURSES, skill)
-    return jsonify({
+    """Get all courses teaching a specific skill (misspellings and aliases are resolved)."""
+    tenant = current_tenant()
+    resolved = resolve_skill(skill)
+    courses = get_fragments(tenant.catalog).courses(tenant.catalog.by_skill(resolved))
+    return json_response({
         'success': True,
         'skill': skill,
+        'resolved_skill': resolved,
         'courses': courses,
         'total': len(courses)
-    }), 200
+    })
 
 
 # ==================== RECOMMENDATION ROUTES ====================
@@ -94,14 +526,24 @@ def recommend():
     Request body:
     {
         "skill": "target skill name",
-        "level": "Beginner|Intermediate|Advanced"
+        "level": "Beginner|Intermediate|Advanced",
+        "completed_courses": ["c1"],        (optional)
+        "peer_ordering": false              (optional, order ready courses by what similar learners took)
     }
     """
+    tenant = current_tenant()
     try:
         data = request.json or {}
         target_skill = data.get('skill', '').strip()
         level = data.get('level', 'Beginner').strip()
-        completed_courses = data.get('completed_courses', [])
+        completed_courses = parse_course_ids(data.get('completed_courses'))
+        peer_ordering = bool(data.get('peer_ordering', False))
+        
+        if completed_courses is None:
+            return jsonify({
+                'success': False,
+                'error': 'completed_courses must be a list of course IDs'
+            }), 400
         
         if not target_skill:
             return jsonify({
@@ -115,16 +557,274 @@ def recommend():
                 'error': f'Invalid level. Must be one of: Beginner, Intermediate, Advanced'
             }), 400
         
-        path = generate_path(COURSES, target_skill, level, completed_courses)
-        stats = calculate_path_stats(path)
+        resolved = resolve_skill(target_skill)
+        key = ('recommend', tenant.id, normalize_skill(resolved), level, frozenset(completed_courses))
+        path, stats = SINGLE_FLIGHT.do(
+            key, lambda: tenant.path_table.get(resolved, level, completed_courses)
+        )
         
+        record_completed(completed_courses)
+        if peer_ordering:
+            path = order_by_affinity(path, completed_courses, tenant.co_completion)
+        
+        return json_response({
+            'success': True,
+            'skill': target_skill,
+            'resolved_skill': resolved,
+            'level': level,
+            'path': get_fragments(tenant.catalog).path(path),
+            'stats': stats,
+            'token': encode_path_token(resolved, level, completed_courses)
+        })
+    
+    except Exception as e:
         return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
+def parse_course_ids(value):
+    """A list of course ID strings from a request field ([] when missing, None when invalid)."""
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(cid, str) for cid in value):
+        return None
+    return value
+
+
+def record_completed(completed_courses, previous=()):
+    """
+    Feed a learner's completed courses (catalog IDs only) to the co-completion
+    index. previous is the part of the list that was recorded before.
+    """
+    tenant = current_tenant()
+
+    def known(course_ids):
+        return [cid for cid in course_ids if isinstance(cid, str) and tenant.catalog.get(cid)]
+
+    tenant.co_completion.record(known(completed_courses), known(previous))
+
+
+@app.route('/api/courses/<course_id>/also-took', methods=['GET'])
+def also_took(course_id):
+    """Courses most often completed together with a course (?limit=5)."""
+    tenant = current_tenant()
+    if not tenant.catalog.get(course_id):
+        return jsonify({
+            'success': False,
+            'error': 'Course not found'
+        }), 404
+    try:
+        limit = parse_count(request.args.get('limit'), 5)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'limit must be a non-negative integer'
+        }), 400
+    
+    partners = tenant.co_completion.also_took(course_id, limit)
+    for partner in partners:
+        course = tenant.catalog.get(partner['id'])
+        partner['title'] = course.title if course else None
+    
+    return jsonify({
+        'success': True,
+        'course_id': course_id,
+        'also_took': partners,
+        'total': len(partners)
+    }), 200
+
+
+@app.route('/api/recommend/replan', methods=['POST'])
+def replan():
+    """
+    Update a previously generated path after completing courses.
+    
+    Request body:
+    {
+        "token": "token returned by /api/recommend or a previous replan",
+        "completed_courses": ["c1", "c2"]
+    }
+    """
+    tenant = current_tenant()
+    try:
+        data = request.json or {}
+        newly_completed = parse_course_ids(data.get('completed_courses'))
+        
+        if newly_completed is None:
+            return jsonify({
+                'success': False,
+                'error': 'completed_courses must be a list of course IDs'
+            }), 400
+        
+        try:
+            target_skill, level, old_completed = decode_path_token(data.get('token', ''))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        path, stats, delta = tenant.path_table.replan(target_skill, level, old_completed, newly_completed)
+        record_completed(old_completed | set(newly_completed), old_completed)
+        
+        return json_response({
             'success': True,
             'skill': target_skill,
             'level': level,
-            'path': path,
-            'stats': stats
-        }), 200
+            'path': get_fragments(tenant.catalog).path(path),
+            'stats': stats,
+            'delta': delta,
+            'token': encode_path_token(target_skill, level, old_completed | set(newly_completed))
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
+@app.route('/api/recommend/budget', methods=['POST'])
+def recommend_with_budget():
+    """
+    Plan the courses that cover the most target skills within a time budget.
+    
+    Request body:
+    {
+        "skill": "target skill name" or ["skill", ...],
+        "hours": 20,
+        "level": "Beginner|Intermediate|Advanced",
+        "completed_courses": ["c1"]
+    }
+    """
+    tenant = current_tenant()
+    try:
+        data = request.json or {}
+        skills = data.get('skills') or data.get('skill') or []
+        if isinstance(skills, str):
+            skills = [skills]
+        skills = [s.strip() for s in skills if isinstance(s, str) and s.strip()]
+        level = data.get('level', 'Beginner').strip()
+        completed_courses = parse_course_ids(data.get('completed_courses'))
+        
+        if completed_courses is None:
+            return jsonify({
+                'success': False,
+                'error': 'completed_courses must be a list of course IDs'
+            }), 400
+        
+        if not skills:
+            return jsonify({
+                'success': False,
+                'error': 'Skill parameter is required'
+            }), 400
+        
+        if level not in ['Beginner', 'Intermediate', 'Advanced']:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid level. Must be one of: Beginner, Intermediate, Advanced'
+            }), 400
+        
+        try:
+            hours = float(data.get('hours'))
+        except (TypeError, ValueError):
+            hours = -1
+        if not math.isfinite(hours) or hours <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'hours must be a positive number'
+            }), 400
+        
+        plan = plan_with_budget(tenant.catalog, skills, hours, level, completed_courses, tenant.closures)
+        
+        plan['path'] = get_fragments(tenant.catalog).path(plan['path'])
+        return json_response({
+            'success': True,
+            'skills': skills,
+            'level': level,
+            'hours': hours,
+            **plan
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
+@app.route('/api/path/graph', methods=['POST'])
+def path_graph():
+    """
+    Nodes, edges and layered coordinates for drawing a learning path graph.
+    
+    Request body (one of):
+    {"course_ids": ["c1", "c2"]}                       (an existing path, in order)
+    {"course_id": "c5"}                                (a course and all its prerequisites)
+    {"skill": "Python", "level": "Beginner", "completed_courses": []}
+    {"token": "token returned by /api/recommend"}
+    """
+    tenant = current_tenant()
+    try:
+        data = request.json or {}
+        
+        if data.get('course_ids') is not None:
+            course_ids = data['course_ids']
+            if not isinstance(course_ids, list) or not all(isinstance(cid, str) for cid in course_ids):
+                return jsonify({
+                    'success': False,
+                    'error': 'course_ids must be a list of course IDs'
+                }), 400
+        elif data.get('course_id'):
+            if not tenant.catalog.get(data['course_id']):
+                return jsonify({
+                    'success': False,
+                    'error': 'Course not found'
+                }), 404
+            course_ids = get_course_dependencies(tenant.catalog, data['course_id']) + [data['course_id']]
+        else:
+            if data.get('token'):
+                try:
+                    target_skill, level, completed_courses = decode_path_token(data['token'])
+                except ValueError as e:
+                    return jsonify({
+                        'success': False,
+                        'error': str(e)
+                    }), 400
+            else:
+                target_skill = resolve_skill(data.get('skill', '').strip())
+                level = data.get('level', 'Beginner').strip()
+                completed_courses = parse_course_ids(data.get('completed_courses'))
+                if completed_courses is None:
+                    return jsonify({
+                        'success': False,
+                        'error': 'completed_courses must be a list of course IDs'
+                    }), 400
+                if not target_skill:
+                    return jsonify({
+                        'success': False,
+                        'error': 'course_ids, course_id, skill or token is required'
+                    }), 400
+                if level not in ['Beginner', 'Intermediate', 'Advanced']:
+                    return jsonify({
+                        'success': False,
+                        'error': f'Invalid level. Must be one of: Beginner, Intermediate, Advanced'
+                    }), 400
+            path, _ = tenant.path_table.get(target_skill, level, completed_courses)
+            course_ids = [c['id'] for c in path]
+        
+        signature, graph = get_graph_layouts(tenant.catalog).get(course_ids)
+        
+        return json_response({
+            'success': True,
+            'signature': signature,
+            'graph': graph
+        })
     
     except Exception as e:
         return jsonify({
@@ -136,6 +836,32 @@ def recommend():
 
 # ==================== SKILL GAP ROUTES ====================
 
+def compute_skill_gap(catalog, profile_text, limit=None, offset=0, priority_only=False):
+    """Build the /api/skill-gap response body for a profile."""
+    analysis_result = analyze_profile(catalog, profile_text, limit, offset, priority_only)
+    return {
+        'success': True,
+        'gaps': analysis_result['gaps'],
+        'total_gaps': analysis_result['total_gaps'],
+        'offset': offset,
+        'limit': limit,
+        'mentioned_skills': get_mentioned_skills(catalog, profile_text),
+        'coverage': calculate_skill_coverage(catalog, profile_text),
+        'total_skills_available': len(catalog.skills()),
+        'detected_goal': analysis_result.get('detected_goal'),
+        'roadmap': analysis_result.get('roadmap')
+    }
+
+
+def parse_count(value, default):
+    """Parse an optional non-negative integer request parameter (raises ValueError)."""
+    if value is None:
+        return default
+    if isinstance(value, bool) or int(value) < 0:
+        raise ValueError(value)
+    return int(value)
+
+
 @app.route('/api/skill-gap', methods=['POST'])
 def skill_gap():
     """
@@ -143,12 +869,17 @@ def skill_gap():
     
     Request body:
     {
-        "profile": "user's background/experience description"
+        "profile": "user's background/experience description",
+        "limit": 10,               (optional, default: all gaps)
+        "offset": 0,               (optional)
+        "priority_only": false     (optional, only gaps required by the detected goal)
     }
     """
+    tenant = current_tenant()
     try:
         data = request.json or {}
         profile_text = data.get('profile', '').strip()
+        priority_only = bool(data.get('priority_only', False))
         
         if not profile_text:
             return jsonify({
@@ -156,21 +887,23 @@ def skill_gap():
                 'error': 'Profile text is required'
             }), 400
         
-        # Analyze profile
-        analysis_result = analyze_profile(COURSES, profile_text)
-        gaps = analysis_result['gaps']
-        mentioned_skills = get_mentioned_skills(COURSES, profile_text)
-        coverage = calculate_skill_coverage(COURSES, profile_text)
+        try:
+            limit = parse_count(data.get('limit'), None)
+            offset = parse_count(data.get('offset'), 0)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'limit and offset must be non-negative integers'
+            }), 400
         
-        return jsonify({
-            'success': True,
-            'gaps': gaps,
-            'mentioned_skills': mentioned_skills,
-            'coverage': coverage,
-            'total_skills_available': len(get_all_skills(COURSES)),
-            'detected_goal': analysis_result.get('detected_goal'),
-            'roadmap': analysis_result.get('roadmap')
-        }), 200
+        # Analyze profile; the engines only see the normalized text, so
+        # identical normalized profiles share one in-flight computation
+        result = SINGLE_FLIGHT.do(
+            ('skill_gap', tenant.id, normalize_text(profile_text), limit, offset, priority_only),
+            lambda: compute_skill_gap(tenant.catalog, profile_text, limit, offset, priority_only)
+        )
+        
+        return jsonify(result), 200
     
     except Exception as e:
         return jsonify({
@@ -183,7 +916,8 @@ def skill_gap():
 @app.route('/api/course/<course_id>/dependencies', methods=['GET'])
 def get_dependencies(course_id):
     """Get all prerequisites (direct and transitive) for a course."""
-    course = next((c for c in COURSES if c['id'] == course_id), None)
+    tenant = current_tenant()
+    course = tenant.catalog.get(course_id)
     
     if not course:
         return jsonify({
@@ -191,16 +925,16 @@ def get_dependencies(course_id):
             'error': 'Course not found'
         }), 404
     
-    dependencies = get_course_dependencies(COURSES, course_id)
-    dep_courses = [c for c in COURSES if c['id'] in dependencies]
+    dependencies = get_course_dependencies(tenant.catalog, course_id)
+    dep_courses = get_fragments(tenant.catalog).courses(c for c in map(tenant.catalog.get, dependencies) if c)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'course_id': course_id,
-        'course_title': course['title'],
+        'course_title': course.title,
         'dependencies': dep_courses,
         'total': len(dependencies)
-    }), 200
+    })
 
 
 # ==================== QUIZ ROUTES ====================
@@ -214,9 +948,16 @@ def generate_quiz_endpoint():
     {
         "skill": "skill name",
         "difficulty": "Beginner|Intermediate|Advanced",
-        "num_questions": 5
+        "num_questions": 5,
+        "adaptive": false,
+        "ability": 0.7
     }
+
+    With adaptive set, questions are picked by their empirical difficulty
+    from learners' answers, matched to ability (0-1, defaults to the
+    level of difficulty).
     """
+    tenant = current_tenant()
     try:
         data = request.json or {}
         skill = data.get('skill', '')
@@ -228,14 +969,23 @@ def generate_quiz_endpoint():
         if isinstance(difficulty, str):
             difficulty = difficulty.strip()
         num_questions = data.get('num_questions', 5)
+        adaptive = bool(data.get('adaptive', False))
+        ability = data.get('ability')
         
         if not skill:
             return jsonify({
                 'success': False,
                 'error': 'Skill parameter is required'
             }), 400
+
+        if ability is not None:
+            if isinstance(ability, bool) or not isinstance(ability, (int, float)) or not 0 <= ability <= 1:
+                return jsonify({
+                    'success': False,
+                    'error': 'ability must be a number between 0 and 1'
+                }), 400
         
-        quiz = generate_quiz(skill, difficulty, num_questions)
+        quiz = generate_quiz(skill, difficulty, num_questions, tenant.questions, adaptive, ability)
         
         if quiz['total_questions'] == 0:
             return jsonify({
@@ -271,6 +1021,7 @@ def evaluate_quiz_endpoint():
         }
     }
     """
+    tenant = current_tenant()
     try:
         data = request.json or {}
         quiz_id = data.get('quiz_id', '').strip()
@@ -282,7 +1033,7 @@ def evaluate_quiz_endpoint():
                 'error': 'quiz_id and answers are required'
             }), 400
         
-        results = evaluate_quiz(quiz_id, answers)
+        results = evaluate_quiz(quiz_id, answers, tenant.questions)
         
         return jsonify({
             'success': True,
@@ -301,7 +1052,7 @@ def evaluate_quiz_endpoint():
 def get_quiz_skills():
     """Get list of skills that have quiz questions available."""
     try:
-        skills = get_available_skills()
+        skills = get_available_skills(current_tenant().questions)
         return jsonify({
             'success': True,
             'skills': skills,
@@ -319,7 +1070,7 @@ def get_quiz_count(skill):
     """Get count of available quiz questions for a skill."""
     try:
         difficulty = request.args.get('difficulty')
-        count = get_question_count(skill, difficulty)
+        count = get_question_count(skill, difficulty, current_tenant().questions)
         
         return jsonify({
             'success': True,
@@ -456,15 +1207,125 @@ def calculate_xp():
         }), 500
 
 
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def progress_user_error(user):
+    """Describe what is wrong with one user of a progress events batch (None if it is valid)."""
+    if user.get('total_xp') is not None and not is_number(user['total_xp']):
+        return 'total_xp must be a number'
+    stats = user.get('user_stats')
+    if stats is not None:
+        if not isinstance(stats, dict):
+            return 'user_stats must be an object'
+        for stat in set(progress_manager.CONDITION_STATS.values()):
+            if stats.get(stat) is not None and not is_number(stats[stat]):
+                return f'user_stats.{stat} must be a number'
+        for field in ('unlocked_achievements', 'skills_learned'):
+            values = stats.get(field)
+            if values is not None and (not isinstance(values, list) or not all(isinstance(v, str) for v in values)):
+                return f'user_stats.{field} must be a list of strings'
+    for event in user.get('events', []):
+        if not isinstance(event, dict):
+            return 'events must be objects'
+        if not isinstance(event.get('action_type', ''), str):
+            return 'action_type must be a string'
+        details = event.get('details')
+        if details is None:
+            continue
+        if not isinstance(details, dict):
+            return 'event details must be an object'
+        skills = details.get('skills')
+        if skills is not None and (not isinstance(skills, list) or not all(isinstance(s, str) for s in skills)):
+            return 'event skills must be a list of strings'
+    return None
+
+
+@app.route('/api/progress/events', methods=['POST'])
+def ingest_progress_events():
+    """
+    Apply a batch of progress events for one or many users.
+    
+    Returns XP earned, the resulting level and newly unlocked achievements
+    per user in one response, replacing separate xp/level/achievement calls.
+    
+    Request body:
+    {
+        "users": [
+            {
+                "user_id": "u1",
+                "total_xp": 420,
+                "user_stats": {"courses_completed": 5, "unlocked_achievements": ["first_step"]},
+                "events": [
+                    {"action_type": "course_complete", "details": {"difficulty": "Intermediate", "skills": ["Python"]}},
+                    {"action_type": "quiz_pass"}
+                ]
+            }
+        ]
+    }
+    A single user may also be sent without the "users" wrapper.
+    """
+    try:
+        data = request.json or {}
+        users = data.get('users')
+        if users is None:
+            users = [data]
+        
+        if not isinstance(users, list) or not all(isinstance(u, dict) and isinstance(u.get('events', []), list) for u in users):
+            return jsonify({
+                'success': False,
+                'error': 'users must be a list of objects with an events list'
+            }), 400
+        
+        for user in users:
+            error = progress_user_error(user)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': error
+                }), 400
+        
+        total_events = sum(len(u.get('events', [])) for u in users)
+        if total_events > MAX_EVENTS:
+            return jsonify({
+                'success': False,
+                'error': f'Too many events in one batch (max {MAX_EVENTS})'
+            }), 400
+        
+        results = []
+        for user in users:
+            result = apply_events(user, user.get('events', []))
+            result['user_id'] = user.get('user_id')
+            results.append(result)
+        
+        return jsonify({
+            'success': True,
+            'users': results,
+            'total_events': total_events
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
 # ==================== FRONTEND ROUTES ====================
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_frontend(path):
-    """Serve frontend files."""
-    if path and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    return send_from_directory(app.static_folder, 'index.html')
+    """Serve frontend files from the asset table; unknown paths get index.html."""
+    response = STATIC_ASSETS.response(path, request)
+    if response is None:
+        return jsonify({
+            'success': False,
+            'error': 'Not found'
+        }), 404
+    return response
 
 
 # ==================== ERROR HANDLERS ====================
@@ -490,7 +1351,10 @@ def internal_error(error):
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
-    print(f"Loading {len(COURSES)} courses from {DATA_FILE}")
+    print(f"Loaded {CATALOG.count()} courses from {CATALOG_SOURCE} ({DATA_FILE})")
     print("Starting Learning Path Recommender API...")
     print("Access the app at: http://localhost:5000")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Frontend files are read once at startup, so restart when they change
+    frontend_files = [os.path.join(directory, name) for directory, _, names in os.walk(app.static_folder)
+                      for name in names]
+    app.run(host='0.0.0.0', port=5000, debug=True, extra_files=frontend_files)
@@ -0,0 +1,250 @@
+"""
+Offline bulk skill gap analysis.
+Streams profiles from a CSV or JSONL file (or stdin) through analyze_profile
+across all CPU cores and writes one JSONL result per profile.
+
+Usage:
+    python backend/batch_skill_gap.py profiles.jsonl -o results.jsonl
+    cat profiles.csv | python backend/batch_skill_gap.py - --format csv -o results.jsonl
+    python backend/batch_skill_gap.py profiles.jsonl -o results.jsonl --resume
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from itertools import islice
+
+from skill_gap import analyze_profile
+from course_repository import JsonCourseRepository
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'courses.json')
+
+# The catalog is loaded and indexed once per worker process by _init_worker
+_WORKER_CATALOG = None
+
+
+def read_records(stream, fmt):
+    """Yield raw records (dicts) from a CSV or JSONL text stream."""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield row
+        return
+
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield {'_error': 'Invalid JSON line'}
+
+
+def number_records(records, start_offset=0):
+    """Attach a running offset to each record, skipping the first start_offset."""
+    for offset, record in enumerate(records):
+        if offset < start_offset:
+            continue
+        yield offset, record
+
+
+def batched(iterable, size):
+    """Yield lists of at most size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _init_worker(data_file):
+    """Load the course catalog once in each worker process."""
+    global _WORKER_CATALOG
+    _WORKER_CATALOG = JsonCourseRepository.from_file(data_file)
+
+
+def analyze_record(item, id_field='id', profile_field='profile'):
+    """Run skill gap analysis for a single (offset, record) pair."""
+    offset, record = item
+    if not isinstance(record, dict):
+        return {'offset': offset, 'id': None, 'error': 'Record must be a JSON object'}
+    result = {'offset': offset, 'id': record.get(id_field)}
+
+    if '_error' in record:
+        result['error'] = record['_error']
+        return result
+
+    profile_text = record.get(profile_field) or ''
+    if not isinstance(profile_text, str):
+        result['error'] = 'Profile must be a string'
+        return result
+    profile_text = profile_text.strip()
+    if not profile_text:
+        result['error'] = 'Profile text is required'
+        return result
+
+    try:
+        analysis = analyze_profile(_WORKER_CATALOG, profile_text)
+        result['gaps'] = analysis['gaps']
+        result['detected_goal'] = analysis['detected_goal']
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def _analyze_args(args):
+    """Pool.imap helper that unpacks (item, id_field, profile_field)."""
+    return analyze_record(*args)
+
+
+def prepare_resume(filepath):
+    """
+    Count complete result lines in an existing output file.
+    A trailing partial line left by a crash is truncated away.
+    """
+    if not os.path.exists(filepath):
+        return 0
+    count = 0
+    good_size = 0
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            count += 1
+            good_size += len(line)
+    if good_size != os.path.getsize(filepath):
+        with open(filepath, 'r+b') as f:
+            f.truncate(good_size)
+    return count
+
+
+def run_batch(records, output, workers=None, batch_size=1000, start_offset=0,
+              id_field='id', profile_field='profile', progress_every=5.0, log=sys.stderr):
+    """
+    Analyze records in parallel and write JSONL results to output.
+
+    Only one batch of batch_size records is in flight at a time, so memory
+    stays bounded regardless of input size. Results are written in input
+    order and flushed after every batch, so the number of output lines is
+    always a safe resume offset.
+
+    Args:
+        records: Iterable of raw record dicts
+        output: Writable text stream for JSONL results
+        workers: Number of worker processes (defaults to CPU count)
+        batch_size: Records dispatched to the pool per batch
+        start_offset: Number of leading records to skip
+        id_field: Record field used as the result identifier
+        profile_field: Record field holding the profile text
+        progress_every: Seconds between progress reports
+        log: Stream for progress output (None to disable)
+
+    Returns:
+        Dictionary with processed, errors, elapsed and rate
+    """
+    workers = workers or multiprocessing.cpu_count()
+    numbered = number_records(records, start_offset)
+
+    processed = 0
+    errors = 0
+    started = time.time()
+    last_report = started
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(DATA_FILE,)) as pool:
+        for batch in batched(numbered, batch_size):
+            tasks = ((item, id_field, profile_field) for item in batch)
+            chunksize = max(1, len(batch) // (workers * 4))
+            for result in pool.imap(_analyze_args, tasks, chunksize=chunksize):
+                if 'error' in result:
+                    errors += 1
+                output.write(json.dumps(result) + '\n')
+                processed += 1
+            output.flush()
+
+            now = time.time()
+            if log and now - last_report >= progress_every:
+                elapsed = now - started
+                log.write(f"[batch] {processed} processed ({start_offset + processed} total), "
+                          f"{errors} errors, {processed / elapsed:.1f} profiles/s\n")
+                log.flush()
+                last_report = now
+
+    elapsed = time.time() - started
+    summary = {
+        'processed': processed,
+        'errors': errors,
+        'elapsed': round(elapsed, 2),
+        'rate': round(processed / elapsed, 1) if elapsed > 0 else 0
+    }
+    if log:
+        log.write(f"[batch] done: {summary['processed']} processed, {summary['errors']} errors "
+                  f"in {summary['elapsed']}s ({summary['rate']} profiles/s)\n")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk skill gap analysis over CSV/JSONL profiles.')
+    parser.add_argument('input', help="Input file path, or '-' for stdin")
+    parser.add_argument('-o', '--output', help='Output JSONL path (default: stdout)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='Input format (default: inferred from extension, jsonl for stdin)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Records per dispatched batch')
+    parser.add_argument('--start-offset', type=int, default=0, help='Skip the first N input records')
+    parser.add_argument('--resume', action='store_true',
+                        help='Append to --output, continuing after the records it already holds')
+    parser.add_argument('--id-field', default='id', help='Record field used as identifier')
+    parser.add_argument('--profile-field', default='profile', help='Record field holding profile text')
+    parser.add_argument('--progress-every', type=float, default=5.0, help='Seconds between progress reports')
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if not fmt:
+        fmt = 'csv' if args.input.lower().endswith('.csv') else 'jsonl'
+
+    start_offset = args.start_offset
+    mode = 'w'
+    if args.resume:
+        if not args.output:
+            parser.error('--resume requires --output')
+        start_offset = args.start_offset + prepare_resume(args.output)
+        mode = 'a'
+        print(f"[batch] resuming at offset {start_offset}", file=sys.stderr)
+
+    if args.input == '-':
+        in_stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    else:
+        in_stream = open(args.input, 'r', encoding='utf-8', newline='')
+
+    out_stream = open(args.output, mode, encoding='utf-8') if args.output else sys.stdout
+
+    try:
+        run_batch(
+            read_records(in_stream, fmt),
+            out_stream,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            start_offset=start_offset,
+            id_field=args.id_field,
+            profile_field=args.profile_field,
+            progress_every=args.progress_every
+        )
+    finally:
+        if args.input == '-':
+            # Leave sys.stdin.buffer open; closing the wrapper would close it too
+            in_stream.detach()
+        else:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Catalog integrity and topology compiler.
+Validates the prerequisite graph once at load time: detects cycles,
+dangling prerequisite IDs and duplicate course IDs, and assigns every
+course a topological rank and depth so paths can be ordered by sorting.
+
+Check a catalog from the command line:
+    python backend/catalog_compiler.py data/courses.json
+"""
+
+import argparse
+import heapq
+import json
+import sys
+
+from records import as_course_record
+from utils import load_courses
+
+
+class CatalogTopology:
+    """
+    Result of compiling a catalog's prerequisite graph.
+
+    Attributes:
+        rank: course ID -> position in a topological order (prerequisites first)
+        depth: course ID -> length of the longest prerequisite chain below it
+        order: course IDs in topological order
+        cycles: lists of course IDs that form prerequisite cycles
+        quarantined: IDs on a cycle or depending on one; they have no rank
+        dangling: (course ID, missing prerequisite ID) pairs
+        duplicates: course IDs defined more than once
+    """
+
+    def __init__(self, rank, depth, order, cycles, quarantined, dangling, duplicates):
+        self.rank = rank
+        self.depth = depth
+        self.order = order
+        self.cycles = cycles
+        self.quarantined = quarantined
+        self.dangling = dangling
+        self.duplicates = duplicates
+
+    @property
+    def ok(self):
+        """True when the catalog has no cycles or duplicate IDs."""
+        return not self.cycles and not self.duplicates
+
+    def sort_key(self, course_id):
+        """Sort key placing courses in topological order, quarantined ones last."""
+        return self.rank.get(course_id, len(self.rank))
+
+    def report(self, limit=20):
+        """Summarize the findings, listing at most limit items per category."""
+        return {
+            'courses': len(self.rank) + len(self.quarantined),
+            'ordered': len(self.rank),
+            'max_depth': max(self.depth.values(), default=0),
+            'cycles': len(self.cycles),
+            'quarantined': len(self.quarantined),
+            'dangling': len(self.dangling),
+            'duplicates': len(self.duplicates),
+            'examples': {
+                'cycles': self.cycles[:limit],
+                'dangling': [list(pair) for pair in self.dangling[:limit]],
+                'duplicates': self.duplicates[:limit]
+            }
+        }
+
+
+def _strongly_connected(nodes, successors):
+    """Iterative Tarjan's algorithm; returns the strongly connected components of nodes."""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors.get(root, ())))]
+
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors.get(child, ()))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def compile_catalog(courses):
+    """
+    Compile the prerequisite graph of a catalog with Kahn's algorithm.
+
+    Ties between ready courses are broken by catalog position, so the
+    topological order stays close to the order of courses.json.
+
+    Args:
+        courses: Iterable of course records or dicts
+
+    Returns:
+        CatalogTopology
+    """
+    position = {}
+    prerequisites = {}
+    duplicates = []
+    for course in courses:
+        course = as_course_record(course)
+        if course.id in position:
+            duplicates.append(course.id)
+            continue
+        position[course.id] = len(position)
+        prerequisites[course.id] = course.prerequisites
+
+    indegree = dict.fromkeys(position, 0)
+    dependents = {}
+    dangling = []
+    for course_id, prereqs in prerequisites.items():
+        for prereq_id in dict.fromkeys(prereqs):
+            if prereq_id not in position:
+                dangling.append((course_id, prereq_id))
+                continue
+            indegree[course_id] += 1
+            dependents.setdefault(prereq_id, []).append(course_id)
+
+    ready = [(position[cid], cid) for cid, degree in indegree.items() if degree == 0]
+    heapq.heapify(ready)
+    depth = dict.fromkeys(position, 0)
+    rank = {}
+    order = []
+
+    while ready:
+        _, course_id = heapq.heappop(ready)
+        rank[course_id] = len(order)
+        order.append(course_id)
+        for dependent in dependents.get(course_id, ()):
+            depth[dependent] = max(depth[dependent], depth[course_id] + 1)
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                heapq.heappush(ready, (position[dependent], dependent))
+
+    # Whatever Kahn could not order sits on a cycle or depends on one
+    remaining = [cid for cid in position if cid not in rank]
+    quarantined = set(remaining)
+    cycles = []
+    if remaining:
+        successors = {
+            cid: [d for d in dependents.get(cid, ()) if d in quarantined]
+            for cid in remaining
+        }
+        for component in _strongly_connected(remaining, successors):
+            if len(component) > 1 or component[0] in successors[component[0]]:
+                cycles.append(sorted(component, key=position.get))
+
+    for cid in remaining:
+        depth.pop(cid, None)
+
+    return CatalogTopology(rank, depth, order, cycles, quarantined, dangling, duplicates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate a course catalog and compute its topology.')
+    parser.add_argument('catalog', help='Path to a courses JSON file')
+    parser.add_argument('--limit', type=int, default=20, help='Examples to list per problem type')
+    parser.add_argument('--ranks', help='Write {id: [rank, depth]} for every ordered course to this file')
+    args = parser.parse_args(argv)
+
+    topology = compile_catalog(load_courses(args.catalog))
+    print(json.dumps(topology.report(args.limit), indent=2))
+
+    if args.ranks:
+        with open(args.ranks, 'w', encoding='utf-8') as f:
+            json.dump({cid: [topology.rank[cid], topology.depth[cid]] for cid in topology.order}, f)
+
+    return 0 if topology.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
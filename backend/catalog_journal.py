@@ -0,0 +1,309 @@
+"""
+Append-only change journal for the JSON course catalog.
+Edits are appended as JSONL upsert/delete entries instead of rewriting
+courses.json, and periodically compacted into the base file through an
+atomic write-to-temp-and-rename. Appends and compaction take an exclusive
+flock on a sidecar lock file, so several processes can write one journal
+(on platforms without fcntl only one writing process is supported).
+
+Each compaction starts the new journal with a header line carrying a
+generation number. A reader that finds it skipped a generation, and so
+never saw the entries folded into the base file, reloads the base file.
+
+Compact the journal manually:
+    python backend/catalog_journal.py compact data/courses.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from utils import load_courses, save_courses
+
+
+def journal_path_for(base_path):
+    """Return the journal path that belongs to a base catalog file."""
+    return os.path.splitext(base_path)[0] + '.journal.jsonl'
+
+
+# Op of the header line that starts every compacted journal
+HEADER_OP = 'base'
+
+
+def journal_generation(path):
+    """Generation in the header of a journal file (0 for a missing file or one without a header)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            first = f.readline()
+    except FileNotFoundError:
+        return 0
+    try:
+        entry = json.loads(first)
+    except json.JSONDecodeError:
+        return 0
+    if isinstance(entry, dict) and entry.get('op') == HEADER_OP:
+        return entry.get('generation', 0)
+    return 0
+
+
+def apply_entry(courses, entry):
+    """Apply a single journal entry to a plain course list in place."""
+    if entry.get('op') == 'upsert':
+        course = entry['course']
+        for i, existing in enumerate(courses):
+            if existing.get('id') == course['id']:
+                courses[i] = course
+                return
+        courses.append(course)
+    elif entry.get('op') == 'delete':
+        courses[:] = [c for c in courses if c.get('id') != entry['id']]
+
+
+class CatalogJournal:
+    """
+    Writer and tailer for one journal file.
+
+    Writers append one fsynced line per change. Readers keep the journal
+    open and poll() for lines added since their last read. Compaction
+    replaces the journal with a fresh file of the next generation, so a
+    reader drains the old file through its open handle before switching
+    to the new one and no entry is missed. A reader that finds a
+    generation other than the one it expects missed entries that are now
+    only in the base file; poll() then sets stale and the caller must
+    reload() instead of applying the entries.
+    """
+
+    def __init__(self, base_path, journal_path=None):
+        self.base_path = base_path
+        self.path = journal_path or journal_path_for(base_path)
+        # The journal itself is replaced on compaction, so writers lock a file that is not
+        self.lock_path = self.path + '.lock'
+        self._lock = threading.Lock()
+        self._reader = None
+        self._buffer = ''
+        # Entries read from the current journal file, used to trigger compaction
+        self.pending = 0
+        # Generation of the base file the caller's courses were loaded from;
+        # the caller loaded them just before creating the journal
+        self.generation = journal_generation(self.path)
+        # Generation in the header of the file the reader has open
+        self._file_generation = 0
+        self.stale = False
+
+    @contextmanager
+    def _locked(self):
+        """Exclude other threads and, where fcntl exists, other processes writing this journal."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def append(self, entry):
+        """Durably append one entry. Returns True on success."""
+        line = json.dumps(entry) + '\n'
+        try:
+            with self._locked():
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Error writing journal {self.path}: {e}")
+            return False
+        return True
+
+    def upsert(self, course):
+        return self.append({'op': 'upsert', 'course': course})
+
+    def delete(self, course_id):
+        return self.append({'op': 'delete', 'id': course_id})
+
+    def _open_reader(self):
+        try:
+            self._reader = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            self._reader = None
+        self._buffer = ''
+        self._file_generation = 0
+
+    def _rotated(self):
+        """True when the journal path now points at a different file than the reader."""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        opened = os.fstat(self._reader.fileno())
+        return (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev)
+
+    def _drain(self):
+        entries = []
+        chunk = self._reader.read()
+        if not chunk:
+            return entries
+        data = self._buffer + chunk
+        lines = data.split('\n')
+        # The last element is a partial line still being written (or '')
+        self._buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupt journal line in {self.path}")
+                    continue
+                if isinstance(entry, dict) and entry.get('op') == HEADER_OP:
+                    self._file_generation = entry.get('generation', 0)
+                else:
+                    entries.append(entry)
+        return entries
+
+    def _check_generation(self, expected):
+        """Mark the reader stale unless the open file is the expected generation."""
+        if self._file_generation != expected:
+            self.stale = True
+
+    def poll(self):
+        """
+        Return entries appended since the previous poll (all entries on first call).
+        Check stale afterwards: when set, the entries are incomplete and the
+        caller must reload() instead.
+        """
+        if self._reader is None:
+            self._open_reader()
+            if self._reader is None:
+                return []
+            entries = self._drain()
+            self.pending = len(entries)
+            self._check_generation(self.generation)
+            return entries
+
+        entries = self._drain()
+        self.pending += len(entries)
+        if self._rotated():
+            # Appends that landed just before the compaction renamed the file
+            entries.extend(self._drain())
+            self._reader.close()
+            self._open_reader()
+            self.pending = 0
+            if self._reader is not None:
+                fresh = self._drain()
+                self.pending = len(fresh)
+                entries.extend(fresh)
+            # One compaction folded only entries already read; more means some were missed
+            self._check_generation(self.generation + 1)
+            self.generation = self._file_generation
+        return entries
+
+    def reload(self):
+        """
+        Read the base file and the whole current journal while writers are
+        locked out, and continue tailing from there. Returns the course list
+        with the journal applied.
+        """
+        with self._locked():
+            courses = load_courses(self.base_path)
+            if self._reader is not None:
+                self._reader.close()
+            self._open_reader()
+            entries = self._drain() if self._reader is not None else []
+            self.generation = self._file_generation
+            self.pending = len(entries)
+            self.stale = False
+        for entry in entries:
+            apply_entry(courses, entry)
+        return courses
+
+    def load(self):
+        """Load the base file with all journal entries applied, and start tailing."""
+        return self.reload()
+
+    def _read_all(self):
+        """Every complete entry in the journal file, read independently of the tailer."""
+        entries = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    # A line without its newline is an append cut short by a crash
+                    if line.endswith('\n') and line.strip():
+                        try:
+                            entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            print(f"Skipping corrupt journal line in {self.path}")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def compact(self):
+        """
+        Fold the journal into the base file and start an empty journal.
+
+        The new base is rebuilt from the files on disk while appends are
+        locked out, so entries from other writers that this process has
+        not read yet are kept. Both files are replaced through
+        write-to-temp-and-rename, so a crash leaves either the old base
+        plus full journal or the new base. If the base file is missing or
+        unreadable the compaction is abandoned, since folding the journal
+        into an empty catalog would drop every course. Returns True on
+        success.
+        """
+        try:
+            with self._locked():
+                with open(self.base_path, 'r', encoding='utf-8') as f:
+                    courses = json.load(f)
+                if not isinstance(courses, list):
+                    print(f"Error: {self.base_path} is not a course list, not compacting")
+                    return False
+                for entry in self._read_all():
+                    apply_entry(courses, entry)
+                if not save_courses(self.base_path, courses):
+                    return False
+                header = {'op': HEADER_OP, 'generation': journal_generation(self.path) + 1}
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(header) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+        except json.JSONDecodeError:
+            print(f"Error: Invalid JSON in {self.base_path}, not compacting")
+            return False
+        except OSError as e:
+            print(f"Error rotating journal {self.path}: {e}")
+            return False
+        self.pending = 0
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Course catalog journal tools.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    comp = sub.add_parser('compact', help='Fold the journal into the base JSON file')
+    comp.add_argument('base_file')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compact':
+        journal = CatalogJournal(args.base_file)
+        courses = journal.load()
+        applied = journal.pending
+        if not journal.compact():
+            return 1
+        print(f"Compacted {applied} journal entries into {args.base_file} ({len(courses)} courses)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
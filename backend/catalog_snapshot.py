@@ -0,0 +1,262 @@
+"""
+Precompiled binary catalog snapshot.
+Compiles courses.json plus the derived course indexes into a single versioned
+file that can be memory-mapped at startup instead of re-parsing JSON and
+rebuilding indexes.
+
+Build the snapshot after editing the data files:
+    python backend/catalog_snapshot.py build
+
+Snapshot layout:
+    MAGIC (8 bytes) | format version (uint32) | header length (uint32)
+    HMAC-SHA256 of the header and sections (32 bytes)
+    header (JSON: source hashes and section offsets)
+    sections (one pickle blob per section)
+
+Sections are pickles, so a snapshot is only decoded after its HMAC checks
+out against this server's key (SNAPSHOT_KEY, or data/snapshot.key, created
+on first use). A snapshot copied in from elsewhere, such as a partner's
+tenant directory, is ignored unless it was built with the same key.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+
+from records import CourseRecord, build_course_index
+from utils import load_courses
+
+MAGIC = b'LPRSNAP\x00'
+FORMAT_VERSION = 5
+_PREFIX = struct.Struct('<8sII32s')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+SNAPSHOT_FILE = os.path.join(DATA_DIR, 'catalog.snapshot')
+KEY_FILE = os.path.join(DATA_DIR, 'snapshot.key')
+
+# The files the snapshot is compiled from. Only the course catalog is served
+# from the snapshot; the other data files are read directly, so editing them
+# must not make the snapshot stale.
+SOURCE_FILES = ('courses.json',)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or from another format version."""
+
+
+def snapshot_key(key_file=KEY_FILE):
+    """
+    Return the key snapshots are signed with: the SNAPSHOT_KEY environment
+    variable if set, otherwise the contents of key_file, which is created
+    with a random key (readable by the owner only) when missing.
+    """
+    env_key = os.environ.get('SNAPSHOT_KEY')
+    if env_key:
+        return env_key.encode('utf-8')
+    try:
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(key_file, 'rb') as f:
+            return f.read().strip()
+    key = os.urandom(32).hex().encode('ascii')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def hash_file(filepath):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hashes(data_dir=DATA_DIR):
+    """Hash the SOURCE_FILES present in data_dir, keyed by file name."""
+    return {
+        name: hash_file(os.path.join(data_dir, name))
+        for name in SOURCE_FILES
+        if os.path.isfile(os.path.join(data_dir, name))
+    }
+
+
+def build_snapshot(data_dir=DATA_DIR, snapshot_path=SNAPSHOT_FILE, key=None):
+    """
+    Compile the SOURCE_FILES and derived indexes into a snapshot.
+
+    The course records and their build_course_index indexes are stored
+    together as a 'course_catalog' section so the indexes keep referencing
+    the same course dicts after decoding. The file is signed with key
+    (snapshot_key() by default).
+
+    Returns:
+        Dictionary with the snapshot path, size and section names
+    """
+    hashes = source_hashes(data_dir)
+    sections = {}
+    if 'courses.json' in hashes:
+        with open(os.path.join(data_dir, 'courses.json'), 'r', encoding='utf-8-sig') as f:
+            courses = [CourseRecord.from_dict(c) for c in json.load(f)]
+        sections['course_catalog'] = {'courses': courses, 'index': build_course_index(courses)}
+
+    blobs = {name: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+             for name, value in sections.items()}
+
+    # Offsets are relative to the end of the header, so the header can
+    # describe its own layout without knowing its encoded length
+    layout = {}
+    offset = 0
+    for name, blob in blobs.items():
+        layout[name] = [offset, len(blob)]
+        offset += len(blob)
+
+    header = json.dumps({
+        'sources': hashes,
+        'sections': layout,
+        'created': time.time()
+    }).encode('utf-8')
+
+    mac = hmac.new(key or snapshot_key(), header, hashlib.sha256)
+    for blob in blobs.values():
+        mac.update(blob)
+
+    tmp_path = snapshot_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header), mac.digest()))
+        f.write(header)
+        for blob in blobs.values():
+            f.write(blob)
+    os.replace(tmp_path, snapshot_path)
+
+    return {
+        'path': snapshot_path,
+        'size': os.path.getsize(snapshot_path),
+        'sections': list(layout)
+    }
+
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file with lazily decoded
+    sections. Raises SnapshotError unless the file is signed with key
+    (snapshot_key() by default).
+    """
+
+    def __init__(self, snapshot_path=SNAPSHOT_FILE, key=None):
+        try:
+            self._file = open(snapshot_path, 'rb')
+        except OSError as e:
+            raise SnapshotError(f"Cannot open snapshot {snapshot_path}: {e}")
+
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, header_len, signature = _PREFIX.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise SnapshotError('Not a catalog snapshot')
+            if version != FORMAT_VERSION:
+                raise SnapshotError(f"Snapshot format {version}, expected {FORMAT_VERSION}")
+            start = _PREFIX.size
+            mac = hmac.new(key or snapshot_key(), memoryview(self._map)[start:], hashlib.sha256)
+            if not hmac.compare_digest(mac.digest(), signature):
+                raise SnapshotError(f"Snapshot {snapshot_path} was not signed with this server's key")
+            header = json.loads(self._map[start:start + header_len].decode('utf-8'))
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise SnapshotError(f"Corrupt snapshot: {e}")
+        except SnapshotError:
+            self.close()
+            raise
+
+        self.path = snapshot_path
+        self.sources = header['sources']
+        self.sections = header['sections']
+        self.created = header.get('created')
+        self._body = _PREFIX.size + header_len
+        self._cache = {}
+
+    def is_fresh(self, data_dir=DATA_DIR):
+        """Check the snapshot against the current content hashes of the source files."""
+        return source_hashes(data_dir) == self.sources
+
+    def load(self, name):
+        """Decode and return a section, caching the result."""
+        if name not in self._cache:
+            if name not in self.sections:
+                raise KeyError(name)
+            offset, length = self.sections[name]
+            start = self._body + offset
+            self._cache[name] = pickle.loads(memoryview(self._map)[start:start + length])
+        return self._cache[name]
+
+    def close(self):
+        """Release the memory map and file handle."""
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def load_catalog(data_file, snapshot_path=SNAPSHOT_FILE):
+    """
+    Load the course list and its indexes, preferring a fresh snapshot.
+
+    Falls back to parsing data_file and rebuilding the indexes when the
+    snapshot is missing, corrupt, from another format version, or stale
+    (its source hashes no longer match the data directory).
+
+    Returns:
+        Tuple of (course records, course_index, source) where source is
+        'snapshot' or 'json'
+    """
+    data_dir = os.path.dirname(os.path.abspath(data_file))
+    if os.path.exists(snapshot_path):
+        try:
+            snapshot = CatalogSnapshot(snapshot_path)
+            try:
+                if snapshot.is_fresh(data_dir):
+                    catalog = snapshot.load('course_catalog')
+                    return catalog['courses'], catalog['index'], 'snapshot'
+                print(f"Snapshot {snapshot_path} is stale, falling back to JSON")
+            finally:
+                snapshot.close()
+        except (SnapshotError, KeyError, pickle.UnpicklingError) as e:
+            print(f"Ignoring snapshot: {e}")
+
+    courses = [CourseRecord.from_dict(c) for c in load_courses(data_file)]
+    return courses, build_course_index(courses), 'json'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or inspect the binary catalog snapshot.')
+    parser.add_argument('command', choices=['build', 'check'])
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Directory holding the JSON data files')
+    parser.add_argument('--snapshot', default=SNAPSHOT_FILE, help='Snapshot file path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        info = build_snapshot(args.data_dir, args.snapshot)
+        print(f"Wrote {info['path']} ({info['size']} bytes): {', '.join(info['sections'])}")
+        return 0
+
+    try:
+        snapshot = CatalogSnapshot(args.snapshot)
+    except SnapshotError as e:
+        print(e)
+        return 1
+    fresh = snapshot.is_fresh(args.data_dir)
+    snapshot.close()
+    print(f"{args.snapshot}: {'fresh' if fresh else 'stale'}")
+    return 0 if fresh else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+"Learners also took" co-completion index.
+Counts how often pairs of courses appear together in the completed_courses
+lists sent with recommendation requests. Counts live in a sparse symmetric
+map whose size is bounded by pruning the rarest pairs, each course keeps
+its top-K partners up to date so lookups cost O(K), and the counts are
+saved to disk periodically.
+"""
+
+import heapq
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils import write_json_atomic
+
+# Courses taken from one completed list; longer lists are truncated to
+# keep a single request's update cost bounded (pairs grow quadratically)
+MAX_COURSES_PER_RECORD = 50
+
+
+class CoCompletionIndex:
+    """
+    Sparse co-completion counts with per-course top-K partner lists.
+
+    Args:
+        path: JSON file to load from and save to (None keeps it in memory)
+        max_pairs: Distinct pairs kept before the rarest are pruned
+        top_k: Partners kept ready per course
+        save_interval: Minimum seconds between saves triggered by record()
+        dedupe_window: Recently seen completed lists that are not counted
+            again, so a client repeating the same list does not inflate counts
+        load: Read path now (False leaves it to an explicit load() call)
+    """
+
+    def __init__(self, path=None, max_pairs=200000, top_k=10, save_interval=60.0, dedupe_window=10000,
+                 load=True):
+        self.path = path
+        self.max_pairs = max_pairs
+        self.top_k = top_k
+        self.save_interval = save_interval
+        self.dedupe_window = dedupe_window
+        # course ID -> {partner ID: count}; every pair is stored both ways
+        self._pairs = {}
+        self._pair_count = 0
+        # course ID -> number of recorded lists containing it
+        self._courses = {}
+        # course ID -> [(count, partner ID)] sorted by count, descending
+        self._top = {}
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes saves so an older copy of the counts never replaces a newer one
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saving = False
+        self._last_save = time.time()
+        self.recorded = 0
+        self.pruned = 0
+        if path and load:
+            self.load()
+
+    def record(self, course_ids, previous=()):
+        """
+        Count every pair in one completed-courses list.
+
+        Args:
+            course_ids: The learner's completed courses
+            previous: Courses from the same learner's earlier list, which
+                was counted already; only courses not in it, and their
+                pairs, are counted
+
+        Returns:
+            True if the list was counted, False if it was too short, a
+            repeat or had nothing new
+        """
+        course_ids = sorted(set(course_ids) | set(previous))[:MAX_COURSES_PER_RECORD]
+        if len(course_ids) < 2:
+            return False
+        # A previous list this short was never counted
+        previous = set(previous) if len(set(previous)) >= 2 else set()
+        new_ids = {course_id for course_id in course_ids if course_id not in previous}
+        if not new_ids:
+            return False
+        signature = hash(tuple(course_ids))
+
+        with self._lock:
+            if signature in self._recent:
+                self._recent.move_to_end(signature)
+                return False
+            self._recent[signature] = None
+            if len(self._recent) > self.dedupe_window:
+                self._recent.popitem(last=False)
+
+            for course_id in new_ids:
+                self._courses[course_id] = self._courses.get(course_id, 0) + 1
+            for i, a in enumerate(course_ids):
+                for b in course_ids[i + 1:]:
+                    if a in new_ids or b in new_ids:
+                        self._increment(a, b)
+                        self._increment(b, a)
+            self.recorded += 1
+            self._dirty = True
+            if self._pair_count > self.max_pairs:
+                self._prune()
+
+        self.maybe_save()
+        return True
+
+    def _increment(self, a, b):
+        partners = self._pairs.setdefault(a, {})
+        count = partners.get(b, 0) + 1
+        if count == 1 and a < b:
+            self._pair_count += 1
+        partners[b] = count
+        self._update_top(a, b, count)
+
+    def _update_top(self, a, b, count):
+        """Keep a's top-K list exact; counts only grow by one between prunes."""
+        top = self._top.setdefault(a, [])
+        for i, (_, partner) in enumerate(top):
+            if partner == b:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.top_k:
+                last_count, last_id = top[-1]
+                if count < last_count or (count == last_count and b > last_id):
+                    return
+        # Insert keeping count order (ties: partner ID) and trim to K
+        i = len(top)
+        while i > 0 and (top[i - 1][0] < count or (top[i - 1][0] == count and top[i - 1][1] > b)):
+            i -= 1
+        top.insert(i, (count, b))
+        del top[self.top_k:]
+
+    def _rebuild_top(self, course_id):
+        partners = self._pairs.get(course_id)
+        if not partners:
+            self._top.pop(course_id, None)
+            return
+        ranked = sorted(((count, partner) for partner, count in partners.items()),
+                        key=lambda item: (-item[0], item[1]))
+        self._top[course_id] = ranked[:self.top_k]
+
+    def _prune(self):
+        """Drop the rarest pairs until at most 3/4 of max_pairs remain."""
+        target = self.max_pairs * 3 // 4
+        floor = 1
+        while self._pair_count > target:
+            for a in list(self._pairs):
+                partners = self._pairs[a]
+                for b in [b for b, count in partners.items() if count <= floor]:
+                    del partners[b]
+                    if a < b:
+                        self._pair_count -= 1
+                        self.pruned += 1
+                if not partners:
+                    del self._pairs[a]
+            floor += 1
+        for course_id in list(self._top):
+            self._rebuild_top(course_id)
+
+    def count(self, a, b):
+        """Number of recorded lists containing both a and b (0 if pruned)."""
+        return self._pairs.get(a, {}).get(b, 0)
+
+    def also_took(self, course_id, limit=None):
+        """
+        Courses most often completed together with course_id, best first.
+
+        Returns:
+            List of dicts with id, count and confidence (share of recorded
+            lists containing course_id that also contain the partner)
+        """
+        top = self._top.get(course_id, ())
+        seen = self._courses.get(course_id, 0) or 1
+        return [
+            {'id': partner, 'count': count, 'confidence': round(count / seen, 3)}
+            for count, partner in top[:limit if limit is not None else self.top_k]
+        ]
+
+    def affinity(self, course_id, completed):
+        """How strongly course_id co-occurs with a set of completed courses."""
+        partners = self._pairs.get(course_id)
+        if not partners:
+            return 0.0
+        return sum(partners.get(c, 0) / (self._courses.get(c) or 1) for c in completed)
+
+    def maybe_save(self):
+        """Save in a background thread when there are changes and save_interval has passed."""
+        if not self.path or not self._dirty:
+            return False
+        with self._lock:
+            if self._saving or time.time() - self._last_save < self.save_interval:
+                return False
+            self._saving = True
+        threading.Thread(target=self._save_in_background, daemon=True).start()
+        return True
+
+    def _save_in_background(self):
+        try:
+            self.save()
+        finally:
+            self._saving = False
+
+    def save(self):
+        """Atomically write the counts to self.path. Returns True on success."""
+        with self._save_lock:
+            with self._lock:
+                pairs = [[a, b, count] for a, partners in self._pairs.items()
+                         for b, count in partners.items() if a < b]
+                data = {'version': 1, 'courses': dict(self._courses), 'pairs': pairs}
+                self._dirty = False
+                self._last_save = time.time()
+
+            try:
+                write_json_atomic(self.path, data)
+            except OSError as e:
+                print(f"Error saving co-completion index {self.path}: {e}")
+                self._dirty = True
+                return False
+            return True
+
+    def flush(self):
+        """Save now if there are unsaved changes. Returns True if a save succeeded."""
+        if not self.path or not self._dirty:
+            return False
+        return self.save()
+
+    def load(self):
+        """Load counts from self.path if it exists. Returns the number of pairs loaded."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading co-completion index {self.path}: {e}")
+            return 0
+
+        with self._lock:
+            self._courses = dict(data.get('courses', {}))
+            self._pairs = {}
+            for a, b, count in data.get('pairs', []):
+                self._pairs.setdefault(a, {})[b] = count
+                self._pairs.setdefault(b, {})[a] = count
+            self._pair_count = len(data.get('pairs', []))
+            for course_id in self._pairs:
+                self._rebuild_top(course_id)
+        return self._pair_count
+
+    def stats(self):
+        return {
+            'pairs': self._pair_count,
+            'courses': len(self._courses),
+            'recorded': self.recorded,
+            'pruned': self.pruned
+        }
+
+
+def order_by_affinity(path, completed, index):
+    """
+    Reorder a learning path so that, among courses whose prerequisites on
+    the path are already placed, those most often taken with the learner's
+    completed courses come first. Prerequisites still precede dependents,
+    and ties keep the original order.
+    """
+    completed = set(completed)
+    if not completed or len(path) < 2:
+        return path
+    on_path = {c['id'] for c in path}
+    waiting = {c['id']: sum(1 for p in set(c['prerequisites']) if p in on_path) for c in path}
+    dependents = {}
+    for c in path:
+        for p in set(c['prerequisites']):
+            if p in on_path:
+                dependents.setdefault(p, []).append(c['id'])
+
+    position = {c['id']: i for i, c in enumerate(path)}
+    by_id = {c['id']: c for c in path}
+    score = {cid: index.affinity(cid, completed) for cid in on_path}
+    ready = [(-score[cid], position[cid], cid) for cid in waiting if waiting[cid] == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        _, _, cid = heapq.heappop(ready)
+        ordered.append(by_id[cid])
+        for dependent in dependents.get(cid, ()):
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, (-score[dependent], position[dependent], dependent))
+    # Courses on a prerequisite cycle within the path keep their relative order
+    placed = {c['id'] for c in ordered}
+    ordered.extend(c for c in path if c['id'] not in placed)
+    return ordered
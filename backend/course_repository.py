@@ -0,0 +1,532 @@
+"""
+Course repository abstraction.
+Gives the recommender and skill gap engines one interface over the course
+catalog, backed either by the JSON file held in memory or by SQLite.
+
+Import a JSON catalog into SQLite:
+    python backend/course_repository.py import data/courses.json data/courses.db
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections import Counter
+
+from catalog_compiler import compile_catalog
+from catalog_journal import CatalogJournal
+from records import CourseRecord, as_course_record, build_course_index, normalize_skill, skill_key
+from utils import load_courses
+
+
+class CourseRepository:
+    """Read/write interface shared by all course storage backends."""
+
+    # False for backends that read courses on demand instead of holding the
+    # whole catalog; warm-ups and caches covering every course skip them
+    in_memory = True
+
+    def get(self, course_id):
+        """Return the CourseRecord for course_id, or None."""
+        raise NotImplementedError
+
+    def all(self):
+        """Iterate over every course in catalog order."""
+        raise NotImplementedError
+
+    def count(self):
+        """Return the number of courses."""
+        raise NotImplementedError
+
+    def page(self, offset=0, limit=None):
+        """Return the courses at positions [offset, offset + limit) in catalog order."""
+        stop = None if limit is None else offset + limit
+        return list(itertools.islice(self.all(), offset, stop))
+
+    def by_skill(self, skill, limit=None):
+        """Return course records teaching skill (case-insensitive), in catalog order."""
+        raise NotImplementedError
+
+    def skills(self):
+        """Return the sorted list of unique skill names."""
+        raise NotImplementedError
+
+    def skill_counts(self):
+        """
+        Return {skill_lower: {'skill': display_name, 'count': n}} in order of
+        first appearance in the catalog. display_name is the spelling used at
+        that first appearance.
+        """
+        raise NotImplementedError
+
+    def dependents(self, course_id):
+        """Return IDs of courses that list course_id as a prerequisite."""
+        raise NotImplementedError
+
+    def refresh(self):
+        """Pick up changes made by other processes. Returns the number applied."""
+        return 0
+
+    def prefetch(self, course_ids):
+        """
+        Hint that course_ids and their transitive prerequisites are about
+        to be read. Remote backends load them in one round trip; in-memory
+        backends ignore it.
+        """
+        return None
+
+    def add_listener(self, callback):
+        """
+        Register callback(old, new) to run after a course changes.
+        old is None for inserts and new is None for deletes. Both are None
+        when the catalog changed in ways the repository cannot attribute to
+        single courses (e.g. writes by another process), so anything derived
+        from it must be dropped.
+        """
+        self.__dict__.setdefault('_listeners', []).append(callback)
+
+    def _notify(self, old, new):
+        self.__dict__.pop('_derived', None)
+        for callback in self.__dict__.get('_listeners', ()):
+            callback(old, new)
+
+    def derived(self, name, build):
+        """
+        Return a structure derived from the whole catalog, cached until the next change.
+
+        build() is called on first use after each change; name identifies the
+        structure among others cached on the same repository.
+        """
+        cache = self.__dict__.setdefault('_derived', {})
+        value = cache.get(name)
+        if value is None:
+            value = build()
+            cache[name] = value
+        return value
+
+    def topology(self):
+        """Compiled CatalogTopology of the catalog, cached until the next change."""
+        return self.derived('topology', lambda: compile_catalog(self.all()))
+
+    def upsert(self, course):
+        """Insert or replace a single course (dict or record). Returns True on success."""
+        raise NotImplementedError
+
+    def delete(self, course_id):
+        """Delete a single course. Returns True if it existed."""
+        raise NotImplementedError
+
+
+class JsonCourseRepository(CourseRepository):
+    """
+    Repository over the in-memory course list, persisted to a JSON file.
+
+    With a filepath, edits are appended to the catalog's change journal
+    and applied to the in-memory indexes as deltas. The journal is folded
+    back into the JSON file every compact_every entries, and refresh()
+    picks up entries written by other processes.
+    """
+
+    def __init__(self, courses, filepath=None, course_index=None, compact_every=1000):
+        self.filepath = filepath
+        self.courses = [as_course_record(c) for c in courses]
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._reindex(course_index)
+        self.journal = CatalogJournal(filepath) if filepath else None
+        self.refresh()
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Load a repository from a JSON course file and its journal."""
+        return cls(load_courses(filepath), filepath)
+
+    def _reindex(self, course_index=None):
+        index = course_index or build_course_index(self.courses)
+        self._by_id = index['by_id']
+        self._by_skill = index['by_skill']
+        self._positions = {c.id: i for i, c in enumerate(self.courses)}
+        self._skill_names = Counter(s for c in self.courses for s in c.skills)
+        self._skills = index['skills']
+        self._skill_counts = None
+
+    def _index_skill(self, skill, course_id):
+        ids = self._by_skill.setdefault(skill_key(skill), [])
+        position = self._positions[course_id]
+        # Keep each skill's course list in catalog order
+        i = len(ids)
+        while i > 0 and self._positions.get(ids[i - 1], -1) > position:
+            i -= 1
+        ids.insert(i, course_id)
+        self._skill_names[skill] += 1
+
+    def _unindex_skill(self, skill, course_id):
+        key = skill_key(skill)
+        ids = self._by_skill.get(key, [])
+        if course_id in ids:
+            ids.remove(course_id)
+            if not ids:
+                del self._by_skill[key]
+        self._skill_names[skill] -= 1
+        if self._skill_names[skill] <= 0:
+            del self._skill_names[skill]
+
+    def _apply_upsert(self, course):
+        course = as_course_record(course)
+        course_id = course.id
+        old = self._by_id.get(course_id)
+        old_skills = set(old.skills) if old else set()
+        new_skills = set(course.skills)
+
+        if old is not None:
+            self.courses[self._positions[course_id]] = course
+        else:
+            self._positions[course_id] = len(self.courses)
+            self.courses.append(course)
+        self._by_id[course_id] = course
+
+        for skill in old_skills - new_skills:
+            self._unindex_skill(skill, course_id)
+        for skill in new_skills - old_skills:
+            self._index_skill(skill, course_id)
+        self._skills = None
+        self._skill_counts = None
+        self._notify(old, course)
+
+    def _apply_delete(self, course_id):
+        old = self._by_id.pop(course_id, None)
+        if old is None:
+            return False
+        for skill in set(old.skills):
+            self._unindex_skill(skill, course_id)
+        position = self._positions.pop(course_id)
+        del self.courses[position]
+        for i in range(position, len(self.courses)):
+            self._positions[self.courses[i].id] = i
+        self._skills = None
+        self._skill_counts = None
+        self._notify(old, None)
+        return True
+
+    def apply(self, entry):
+        """Apply one journal entry to the in-memory course list and indexes."""
+        with self._lock:
+            if entry.get('op') == 'upsert':
+                self._apply_upsert(entry['course'])
+            elif entry.get('op') == 'delete':
+                self._apply_delete(entry['id'])
+
+    def refresh(self):
+        """
+        Apply journal entries written by other processes. If the journal was
+        compacted before they were read, the base file is reloaded instead
+        and every course counts as applied.
+        """
+        if self.journal is None:
+            return 0
+        with self._lock:
+            entries = self.journal.poll()
+            if self.journal.stale:
+                self._reload(self.journal.reload())
+                return len(self.courses)
+            for entry in entries:
+                self.apply(entry)
+        return len(entries)
+
+    def _reload(self, courses):
+        """Replace the whole catalog, e.g. after missing journal entries that were compacted away."""
+        self.courses = [as_course_record(c) for c in courses]
+        self._reindex()
+        self._notify(None, None)
+
+    def compact(self):
+        """Fold the journal into the JSON file. Returns True on success."""
+        if self.journal is None:
+            return False
+        # Rebuilt from the files, which also hold other writers' entries not read yet
+        return self.journal.compact()
+
+    def _maybe_compact(self):
+        # Reading our own entries back re-applies them idempotently and
+        # brings the journal's entry count up to date
+        self.refresh()
+        if self.journal.pending >= self.compact_every:
+            self.compact()
+
+    def get(self, course_id):
+        return self._by_id.get(course_id)
+
+    def all(self):
+        return iter(self.courses)
+
+    def count(self):
+        return len(self.courses)
+
+    def page(self, offset=0, limit=None):
+        return self.courses[offset:None if limit is None else offset + limit]
+
+    def by_skill(self, skill, limit=None):
+        ids = self._by_skill.get(normalize_skill(skill), [])
+        if limit is not None:
+            ids = ids[:limit]
+        return [self._by_id[cid] for cid in ids]
+
+    def skills(self):
+        if self._skills is None:
+            self._skills = sorted(self._skill_names)
+        return self._skills
+
+    def skill_counts(self):
+        if self._skill_counts is None:
+            counts = {}
+            for course in self.courses:
+                for skill, key in zip(course.skills, course.skill_keys):
+                    entry = counts.setdefault(key, {'skill': skill.strip(), 'count': 0})
+                    entry['count'] += 1
+            self._skill_counts = counts
+        return self._skill_counts
+
+    def dependents(self, course_id):
+        return [c.id for c in self.courses if course_id in c.prerequisites]
+
+    def upsert(self, course):
+        course = as_course_record(course)
+        with self._lock:
+            if self.journal is not None:
+                if not self.journal.upsert(course.to_dict()):
+                    return False
+                self._apply_upsert(course)
+                self._maybe_compact()
+            else:
+                self._apply_upsert(course)
+            return True
+
+    def delete(self, course_id):
+        with self._lock:
+            if course_id not in self._by_id:
+                return False
+            if self.journal is not None:
+                if not self.journal.delete(course_id):
+                    return False
+                self._apply_delete(course_id)
+                self._maybe_compact()
+            else:
+                self._apply_delete(course_id)
+            return True
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    difficulty TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_courses_difficulty ON courses(difficulty);
+CREATE INDEX IF NOT EXISTS idx_courses_position ON courses(position);
+
+CREATE TABLE IF NOT EXISTS course_skills (
+    course_id TEXT NOT NULL,
+    skill TEXT NOT NULL,
+    skill_lower TEXT NOT NULL,
+    sort_key INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_course_skills_skill ON course_skills(skill_lower, sort_key);
+CREATE INDEX IF NOT EXISTS idx_course_skills_course ON course_skills(course_id);
+
+CREATE TABLE IF NOT EXISTS prerequisites (
+    course_id TEXT NOT NULL,
+    prereq_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prerequisites_course ON prerequisites(course_id);
+CREATE INDEX IF NOT EXISTS idx_prerequisites_prereq ON prerequisites(prereq_id);
+"""
+
+# Skills within one course are ordered by position * SKILL_SLOTS + ordinal
+SKILL_SLOTS = 1 << 16
+
+
+class SqliteCourseRepository(CourseRepository):
+    """
+    Repository backed by a SQLite database.
+
+    Only the rows a query touches are loaded, so memory is bounded by the
+    working set rather than the catalog. Each thread gets its own
+    connection; writes run in a single transaction per course. Commits
+    made by other processes are detected by refresh through
+    PRAGMA data_version.
+    """
+
+    in_memory = False
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+        # Connection used only to watch data_version, which changes whenever
+        # another connection (another thread or process) commits
+        self._watch = sqlite3.connect(db_path, check_same_thread=False)
+        self._watch_lock = threading.Lock()
+        self._data_version = self._watch.execute('PRAGMA data_version').fetchone()[0]
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, course_id):
+        row = self._conn().execute('SELECT data FROM courses WHERE id = ?', (course_id,)).fetchone()
+        return CourseRecord.from_dict(json.loads(row[0])) if row else None
+
+    def all(self):
+        cursor = self._conn().execute('SELECT data FROM courses ORDER BY position')
+        for (data,) in cursor:
+            yield CourseRecord.from_dict(json.loads(data))
+
+    def count(self):
+        return self._conn().execute('SELECT COUNT(*) FROM courses').fetchone()[0]
+
+    def page(self, offset=0, limit=None):
+        rows = self._conn().execute('SELECT data FROM courses ORDER BY position LIMIT ? OFFSET ?',
+                                    (-1 if limit is None else limit, offset))
+        return [CourseRecord.from_dict(json.loads(data)) for (data,) in rows]
+
+    def refresh(self):
+        """
+        Drop derived structures if the database was committed to through
+        another connection since the last check. The changed courses are
+        unknown, so listeners are called with (None, None). Writes made by
+        this repository in other threads count too; they only cost a rebuild.
+        Returns 1 if a change was seen, else 0.
+        """
+        with self._watch_lock:
+            version = self._watch.execute('PRAGMA data_version').fetchone()[0]
+            if version == self._data_version:
+                return 0
+            self._data_version = version
+        self._notify(None, None)
+        return 1
+
+    def by_skill(self, skill, limit=None):
+        query = (
+            'SELECT c.data FROM course_skills s JOIN courses c ON c.id = s.course_id '
+            'WHERE s.skill_lower = ? ORDER BY s.sort_key'
+        )
+        params = [normalize_skill(skill)]
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [CourseRecord.from_dict(json.loads(data)) for (data,) in self._conn().execute(query, params)]
+
+    def skills(self):
+        rows = self._conn().execute('SELECT DISTINCT skill FROM course_skills ORDER BY skill')
+        return [skill for (skill,) in rows]
+
+    def skill_counts(self):
+        # SQLite returns the bare `skill` column from the row holding MIN(sort_key)
+        rows = self._conn().execute(
+            'SELECT skill_lower, skill, COUNT(*), MIN(sort_key) AS first '
+            'FROM course_skills GROUP BY skill_lower ORDER BY first'
+        )
+        return {lower: {'skill': skill, 'count': count} for lower, skill, count, _ in rows}
+
+    def dependents(self, course_id):
+        rows = self._conn().execute('SELECT course_id FROM prerequisites WHERE prereq_id = ?', (course_id,))
+        return [cid for (cid,) in rows]
+
+    def _write(self, conn, course, position):
+        if isinstance(course, CourseRecord):
+            course = course.to_dict()
+        course_id = course['id']
+        conn.execute(
+            'INSERT OR REPLACE INTO courses (id, position, difficulty, data) VALUES (?, ?, ?, ?)',
+            (course_id, position, course.get('difficulty'), json.dumps(course))
+        )
+        conn.execute('DELETE FROM course_skills WHERE course_id = ?', (course_id,))
+        conn.execute('DELETE FROM prerequisites WHERE course_id = ?', (course_id,))
+        conn.executemany(
+            'INSERT INTO course_skills (course_id, skill, skill_lower, sort_key) VALUES (?, ?, ?, ?)',
+            [(course_id, s.strip(), s.strip().lower(), position * SKILL_SLOTS + i)
+             for i, s in enumerate(course.get('skills', []))]
+        )
+        conn.executemany(
+            'INSERT INTO prerequisites (course_id, prereq_id) VALUES (?, ?)',
+            [(course_id, p) for p in course.get('prerequisites', [])]
+        )
+
+    def upsert(self, course):
+        if isinstance(course, CourseRecord):
+            course = course.to_dict()
+        conn = self._conn()
+        old = self.get(course['id'])
+        try:
+            with conn:
+                row = conn.execute('SELECT position FROM courses WHERE id = ?', (course['id'],)).fetchone()
+                if row:
+                    position = row[0]
+                else:
+                    position = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM courses').fetchone()[0]
+                self._write(conn, course, position)
+        except sqlite3.Error as e:
+            print(f"Error saving course {course.get('id')}: {e}")
+            return False
+        self._notify(old, CourseRecord.from_dict(course))
+        return True
+
+    def delete(self, course_id):
+        conn = self._conn()
+        old = self.get(course_id)
+        with conn:
+            deleted = conn.execute('DELETE FROM courses WHERE id = ?', (course_id,)).rowcount
+            conn.execute('DELETE FROM course_skills WHERE course_id = ?', (course_id,))
+            conn.execute('DELETE FROM prerequisites WHERE course_id = ?', (course_id,))
+        if deleted:
+            self._notify(old, None)
+        return deleted > 0
+
+    def import_courses(self, courses):
+        """Replace the database contents with courses in one transaction."""
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM courses')
+            conn.execute('DELETE FROM course_skills')
+            conn.execute('DELETE FROM prerequisites')
+            for position, course in enumerate(courses):
+                self._write(conn, course, position)
+
+
+def as_repository(courses):
+    """Wrap a plain course list in a JsonCourseRepository; pass repositories through."""
+    if isinstance(courses, CourseRepository):
+        return courses
+    return JsonCourseRepository(courses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Course repository tools.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='Import a JSON course file into a SQLite database')
+    imp.add_argument('json_file')
+    imp.add_argument('db_file')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        courses = load_courses(args.json_file)
+        if os.path.dirname(args.db_file):
+            os.makedirs(os.path.dirname(args.db_file), exist_ok=True)
+        repo = SqliteCourseRepository(args.db_file)
+        repo.import_courses(courses)
+        print(f"Imported {repo.count()} courses into {args.db_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
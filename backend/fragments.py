@@ -0,0 +1,127 @@
+"""
+Pre-encoded JSON fragments for course responses.
+Each course is encoded once per catalog version, both as its full course
+dict and as a learning path item, and responses are assembled by splicing
+the cached bytes into the surrounding JSON instead of re-encoding the same
+fields on every request. orjson is used for encoding when installed.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response
+
+from recommender import format_path_course
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(value):
+    """Encode value as compact JSON bytes with sorted keys, like Flask's jsonify."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+class Fragment(bytes):
+    """A pre-encoded JSON value, spliced into responses unchanged."""
+
+
+def encode(value):
+    """
+    Encode value to JSON bytes, copying Fragments in verbatim.
+
+    Dicts and lists are walked so fragments nested inside them are found;
+    everything else is handed to dumps().
+    """
+    if isinstance(value, Fragment):
+        return value
+    if isinstance(value, dict):
+        items = sorted((str(k), v) for k, v in value.items())
+        return b'{' + b','.join(dumps(k) + b':' + encode(v) for k, v in items) + b'}'
+    if isinstance(value, (list, tuple)):
+        return b'[' + b','.join(encode(v) for v in value) + b']'
+    return dumps(value)
+
+
+def json_response(body, status=200):
+    """Flask response for a body that may contain Fragments."""
+    return Response(encode(body) + b'\n', status=status, mimetype='application/json')
+
+
+# Fragments kept per kind for repositories that do not hold the whole catalog
+BOUNDED_CACHE_SIZE = 10000
+
+
+class CourseFragments:
+    """
+    Per-course fragments for one catalog version, encoded on first use.
+
+    For repositories that are not held in memory the fragments are kept in
+    LRU order and capped at max_entries, so serving the whole catalog over
+    time does not pull it into this process.
+    """
+
+    def __init__(self, repo, max_entries=None):
+        self.repo = repo
+        self.max_entries = max_entries
+        self._courses = OrderedDict()
+        self._path_items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, cache, key):
+        if self.max_entries is None:
+            return cache.get(key)
+        with self._lock:
+            fragment = cache.get(key)
+            if fragment is not None:
+                cache.move_to_end(key)
+            return fragment
+
+    def _remember(self, cache, key, fragment):
+        if self.max_entries is None:
+            cache[key] = fragment
+            return
+        with self._lock:
+            cache[key] = fragment
+            if len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def course(self, record):
+        """Fragment for record.to_dict()."""
+        fragment = self._lookup(self._courses, record.id)
+        if fragment is None:
+            fragment = Fragment(dumps(record.to_dict()))
+            self._remember(self._courses, record.id, fragment)
+        return fragment
+
+    def courses(self, records):
+        return [self.course(record) for record in records]
+
+    def path_item(self, item):
+        """
+        Fragment for a path item dict built by format_path_course.
+
+        Items for courses no longer in the catalog are encoded directly.
+        """
+        fragment = self._lookup(self._path_items, item['id'])
+        if fragment is None:
+            record = self.repo.get(item['id'])
+            if record is None:
+                return Fragment(dumps(item))
+            fragment = Fragment(dumps(format_path_course(record)))
+            self._remember(self._path_items, item['id'], fragment)
+        return fragment
+
+    def path(self, items):
+        return [self.path_item(item) for item in items]
+
+
+def get_fragments(repo):
+    """CourseFragments for a repository, discarded after catalog changes."""
+    max_entries = None if repo.in_memory else BOUNDED_CACHE_SIZE
+    return repo.derived('fragments', lambda: CourseFragments(repo, max_entries))
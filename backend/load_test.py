@@ -0,0 +1,450 @@
+"""
+Load-test harness for the API.
+Drives a mix of recommend, skill-gap, quiz and progress calls (generated
+from the data files, or replayed from a JSONL file) at a target rate
+against a running server, or against one it starts locally. It reports
+throughput, per-route latency percentiles, error rates and server CPU/RSS,
+and compares two saved runs to flag regressions.
+
+Run against a locally started server and save the results:
+    python backend/load_test.py run --qps 50 --duration 30 --out before.json
+Compare two runs (exit status 1 when a regression is found):
+    python backend/load_test.py compare before.json after.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import load_courses
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BACKEND_DIR, '..', 'data')
+
+# Relative weights of each generated route
+DEFAULT_MIX = {
+    'recommend': 40,
+    'skill_gap': 15,
+    'quiz_generate': 15,
+    'quiz_evaluate': 10,
+    'progress_events': 10,
+    'progress_level': 10
+}
+
+PROFILE_TEMPLATES = [
+    "I know {0} and {1}. I want to become a data analyst",
+    "Web developer with {0} experience, learning {1}",
+    "Student familiar with {0}, {1} and a bit of {2}",
+    "Backend engineer using {0} daily. Interested in {1}"
+]
+
+# Statuses the server uses to shed load (rate limit, admission control)
+REJECTED_STATUSES = (429, 503)
+
+ACTIONS = ['course_complete', 'quiz_pass', 'quiz_perfect', 'daily_login', 'path_generate']
+
+
+class TrafficGenerator:
+    """Builds randomized requests for each route from the catalog and question bank."""
+
+    def __init__(self, mix=None, seed=0):
+        self.mix = mix or DEFAULT_MIX
+        self.random = random.Random(seed)
+        courses = load_courses(os.path.join(DATA_DIR, 'courses.json'))
+        with open(os.path.join(DATA_DIR, 'questions.json'), 'r', encoding='utf-8') as f:
+            self.questions = json.load(f)
+        self.course_ids = [c['id'] for c in courses]
+        self.skills = sorted({s for c in courses for s in c.get('skills', [])})
+        self.quiz_skills = sorted({q['skill'] for q in self.questions})
+        self._routes = list(self.mix)
+        self._weights = [self.mix[r] for r in self._routes]
+
+    def next(self):
+        """Return (route name, method, path, body) for the next request."""
+        route = self.random.choices(self._routes, self._weights)[0]
+        method, path, body = getattr(self, '_' + route)()
+        return route, method, path, body
+
+    def _completed(self, most=5):
+        return self.random.sample(self.course_ids, self.random.randint(0, min(most, len(self.course_ids))))
+
+    def _recommend(self):
+        return 'POST', '/api/recommend', {
+            'skill': self.random.choice(self.skills),
+            'level': self.random.choice(['Beginner', 'Intermediate', 'Advanced']),
+            'completed_courses': self._completed()
+        }
+
+    def _skill_gap(self):
+        template = self.random.choice(PROFILE_TEMPLATES)
+        return 'POST', '/api/skill-gap', {
+            'profile': template.format(*self.random.sample(self.skills, 3)),
+            'limit': self.random.choice([None, 5, 10])
+        }
+
+    def _quiz_generate(self):
+        return 'POST', '/api/quiz/generate', {
+            'skill': self.random.choice(self.quiz_skills),
+            'difficulty': self.random.choice(['Beginner', 'Intermediate', 'Advanced']),
+            'num_questions': 5
+        }
+
+    def _quiz_evaluate(self):
+        sample = self.random.sample(self.questions, min(5, len(self.questions)))
+        return 'POST', '/api/quiz/evaluate', {
+            'quiz_id': f"quiz_load_{self.random.randint(1000, 9999)}",
+            'answers': {q['id']: self.random.randint(0, len(q['options']) - 1) for q in sample}
+        }
+
+    def _progress_events(self):
+        events = [{'action_type': self.random.choice(ACTIONS)} for _ in range(self.random.randint(1, 20))]
+        return 'POST', '/api/progress/events', {
+            'total_xp': self.random.randint(0, 2000),
+            'user_stats': {'courses_completed': self.random.randint(0, 20)},
+            'events': events
+        }
+
+    def _progress_level(self):
+        return 'POST', '/api/progress/level', {'xp': self.random.randint(0, 5000)}
+
+
+class ReplayTraffic:
+    """Cycles through recorded requests: one JSON object per line with method, path and body."""
+
+    def __init__(self, path):
+        self.requests = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.requests.append((
+                        entry.get('route') or entry['path'],
+                        entry.get('method', 'POST' if entry.get('body') is not None else 'GET'),
+                        entry['path'],
+                        entry.get('body')
+                    ))
+        if not self.requests:
+            raise ValueError(f"No requests in {path}")
+        self._next = 0
+
+    def next(self):
+        request = self.requests[self._next % len(self.requests)]
+        self._next += 1
+        return request
+
+
+def send(base_url, method, path, body, timeout):
+    """Send one request. Returns (status, seconds); status 0 means a connection error."""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+class ProcessSampler:
+    """Samples a process's CPU time and RSS from /proc (Linux) while a run is in progress."""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    def _read(self):
+        with open(f'/proc/{self.pid}/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+        rss = 0
+        with open(f'/proc/{self.pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) * 1024
+        return time.monotonic(), cpu, rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.samples.append(self._read())
+            except (OSError, ValueError, IndexError):
+                return
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        if len(self.samples) < 2:
+            return None
+        (t0, cpu0, _), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        return {
+            'cpu_percent': round(100 * (cpu1 - cpu0) / (t1 - t0), 1) if t1 > t0 else 0.0,
+            'rss_mb_start': round(self.samples[0][2] / 2 ** 20, 1),
+            'rss_mb_max': round(max(s[2] for s in self.samples) / 2 ** 20, 1)
+        }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env=None):
+    """
+    Start the API in a subprocess (threaded, no reloader) and wait until it reports ready.
+
+    The co-completion counts and question statistics of the test server go
+    to temporary files so synthetic traffic does not end up in the real data.
+    """
+    scratch = tempfile.mkdtemp()
+    env = {'CO_COMPLETION_FILE': os.path.join(scratch, 'co_completion.json'),
+           'QUESTION_STATS_FILE': os.path.join(scratch, 'question_stats.json'), **(env or {})}
+    code = ('import app; '
+            f"app.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False, use_reloader=False)")
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                               env={**os.environ, **env},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        status, _ = send(base_url, 'GET', '/api/ready', None, 1)
+        if status == 200:
+            return process, base_url
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Server did not become ready within 60s')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    """
+    Aggregate (route, status, seconds, lag) tuples into per-route statistics.
+
+    Shed requests (429, 503) count as rejected, not as errors.
+    """
+    by_route = {}
+    for route, status, seconds, _ in results:
+        by_route.setdefault(route, []).append((status, seconds))
+
+    def describe(rows):
+        latencies = sorted(seconds * 1000 for _, seconds in rows)
+        rejected = sum(1 for status, _ in rows if status in REJECTED_STATUSES)
+        errors = sum(1 for status, _ in rows
+                     if (status == 0 or status >= 500) and status not in REJECTED_STATUSES)
+        return {
+            'requests': len(rows),
+            'throughput': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'rejected': rejected,
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'max_ms': round(latencies[-1], 2)
+        }
+
+    lags = sorted(lag * 1000 for *_, lag in results)
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'overall': describe([(status, seconds) for _, status, seconds, _ in results]) if results else None,
+        'routes': {route: describe(rows) for route, rows in sorted(by_route.items())},
+        'dispatch_lag_p99_ms': round(percentile(lags, 0.99), 2) if lags else None
+    }
+
+
+def run_load(base_url, traffic, qps, duration, concurrency=32, timeout=30.0, server_pid=None):
+    """
+    Send requests at a fixed rate (open loop) for duration seconds.
+
+    Requests are dispatched on schedule whether or not earlier ones have
+    finished, so a slow server shows up as latency rather than a lower send
+    rate. Latency is measured from the time a request was due, not from
+    when it was sent, so time spent waiting for a free worker counts too
+    (no coordinated omission). dispatch_lag reports how far the client
+    itself fell behind.
+    """
+    results = []
+    lock = threading.Lock()
+    sampler = ProcessSampler(server_pid) if server_pid and os.path.exists(f'/proc/{server_pid}') else None
+
+    def task(route, method, path, body, due, lag):
+        status, _ = send(base_url, method, path, body, timeout)
+        seconds = time.perf_counter() - due
+        with lock:
+            results.append((route, status, seconds, lag))
+
+    total = int(qps * duration)
+    interval = 1.0 / qps
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            due = start + i * interval
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+            route, method, path, body = traffic.next()
+            pool.submit(task, route, method, path, body, due, max(0.0, time.perf_counter() - due))
+    elapsed = time.perf_counter() - start
+
+    report = summarize(results, elapsed)
+    report['target_qps'] = qps
+    report['server'] = sampler.stop() if sampler else None
+    return report
+
+
+def compare(before, after, threshold=0.10, error_threshold=0.01, min_delta_ms=1.0):
+    """
+    Compare two reports. A route regresses when its p95 or p99 grows by more
+    than threshold (relative) and min_delta_ms (absolute, to ignore jitter on
+    fast routes), its error rate grows by more than error_threshold
+    (absolute), or its throughput drops by more than threshold.
+
+    Returns:
+        List of (route, metric, before, after, regressed) rows
+    """
+    rows = []
+    for route in sorted(set(before['routes']) | set(after['routes'])):
+        old = before['routes'].get(route)
+        new = after['routes'].get(route)
+        if old is None or new is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            regressed = (metric != 'p50_ms' and new[metric] > old[metric] * (1 + threshold)
+                         and new[metric] - old[metric] > min_delta_ms)
+            rows.append((route, metric, old[metric], new[metric], regressed))
+        rows.append((route, 'error_rate', old['error_rate'], new['error_rate'],
+                     new['error_rate'] - old['error_rate'] > error_threshold))
+        rows.append((route, 'throughput', old['throughput'], new['throughput'],
+                     new['throughput'] < old['throughput'] * (1 - threshold)))
+    for metric in ('cpu_percent', 'rss_mb_max'):
+        if before.get('server') and after.get('server'):
+            rows.append(('server', metric, before['server'][metric], after['server'][metric], False))
+    return rows
+
+
+def print_report(report):
+    print(f"Elapsed {report['elapsed_s']}s at target {report['target_qps']} qps, "
+          f"dispatch lag p99 {report['dispatch_lag_p99_ms']} ms")
+    header = f"{'route':<18}{'reqs':>7}{'rps':>8}{'err%':>7}{'rej':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    rows = list(report['routes'].items())
+    if report['overall']:
+        rows.append(('ALL', report['overall']))
+    for route, r in rows:
+        print(f"{route:<18}{r['requests']:>7}{r['throughput']:>8}{r['error_rate'] * 100:>7.2f}{r['rejected']:>6}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+    if report.get('server'):
+        s = report['server']
+        print(f"Server CPU {s['cpu_percent']}%, RSS {s['rss_mb_start']} -> max {s['rss_mb_max']} MB")
+
+
+def parse_mix(text):
+    """Parse 'recommend=40,skill_gap=20' into a weight dict."""
+    mix = {}
+    for part in text.split(','):
+        route, _, weight = part.partition('=')
+        if route.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown route in mix: {route}")
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the Learning Path Recommender API.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Run a load test')
+    run.add_argument('--url', help='Base URL of a running server (default: start one locally)')
+    run.add_argument('--qps', type=float, default=20, help='Target requests per second')
+    run.add_argument('--duration', type=float, default=20, help='Seconds to send requests for')
+    run.add_argument('--concurrency', type=int, default=32, help='Maximum requests in flight')
+    run.add_argument('--mix', type=parse_mix, help='Route weights, e.g. recommend=40,skill_gap=20')
+    run.add_argument('--replay', help='JSONL file of {"method", "path", "body"} requests to replay')
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--server-pid', type=int, help='PID of the --url server, for CPU/RSS sampling')
+    run.add_argument('--no-admission', action='store_true',
+                     help='Start the local server with ADMISSION_CONTROL=0')
+    run.add_argument('--out', help='Write the report as JSON to this file')
+
+    cmp = sub.add_parser('compare', help='Compare two saved reports')
+    cmp.add_argument('before')
+    cmp.add_argument('after')
+    cmp.add_argument('--threshold', type=float, default=0.10, help='Allowed relative latency/throughput change')
+    cmp.add_argument('--min-delta-ms', type=float, default=1.0, help='Latency increases below this are ignored')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.before, 'r', encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, 'r', encoding='utf-8') as f:
+            after = json.load(f)
+        rows = compare(before, after, args.threshold, min_delta_ms=args.min_delta_ms)
+        regressions = 0
+        for route, metric, old, new, regressed in rows:
+            regressions += regressed
+            flag = 'REGRESSION' if regressed else ''
+            print(f"{route:<18}{metric:<12}{old:>10}{new:>10}  {flag}")
+        print(f"{regressions} regression(s)")
+        return 1 if regressions else 0
+
+    traffic = ReplayTraffic(args.replay) if args.replay else TrafficGenerator(args.mix, args.seed)
+    process = None
+    base_url = args.url
+    server_pid = args.server_pid
+    try:
+        if not base_url:
+            env = {'ADMISSION_CONTROL': '0'} if args.no_admission else None
+            process, base_url = start_server(free_port(), env)
+            server_pid = process.pid
+        report = run_load(base_url, traffic, args.qps, args.duration, args.concurrency, server_pid=server_pid)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print_report(report)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
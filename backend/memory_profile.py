@@ -0,0 +1,347 @@
+"""
+Memory accounting for the API process.
+Reports the deep size of each loaded dataset and derived index, and diffs
+tracemalloc snapshots taken before and after a window of requests to find
+allocation hot spots and memory retained by the engines.
+
+Nothing here runs unless MEMORY_PROFILING=1 is set for the server, and
+tracemalloc only traces while a window is open.
+
+    python backend/memory_profile.py sizes
+    python backend/memory_profile.py trace --requests 500 --mix skill_gap=1,quiz_evaluate=1
+    python backend/memory_profile.py trace --url http://localhost:5000 --requests 500
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import urllib.request
+
+# Objects that are shared program state rather than data owned by a structure
+_SKIPPED_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType, types.FrameType
+)
+
+# Allocations made by the import system and the profiler itself are noise
+_NOISE_FILTERS = (
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__)
+)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _slot_names(cls):
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in ('__dict__', '__weakref__'):
+                yield name
+
+
+def deep_size(obj, seen=None):
+    """
+    Bytes used by obj and everything reachable from it through containers,
+    instance dicts and slots.
+
+    Objects whose id is already in seen are not counted again, and seen is
+    updated in place, so passing one set across calls attributes shared
+    objects to the first structure measured. Classes, modules and functions
+    are never counted.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIPPED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif isinstance(current, (str, bytes, int, float, bool)) or current is None:
+            continue
+        else:
+            attributes = getattr(current, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            for name in _slot_names(type(current)):
+                value = getattr(current, name, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+def structure_sizes(structures):
+    """
+    Deep sizes of named structures, each counted without the others.
+
+    Args:
+        structures: (name, object) pairs. References from one structure to
+            another (e.g. an index holding its repository) are not followed,
+            and objects shared by several structures count toward the first.
+
+    Returns:
+        Dict with per-structure 'structures' (name -> bytes) and 'total_bytes'
+    """
+    roots = {id(obj) for _, obj in structures}
+    seen = set(roots)
+    sizes = {}
+    for name, obj in structures:
+        seen.discard(id(obj))
+        sizes[name] = deep_size(obj, seen)
+    return {'structures': sizes, 'total_bytes': sum(sizes.values())}
+
+
+def _location(frame):
+    filename = frame.filename
+    if filename.startswith(REPO_ROOT):
+        filename = os.path.relpath(filename, REPO_ROOT)
+    return f"{filename}:{frame.lineno}"
+
+
+def diff_snapshots(before, after, requests, limit=20, group_by='lineno'):
+    """
+    Summarize what grew between two snapshots.
+
+    Positive entries that remain after a window are memory the window's
+    requests retained: caches filling up, or leaks when they keep growing
+    across windows.
+    """
+    stats = after.compare_to(before, group_by)
+    grown = [s for s in stats if s.size_diff > 0]
+    per_request = max(requests, 1)
+    return {
+        'requests': requests,
+        'size_diff_bytes': sum(s.size_diff for s in stats),
+        'count_diff': sum(s.count_diff for s in stats),
+        'bytes_per_request': round(sum(s.size_diff for s in stats) / per_request, 1),
+        'top': [
+            {
+                'location': _location(s.traceback[0]),
+                'traceback': [_location(f) for f in s.traceback] if group_by == 'traceback' else None,
+                'size_diff_bytes': s.size_diff,
+                'count_diff': s.count_diff,
+                'size_bytes': s.size,
+                'count': s.count
+            }
+            for s in grown[:limit]
+        ]
+    }
+
+
+class MemoryProfiler:
+    """
+    Opens a tracemalloc window over the next N requests and keeps the diff
+    of the snapshots taken at its start and end.
+    """
+
+    def __init__(self):
+        self.active = False
+        self._lock = threading.Lock()
+        self._baseline = None
+        self._started_tracing = False
+        self._options = None
+        self.requests = 0
+        self.window = 0
+        self.report = None
+
+    def start(self, requests=100, frames=1, limit=20, group_by='lineno', include=None):
+        """
+        Begin a window covering the next `requests` requests.
+
+        Args:
+            frames: Stack frames recorded per allocation (more is slower)
+            limit: Entries kept in the report
+            group_by: 'lineno', 'filename' or 'traceback'
+            include: Filename patterns to restrict the report to, e.g. ['*skill_gap.py']
+
+        Returns:
+            False if a window is already open
+        """
+        with self._lock:
+            if self.active:
+                return False
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._started_tracing = True
+            self._options = {'limit': limit, 'group_by': group_by, 'include': include or []}
+            self._baseline = self._snapshot()
+            self.requests = 0
+            self.window = requests
+            self.report = None
+            self.active = True
+            return True
+
+    def _snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+        include = self._options['include']
+        if include:
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(True, p, all_frames=True) for p in include])
+        return snapshot
+
+    def on_request(self):
+        """Count a finished request; closes the window when it is full."""
+        if not self.active:
+            return
+        with self._lock:
+            if not self.active:
+                return
+            self.requests += 1
+            if self.requests >= self.window:
+                self._finish()
+
+    def stop(self):
+        """Close the open window early. Returns the report, or None if no window was open."""
+        with self._lock:
+            if not self.active:
+                return None
+            return self._finish()
+
+    def _finish(self):
+        after = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        report = diff_snapshots(self._baseline, after, self.requests,
+                                self._options['limit'], self._options['group_by'])
+        report['traced_bytes'] = current
+        report['traced_peak_bytes'] = peak
+        report['finished_at'] = time.time()
+        self._baseline = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.active = False
+        self.report = report
+        return report
+
+    def status(self):
+        return {
+            'active': self.active,
+            'requests': self.requests,
+            'window': self.window,
+            'report': self.report
+        }
+
+
+def print_sizes(sizes):
+    for name, size in sorted(sizes['structures'].items(), key=lambda item: -item[1]):
+        print(f"{name:<28}{size / 1024:>12.1f} KB")
+    print(f"{'total':<28}{sizes['total_bytes'] / 1024:>12.1f} KB")
+
+
+def print_report(report):
+    print(f"{report['requests']} requests, {report['size_diff_bytes'] / 1024:+.1f} KB retained "
+          f"({report['bytes_per_request']:+.1f} B/request), {report['count_diff']:+d} blocks; "
+          f"traced peak {report['traced_peak_bytes'] / 1024:.1f} KB")
+    for entry in report['top']:
+        print(f"{entry['size_diff_bytes'] / 1024:>+10.1f} KB {entry['count_diff']:>+8d}  {entry['location']}")
+        for frame in (entry['traceback'] or [])[1:]:
+            print(f"{'':>22}{frame}")
+
+
+def _request_json(url, method='GET', body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read())
+
+
+def _load_app():
+    """Import the API in this process with side effects kept out of the data directory."""
+    os.environ.setdefault('MEMORY_PROFILING', '1')
+    os.environ.setdefault('ADMISSION_CONTROL', '0')
+    os.environ.setdefault('STARTUP_MODE', 'eager')
+    scratch = tempfile.mkdtemp()
+    os.environ.setdefault('CO_COMPLETION_FILE', os.path.join(scratch, 'co_completion.json'))
+    os.environ.setdefault('QUESTION_STATS_FILE', os.path.join(scratch, 'question_stats.json'))
+    import app
+    # Load the datasets the server reads lazily so their sizes show up
+    app.quiz_generator.get_question_records()
+    app.progress_manager.load_achievements()
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report memory use of the Learning Path Recommender API.')
+    parser.add_argument('--url', help='Base URL of a server started with MEMORY_PROFILING=1 '
+                                      '(default: load the API in this process)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('sizes', help='Deep size of each dataset and index')
+
+    trace = sub.add_parser('trace', help='Diff tracemalloc snapshots across a window of requests')
+    trace.add_argument('--requests', type=int, default=200, help='Requests in the window')
+    trace.add_argument('--frames', type=int, default=1, help='Stack frames recorded per allocation')
+    trace.add_argument('--limit', type=int, default=20, help='Allocation sites to report')
+    trace.add_argument('--group-by', choices=['lineno', 'filename', 'traceback'], default='lineno')
+    trace.add_argument('--include', action='append', help='Only report allocations from matching files, '
+                                                          'e.g. "*skill_gap.py" (repeatable)')
+    trace.add_argument('--mix', help='Route weights for generated traffic, e.g. skill_gap=1,quiz_evaluate=1')
+    trace.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'sizes':
+        if args.url:
+            sizes = _request_json(args.url.rstrip('/') + '/api/admin/memory')['sizes']
+        else:
+            sizes = structure_sizes(_load_app().memory_structures())
+        print_sizes(sizes)
+        return 0
+
+    options = {'requests': args.requests, 'frames': args.frames, 'limit': args.limit,
+               'group_by': args.group_by, 'include': args.include}
+    if args.url:
+        # The server counts whatever traffic it receives; drive it with load_test.py or real clients
+        url = args.url.rstrip('/') + '/api/admin/memory/trace'
+        result = _request_json(url, 'POST', options)
+        if not result['success']:
+            print(result['error'])
+            return 1
+        print(f"Window open for {args.requests} requests; waiting...")
+        while True:
+            time.sleep(1)
+            status = _request_json(url)['trace']
+            if not status['active']:
+                break
+        print_report(status['report'])
+        return 0
+
+    from load_test import TrafficGenerator, parse_mix
+
+    api = _load_app()
+    traffic = TrafficGenerator(parse_mix(args.mix) if args.mix else None, args.seed)
+    warmup = [traffic.next() for _ in range(min(args.requests, 50))]
+    window = [traffic.next() for _ in range(args.requests)]
+    client = api.app.test_client()
+    # Warm the lazily built caches first so the window shows steady-state allocations
+    for _, method, path, body in warmup:
+        client.open(path, method=method, json=body)
+    profiler = api.MEMORY_PROFILER
+    profiler.start(args.requests, args.frames, args.limit, args.group_by, args.include)
+    for _, method, path, body in window:
+        client.open(path, method=method, json=body)
+    report = profiler.stop() or profiler.report
+    print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Server-side layout of learning path graphs.
+Turns a path (or a course's dependency closure) into vis.js-ready nodes and
+edges with fixed layered-DAG coordinates, so the browser draws the graph
+without running its own layout. Layouts are cached by path signature.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from fragments import Fragment, dumps
+
+# Pixels between layers (left to right) and between nodes in a layer,
+# matching the spacing the frontend used for its hierarchical layout
+LEVEL_SEPARATION = 250
+NODE_SPACING = 150
+
+# Barycenter passes used to reduce edge crossings within layers
+ORDERING_PASSES = 4
+
+DIFFICULTY_COLORS = {
+    'Beginner': '#10b981',
+    'Intermediate': '#38bdf8',
+    'Advanced': '#ef4444'
+}
+
+
+def path_signature(course_ids):
+    """Stable signature of an ordered list of course IDs."""
+    return hashlib.sha1('\x1f'.join(course_ids).encode('utf-8')).hexdigest()
+
+
+def assign_layers(course_ids, prerequisites):
+    """
+    Assign each course the length of its longest prerequisite chain within
+    the graph. Courses on a cycle go one layer past the deepest course.
+    """
+    members = set(course_ids)
+    indegree = {cid: 0 for cid in course_ids}
+    dependents = {cid: [] for cid in course_ids}
+    for cid in course_ids:
+        for prereq in prerequisites[cid]:
+            indegree[cid] += 1
+            dependents[prereq].append(cid)
+
+    layer = dict.fromkeys(course_ids, 0)
+    ready = [cid for cid in course_ids if indegree[cid] == 0]
+    placed = set()
+    while ready:
+        cid = ready.pop()
+        placed.add(cid)
+        for dependent in dependents[cid]:
+            layer[dependent] = max(layer[dependent], layer[cid] + 1)
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+
+    unplaced = members - placed
+    if unplaced:
+        last = max((layer[cid] for cid in placed), default=-1) + 1
+        for cid in unplaced:
+            layer[cid] = last
+    return layer
+
+
+def order_layers(course_ids, prerequisites, layer):
+    """
+    Order the courses within each layer by the barycenter heuristic,
+    alternating sweeps over predecessors and successors. Ties keep path order.
+    """
+    layers = {}
+    for cid in course_ids:
+        layers.setdefault(layer[cid], []).append(cid)
+    successors = {cid: [] for cid in course_ids}
+    for cid in course_ids:
+        for prereq in prerequisites[cid]:
+            successors[prereq].append(cid)
+
+    position = {}
+    for members in layers.values():
+        for i, cid in enumerate(members):
+            position[cid] = i
+
+    depths = sorted(layers)
+    for sweep in range(ORDERING_PASSES):
+        forward = sweep % 2 == 0
+        neighbours = prerequisites if forward else successors
+        for depth in (depths if forward else reversed(depths)):
+            members = layers[depth]
+
+            def barycenter(cid):
+                linked = [position[n] for n in neighbours[cid]]
+                return sum(linked) / len(linked) if linked else position[cid]
+
+            members.sort(key=lambda cid: (barycenter(cid), position[cid]))
+            for i, cid in enumerate(members):
+                position[cid] = i
+    return layers
+
+
+def build_graph(courses):
+    """
+    Build nodes, edges and coordinates for a list of course records.
+
+    Only prerequisites inside the list become edges.
+    """
+    course_ids = [c.id for c in courses]
+    by_id = {c.id: c for c in courses}
+    prerequisites = {
+        c.id: [p for p in dict.fromkeys(c.prerequisites) if p in by_id and p != c.id]
+        for c in courses
+    }
+    layer = assign_layers(course_ids, prerequisites)
+    layers = order_layers(course_ids, prerequisites, layer)
+
+    nodes = []
+    for depth in sorted(layers):
+        members = layers[depth]
+        offset = (len(members) - 1) * NODE_SPACING / 2
+        for i, cid in enumerate(members):
+            course = by_id[cid]
+            difficulty = course.difficulty_name
+            nodes.append({
+                'id': cid,
+                'label': course.title,
+                'title': f"Difficulty: {difficulty}\nTime: {course.time}",
+                'difficulty': difficulty,
+                'color': DIFFICULTY_COLORS.get(difficulty, DIFFICULTY_COLORS['Intermediate']),
+                'url': course.url if course.url is not None else '#',
+                'layer': depth,
+                'x': depth * LEVEL_SEPARATION,
+                'y': i * NODE_SPACING - offset
+            })
+    edges = [
+        {'from': prereq, 'to': cid}
+        for cid in course_ids for prereq in prerequisites[cid]
+    ]
+    return {
+        'nodes': nodes,
+        'edges': edges,
+        'layers': len(layers),
+        'width': max(len(m) for m in layers.values()) if layers else 0
+    }
+
+
+class GraphLayouts:
+    """LRU cache of encoded graph layouts for one catalog version."""
+
+    def __init__(self, repo, max_entries=1024):
+        self.repo = repo
+        self.max_entries = max_entries
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, course_ids):
+        """
+        Return (signature, layout Fragment) for an ordered list of course IDs.
+        IDs missing from the catalog are skipped.
+        """
+        signature = path_signature(course_ids)
+        with self._lock:
+            layout = self._layouts.get(signature)
+            if layout is not None:
+                self._layouts.move_to_end(signature)
+                self.hits += 1
+                return signature, layout
+        courses = [c for c in map(self.repo.get, dict.fromkeys(course_ids)) if c]
+        layout = Fragment(dumps(build_graph(courses)))
+        with self._lock:
+            self.misses += 1
+            self._layouts[signature] = layout
+            while len(self._layouts) > self.max_entries:
+                self._layouts.popitem(last=False)
+        return signature, layout
+
+    def stats(self):
+        return {
+            'entries': len(self._layouts),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+def get_graph_layouts(repo):
+    """GraphLayouts for a repository, discarded after catalog changes."""
+    return repo.derived('graph_layouts', lambda: GraphLayouts(repo))
@@ -0,0 +1,201 @@
+"""
+Materialized learning path table.
+Precomputes generate_path and calculate_path_stats for every
+(skill, level) pair in the catalog so /api/recommend can answer the common
+case with a dictionary lookup. Requests with completed courses prune the
+materialized path instead of re-traversing the prerequisite graph.
+"""
+
+import multiprocessing
+import threading
+
+from course_repository import JsonCourseRepository
+from records import DIFFICULTY_LEVELS, normalize_skill
+from recommender import (
+    calculate_path_stats, diff_paths, generate_path, get_target_ids, path_dependents, prune_completed,
+    prune_newly_completed
+)
+
+# Repository used by warm-up worker processes
+_WORKER_REPO = None
+
+
+def _init_worker(courses):
+    global _WORKER_REPO
+    _WORKER_REPO = JsonCourseRepository(courses)
+
+
+def _compute_entry(repo, skill, level):
+    path = generate_path(repo, skill, level)
+    return {
+        'path': path,
+        'stats': calculate_path_stats(path),
+        'targets': frozenset(get_target_ids(repo, skill, level)),
+        'dependents': path_dependents(path)
+    }
+
+
+def _compute_in_worker(key):
+    skill, level = key
+    return key, _compute_entry(_WORKER_REPO, skill, level)
+
+
+class PathTable:
+    """
+    Table of precomputed paths keyed by (normalized skill, level).
+
+    Entries are dropped when a catalog change touches a course on their
+    path or a course teaching their skill, and are recomputed on next use.
+    Every drop bumps a generation counter; an entry computed while the
+    generation changed is not stored, since it may reflect the old catalog.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._entries = {}
+        # course ID -> keys of entries whose path, prerequisites or targets include it
+        self._by_course = {}
+        # key -> course IDs it is listed under in _by_course
+        self._courses_of = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        repo.add_listener(self._on_change)
+
+    def _store(self, key, entry, generation):
+        """Store entry unless the table was invalidated since generation was read."""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._drop(key)
+            self._entries[key] = entry
+            # Prerequisite IDs are tracked too, so adding a course that was
+            # previously missing from the catalog invalidates paths
+            course_ids = set(entry['targets'])
+            for course in entry['path']:
+                course_ids.add(course['id'])
+                course_ids.update(course['prerequisites'])
+            for course_id in course_ids:
+                self._by_course.setdefault(course_id, set()).add(key)
+            self._courses_of[key] = course_ids
+            return True
+
+    def _drop(self, key):
+        """Remove an entry and its _by_course references. Caller holds the lock."""
+        self._entries.pop(key, None)
+        for course_id in self._courses_of.pop(key, ()):
+            keys = self._by_course.get(course_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_course[course_id]
+
+    def warm(self, workers=0):
+        """
+        Materialize every (skill, level) pair in the catalog.
+
+        Args:
+            workers: Worker processes to spread the work over (0 computes
+                in-process). Parallel warm-up copies the course records to
+                each worker, so it only applies to in-memory catalogs.
+
+        Returns:
+            Number of entries computed
+        """
+        keys = [(normalize_skill(s), level) for s in self.repo.skills() for level in DIFFICULTY_LEVELS]
+        keys = list(dict.fromkeys(keys))
+        generation = self._generation
+
+        if workers and isinstance(self.repo, JsonCourseRepository):
+            courses = list(self.repo.all())
+            with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(courses,)) as pool:
+                for key, entry in pool.imap_unordered(_compute_in_worker, keys, chunksize=16):
+                    self._store(key, entry, generation)
+        else:
+            for skill, level in keys:
+                self._store((skill, level), _compute_entry(self.repo, skill, level), generation)
+        return len(keys)
+
+    def _entry(self, skill, level):
+        key = (normalize_skill(skill), level)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            generation = self._generation
+            entry = _compute_entry(self.repo, skill, level)
+            # Only remember skills the catalog actually teaches
+            if entry['targets']:
+                self._store(key, entry, generation)
+        else:
+            self.hits += 1
+        return entry
+
+    def get(self, skill, level='Beginner', completed_courses=None):
+        """
+        Return (path, stats) for a skill and level.
+
+        Without completed courses this is the stored result. With completed
+        courses the stored path is pruned by prune_completed and its stats
+        recalculated.
+        """
+        entry = self._entry(skill, level)
+        if not completed_courses:
+            return entry['path'], entry['stats']
+        path = prune_completed(entry['path'], entry['targets'], completed_courses)
+        return path, calculate_path_stats(path)
+
+    def replan(self, skill, level, old_completed, newly_completed):
+        """
+        Re-plan a path after more courses are completed.
+
+        The previous path is rebuilt from the stored one, then only the
+        newly completed courses and the prerequisites they alone needed
+        are removed from it (prune_newly_completed).
+
+        Returns:
+            Tuple of (path, stats, delta) where delta comes from diff_paths
+        """
+        entry = self._entry(skill, level)
+        old_completed = set(old_completed)
+        newly_completed = set(newly_completed) - old_completed
+        completed = old_completed | newly_completed
+        old_path = prune_completed(entry['path'], entry['targets'], old_completed)
+        path = prune_newly_completed(old_path, entry['targets'], entry['dependents'], newly_completed)
+        delta = diff_paths(old_path, path, old_completed, completed)
+        return path, calculate_path_stats(path), delta
+
+    def invalidate_course(self, course_id, skills=()):
+        """Drop entries that include course_id or teach one of skills."""
+        with self._lock:
+            self._generation += 1
+            keys = set(self._by_course.get(course_id, ()))
+            for skill in skills:
+                for level in DIFFICULTY_LEVELS:
+                    keys.add((normalize_skill(skill), level))
+            for key in keys:
+                self._drop(key)
+        return len(keys)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_course.clear()
+            self._courses_of.clear()
+
+    def _on_change(self, old, new):
+        if old is None and new is None:
+            self.clear()
+            return
+        record = new or old
+        skills = set(old.skills if old else ()) | set(new.skills if new else ())
+        self.invalidate_course(record.id, skills)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
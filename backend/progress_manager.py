@@ -5,14 +5,70 @@ Manages user progress, XP, achievements, and level progression.
 
 import json
 import os
+from bisect import bisect_right
 from datetime import datetime
 
+ACHIEVEMENTS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'achievements.json')
+
+# (mtime, data) for the parsed achievements file; reloaded when the file changes
+_achievement_cache = {'mtime': None, 'data': None, 'thresholds': None}
+
+# Achievement condition type -> user_stats counter it is checked against
+CONDITION_STATS = {
+    'courses_completed': 'courses_completed',
+    'quizzes_passed': 'quizzes_passed',
+    'quizzes_attempted': 'quizzes_attempted',
+    'perfect_quiz': 'perfect_quizzes',
+    'streak_days': 'streak_days',
+    'unique_skills': 'unique_skills',
+    'paths_generated': 'paths_generated',
+    'early_completion': 'early_completions',
+    'late_completion': 'late_completions'
+}
+
+# Counters incremented by each progress event action
+ACTION_STATS = {
+    'course_complete': ('courses_completed',),
+    'quiz_complete': ('quizzes_attempted',),
+    'quiz_pass': ('quizzes_attempted', 'quizzes_passed'),
+    'quiz_perfect': ('quizzes_attempted', 'quizzes_passed', 'perfect_quizzes'),
+    'path_generate': ('paths_generated',)
+}
+
+# Most events accepted by one apply_events call
+MAX_EVENTS = 5000
+
 
 def load_achievements():
-    """Load achievement definitions from the data file."""
-    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'achievements.json')
-    with open(path, 'r') as f:
-        return json.load(f)
+    """Load achievement definitions, re-reading the data file only when it changes."""
+    mtime = os.path.getmtime(ACHIEVEMENTS_FILE)
+    if _achievement_cache['mtime'] != mtime:
+        with open(ACHIEVEMENTS_FILE, 'r') as f:
+            data = json.load(f)
+        # user_stats counter -> (sorted required values, matching achievements)
+        thresholds = {}
+        for achievement in data['achievements']:
+            stat = CONDITION_STATS.get(achievement['condition']['type'])
+            if stat is not None:
+                thresholds.setdefault(stat, []).append(achievement)
+        for stat, achievements in thresholds.items():
+            achievements.sort(key=lambda a: a['condition']['value'])
+            thresholds[stat] = ([a['condition']['value'] for a in achievements], achievements)
+        _achievement_cache['data'] = data
+        _achievement_cache['thresholds'] = thresholds
+        _achievement_cache['mtime'] = mtime
+    return _achievement_cache['data']
+
+
+def achievement_summary(achievement):
+    """Public fields of an achievement definition."""
+    return {
+        'id': achievement['id'],
+        'name': achievement['name'],
+        'description': achievement['description'],
+        'icon': achievement['icon'],
+        'points': achievement['points']
+    }
 
 
 def calculate_level(xp):
@@ -78,40 +134,10 @@ def check_achievements(user_stats):
         if achievement['id'] in unlocked:
             continue
         
-        condition = achievement['condition']
-        condition_type = condition['type']
-        required_value = condition['value']
-        
-        # Check condition
-        is_unlocked = False
-        
-        if condition_type == 'courses_completed':
-            is_unlocked = user_stats.get('courses_completed', 0) >= required_value
-        elif condition_type == 'quizzes_passed':
-            is_unlocked = user_stats.get('quizzes_passed', 0) >= required_value
-        elif condition_type == 'quizzes_attempted':
-            is_unlocked = user_stats.get('quizzes_attempted', 0) >= required_value
-        elif condition_type == 'perfect_quiz':
-            is_unlocked = user_stats.get('perfect_quizzes', 0) >= required_value
-        elif condition_type == 'streak_days':
-            is_unlocked = user_stats.get('streak_days', 0) >= required_value
-        elif condition_type == 'unique_skills':
-            is_unlocked = user_stats.get('unique_skills', 0) >= required_value
-        elif condition_type == 'paths_generated':
-            is_unlocked = user_stats.get('paths_generated', 0) >= required_value
-        elif condition_type == 'early_completion':
-            is_unlocked = user_stats.get('early_completions', 0) >= required_value
-        elif condition_type == 'late_completion':
-            is_unlocked = user_stats.get('late_completions', 0) >= required_value
-        
-        if is_unlocked:
-            newly_unlocked.append({
-                'id': achievement['id'],
-                'name': achievement['name'],
-                'description': achievement['description'],
-                'icon': achievement['icon'],
-                'points': achievement['points']
-            })
+        # Unknown condition types never unlock
+        stat = CONDITION_STATS.get(achievement['condition']['type'])
+        if stat is not None and user_stats.get(stat, 0) >= achievement['condition']['value']:
+            newly_unlocked.append(achievement_summary(achievement))
     
     return newly_unlocked
 
@@ -151,6 +177,107 @@ def calculate_xp_for_action(action_type, details=None):
     return base_xp
 
 
+def apply_events(user, events):
+    """
+    Apply a batch of progress events to one user in a single pass.
+
+    Each event earns XP as calculate_xp_for_action would award it and
+    updates the user's counters (see ACTION_STATS). Events may also carry
+    "skills" (course_complete), "hour" (0-23, for early/late completions)
+    and an absolute "streak_days" in their details. Achievements the
+    incoming stats already qualify for are awarded first; after that only
+    the achievements depending on the counters an event changed are checked.
+
+    Args:
+        user: Dictionary with total_xp and user_stats (as for
+            /api/progress/achievements/check; skills_learned optional)
+        events: List of {"action_type": ..., "details": {...}}
+
+    Returns:
+        Dictionary with XP earned, updated stats, level info and the
+        achievements unlocked by this batch
+    """
+    load_achievements()
+    thresholds = _achievement_cache['thresholds']
+
+    stats = dict(user.get('user_stats') or {})
+    unlocked = set(stats.get('unlocked_achievements') or [])
+    skills_learned = list(stats.get('skills_learned') or [])
+    known_skills = set(skills_learned)
+    start_xp = user.get('total_xp', stats.get('total_xp', 0)) or 0
+    xp_earned = 0
+    points = 0
+    newly_unlocked = []
+    unknown_actions = 0
+
+    def award(stat):
+        nonlocal points
+        if stat not in thresholds:
+            return
+        values, achievements = thresholds[stat]
+        for achievement in achievements[:bisect_right(values, stats.get(stat, 0))]:
+            if achievement['id'] not in unlocked:
+                unlocked.add(achievement['id'])
+                points += achievement['points']
+                newly_unlocked.append(achievement_summary(achievement))
+
+    for stat in thresholds:
+        award(stat)
+
+    for event in events:
+        action_type = event.get('action_type', '')
+        details = event.get('details') or {}
+        xp = calculate_xp_for_action(action_type, details)
+        if xp == 0 and action_type not in ACTION_STATS:
+            unknown_actions += 1
+        xp_earned += xp
+
+        changed = list(ACTION_STATS.get(action_type, ()))
+        for stat in changed:
+            stats[stat] = stats.get(stat, 0) + 1
+
+        if action_type == 'course_complete':
+            for skill in details.get('skills') or ():
+                skill = skill.strip()
+                if skill and skill not in known_skills:
+                    known_skills.add(skill)
+                    skills_learned.append(skill)
+            if details.get('skills'):
+                stats['unique_skills'] = len(skills_learned)
+                changed.append('unique_skills')
+            hour = details.get('hour')
+            if isinstance(hour, int):
+                stat = 'early_completions' if hour < 9 else 'late_completions' if hour >= 22 else None
+                if stat:
+                    stats[stat] = stats.get(stat, 0) + 1
+                    changed.append(stat)
+
+        if isinstance(details.get('streak_days'), int):
+            stats['streak_days'] = details['streak_days']
+            changed.append('streak_days')
+
+        for stat in changed:
+            award(stat)
+
+    stats['unlocked_achievements'] = sorted(unlocked)
+    if skills_learned:
+        stats['skills_learned'] = skills_learned
+    total_xp = start_xp + xp_earned + points
+    level_info = calculate_level(total_xp)
+
+    return {
+        'events_processed': len(events),
+        'unknown_actions': unknown_actions,
+        'xp_earned': xp_earned,
+        'achievement_points': points,
+        'total_xp': total_xp,
+        'level_info': level_info,
+        'leveled_up': level_info['current_level'] > calculate_level(start_xp)['current_level'],
+        'newly_unlocked': newly_unlocked,
+        'user_stats': stats
+    }
+
+
 def get_all_achievements():
     """Get all available achievements."""
     achievements_data = load_achievements()
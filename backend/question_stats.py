@@ -0,0 +1,217 @@
+"""
+Per-question answer statistics and adaptive question selection.
+evaluate_quiz feeds every graded answer into in-memory attempt/correct
+counters, which are written to disk in batches rather than on every
+request. From the counters each question gets an empirical difficulty,
+and questions are grouped into fixed-width difficulty buckets per skill
+so an adaptive quiz samples only the buckets near the learner's ability
+instead of scanning the whole bank.
+"""
+
+import bisect
+import json
+import random
+import threading
+import time
+
+from utils import write_json_atomic
+
+# Difficulty buckets over [0, 1]; bucket i holds difficulties in [i/N, (i+1)/N)
+NUM_BUCKETS = 5
+
+# Expected share of correct answers per nominal difficulty rank, used as the
+# prior until a question has enough attempts of its own. The resulting
+# difficulties sit in the middle of buckets 1-3, leaving the outer buckets to
+# questions that prove easier or harder than labelled.
+PRIOR_ACCURACY = (0.7, 0.5, 0.3)
+PRIOR_WEIGHT = 5
+
+
+def bucket_of(difficulty):
+    return min(int(difficulty * NUM_BUCKETS), NUM_BUCKETS - 1)
+
+
+def default_ability(difficulty_rank):
+    """Ability matching a nominal difficulty, so adaptive quizzes start at the requested level."""
+    if difficulty_rank is None:
+        difficulty_rank = 0
+    return 1 - PRIOR_ACCURACY[difficulty_rank]
+
+
+class DifficultyBuckets:
+    """Questions of one bank grouped by skill and empirical difficulty bucket."""
+
+    def __init__(self, questions, stats):
+        # skill key -> NUM_BUCKETS lists of questions
+        self.by_skill = {}
+        for question in questions:
+            buckets = self.by_skill.setdefault(question.skill_key, [[] for _ in range(NUM_BUCKETS)])
+            buckets[bucket_of(stats.difficulty(question))].append(question)
+
+    def sample(self, skill_keys, ability, count, rng=random):
+        """
+        Pick up to count distinct questions for the given skills, starting
+        with the bucket matching ability and widening to neighbouring
+        buckets until enough are found. Cost grows with count, not with
+        the bank or bucket sizes.
+        """
+        skills = [self.by_skill[key] for key in skill_keys if key in self.by_skill]
+        target = bucket_of(min(max(ability, 0.0), 1.0))
+        order = sorted(range(NUM_BUCKETS), key=lambda b: (abs(b - target), b))
+
+        selected = []
+        for bucket in order:
+            if len(selected) >= count:
+                break
+            # The bucket's lists across the requested skills, sampled as one sequence
+            lists = [buckets[bucket] for buckets in skills if buckets[bucket]]
+            offsets = []
+            total = 0
+            for questions in lists:
+                offsets.append(total)
+                total += len(questions)
+            for i in rng.sample(range(total), min(count - len(selected), total)):
+                j = bisect.bisect_right(offsets, i) - 1
+                selected.append(lists[j][i - offsets[j]])
+        return selected
+
+
+class QuestionStats:
+    """
+    Attempt and correct counts per question, flushed to a JSON file in batches.
+
+    Args:
+        path: JSON file to load from and flush to (None keeps counts in memory)
+        flush_every: Recorded answers that trigger a flush
+        flush_interval: Seconds after which pending answers are flushed anyway
+        load: Read path now (False leaves it to an explicit load() call)
+    """
+
+    def __init__(self, path=None, flush_every=200, flush_interval=30.0, load=True):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        # question ID -> [attempts, correct]
+        self._counts = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so an older copy of the counts never replaces a newer one
+        self._flush_lock = threading.Lock()
+        self._pending = 0
+        self._flushing = False
+        self._last_flush = time.time()
+        # Bumped on every flush; difficulty buckets are rebuilt when it changes
+        self.generation = 0
+        # (question list, generation, DifficultyBuckets) for the bank these stats belong to
+        self._buckets = None
+        self._buckets_lock = threading.Lock()
+        self.recorded = 0
+        self.flushes = 0
+        if path and load:
+            self.load()
+
+    def record(self, outcomes):
+        """Count (question ID, is_correct) pairs from one graded quiz."""
+        with self._lock:
+            for question_id, correct in outcomes:
+                counts = self._counts.get(question_id)
+                if counts is None:
+                    counts = self._counts[question_id] = [0, 0]
+                counts[0] += 1
+                counts[1] += bool(correct)
+                self._pending += 1
+                self.recorded += 1
+        self.maybe_flush()
+
+    def counts(self, question_id):
+        """(attempts, correct) for a question."""
+        return tuple(self._counts.get(question_id, (0, 0)))
+
+    def difficulty(self, question):
+        """
+        Empirical difficulty in [0, 1]: the share of wrong answers,
+        smoothed toward the prior for the question's nominal difficulty.
+        """
+        attempts, correct = self._counts.get(question.id, (0, 0))
+        prior = PRIOR_ACCURACY[question.difficulty if question.difficulty is not None else 0]
+        return 1 - (correct + prior * PRIOR_WEIGHT) / (attempts + PRIOR_WEIGHT)
+
+    def buckets(self, questions):
+        """
+        DifficultyBuckets for a question list, rebuilt only after the
+        counts were flushed or the list was replaced.
+        """
+        cached = self._buckets
+        if cached is None or cached[0] is not questions or cached[1] != self.generation:
+            with self._buckets_lock:
+                cached = self._buckets
+                if cached is None or cached[0] is not questions or cached[1] != self.generation:
+                    generation = self.generation
+                    cached = (questions, generation, DifficultyBuckets(questions, self))
+                    self._buckets = cached
+        return cached[2]
+
+    def maybe_flush(self):
+        """Flush in a background thread once a batch is full or flush_interval has passed."""
+        if not self._pending:
+            return False
+        with self._lock:
+            if self._flushing:
+                return False
+            if self._pending < self.flush_every and time.time() - self._last_flush < self.flush_interval:
+                return False
+            self._flushing = True
+        threading.Thread(target=self._flush_in_background, daemon=True).start()
+        return True
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            self._flushing = False
+
+    def flush(self):
+        """Write the counts if any answers are pending. Returns True if a write succeeded."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return False
+                data = {'version': 1, 'questions': {qid: list(c) for qid, c in self._counts.items()}}
+                pending = self._pending
+                self._pending = 0
+                self._last_flush = time.time()
+            self.generation += 1
+            if not self.path:
+                return False
+
+            try:
+                write_json_atomic(self.path, data)
+            except OSError as e:
+                print(f"Error saving question stats {self.path}: {e}")
+                with self._lock:
+                    self._pending += pending
+                return False
+            self.flushes += 1
+            return True
+
+    def load(self):
+        """Load counts from self.path if it exists. Returns the number of questions loaded."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading question stats {self.path}: {e}")
+            return 0
+        with self._lock:
+            self._counts = {qid: [int(a), int(c)] for qid, (a, c) in data.get('questions', {}).items()}
+        self.generation += 1
+        return len(self._counts)
+
+    def stats(self):
+        return {
+            'questions': len(self._counts),
+            'recorded': self.recorded,
+            'pending': self._pending,
+            'flushes': self.flushes
+        }
@@ -7,15 +7,66 @@ import json
 import os
 import random
 
+from question_stats import QuestionStats, default_ability
+from records import QuestionRecord, difficulty_rank, normalize_skill
+from skill_resolver import SkillResolver
+
+QUESTIONS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions.json')
+
+
+class QuestionBank:
+    """
+    A question bank file parsed into QuestionRecords, re-parsed only when
+    the file changes, with the answer statistics gathered for it.
+    """
+
+    def __init__(self, filepath, stats=None):
+        self.filepath = filepath
+        self.stats = stats if stats is not None else QuestionStats()
+        self._mtime = None
+        self._records = []
+        self._resolver = None
+
+    def load(self):
+        """Load the raw question dicts from the file."""
+        with open(self.filepath, 'r') as f:
+            return json.load(f)
+
+    def records(self):
+        mtime = os.path.getmtime(self.filepath)
+        if self._mtime != mtime:
+            records = [QuestionRecord.from_dict(q) for q in self.load()]
+            self._records = records
+            self._resolver = SkillResolver({q.skill for q in records})
+            self._mtime = mtime
+        return self._records
+
+    def resolver(self):
+        """SkillResolver over the skills that have questions in this bank."""
+        self.records()
+        return self._resolver
+
+
+# The shared question bank, used when no tenant bank is given
+DEFAULT_BANK = QuestionBank(QUESTIONS_FILE)
+
 
 def load_questions():
     """Load quiz questions from the data file."""
-    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'questions.json')
-    with open(path, 'r') as f:
-        return json.load(f)
+    return DEFAULT_BANK.load()
 
 
-def generate_quiz(skills, difficulty='Beginner', num_questions=5):
+def get_question_records(bank=None):
+    """Return a question bank (default: the shared one) as QuestionRecords."""
+    return (bank or DEFAULT_BANK).records()
+
+
+def get_question_resolver(bank=None):
+    """SkillResolver over the skills that have quiz questions."""
+    return (bank or DEFAULT_BANK).resolver()
+
+
+def generate_quiz(skills, difficulty='Beginner', num_questions=5, bank=None, adaptive=False, ability=None):
     """
     Generate a quiz for a set of skills and difficulty level.
     
@@ -23,6 +74,12 @@ def generate_quiz(skills, difficulty='Beginner', num_questions=5):
         skills: Skill name string or list of skill names
         difficulty: Difficulty level (Beginner, Intermediate, Advanced)
         num_questions: Number of questions to include
+        bank: QuestionBank to draw from (default: the shared one)
+        adaptive: Choose questions by empirical difficulty from answer
+            statistics instead of their labelled difficulty
+        ability: Learner ability in [0, 1] for adaptive quizzes, e.g. the
+            share of questions answered correctly recently (default:
+            derived from difficulty)
     
     Returns:
         Dictionary with quiz metadata and questions
@@ -30,69 +87,95 @@ def generate_quiz(skills, difficulty='Beginner', num_questions=5):
     if isinstance(skills, str):
         skills = [skills]
         
-    all_questions = load_questions()
-    skill_set = {s.lower() for s in skills}
+    bank = bank or DEFAULT_BANK
+    all_questions = bank.records()
+    skill_set = {normalize_skill(s) for s in skills}
+    level = difficulty_rank(difficulty)
+
+    if adaptive:
+        if ability is None:
+            ability = default_ability(level)
+        selected = _select_adaptive(bank, all_questions, skills, skill_set, ability, num_questions)
+        return _build_quiz(skills, difficulty, selected, adaptive, ability)
     
     # Filter questions by skills and difficulty
     filtered = [
         q for q in all_questions 
-        if q['skill'].lower() in skill_set and q['difficulty'] == difficulty
+        if q.skill_key in skill_set and level is not None and q.difficulty == level
     ]
     
     # If not enough questions at exact difficulty, include other difficulties for these skills
     if len(filtered) < num_questions:
-        filtered = [q for q in all_questions if q['skill'].lower() in skill_set]
+        filtered = [q for q in all_questions if q.skill_key in skill_set]
     
-    # If still no questions, try fuzzy matching or return empty
+    # If still no questions, resolve misspelled or aliased skills to the
+    # closest skills in the question bank
     if not filtered:
-        # Try finding any question that has a skill mentioned in the input skills
-        for q in all_questions:
-            q_skill = q['skill'].lower()
-            for s in skills:
-                if q_skill in s.lower() or s.lower() in q_skill:
-                    filtered.append(q)
-                    break
+        resolver = get_question_resolver(bank)
+        resolved = {normalize_skill(r) for r in map(resolver.resolve, skills) if r}
+        filtered = [
+            q for q in all_questions
+            if q.skill_key in resolved and level is not None and q.difficulty == level
+        ]
+        if len(filtered) < num_questions:
+            filtered = [q for q in all_questions if q.skill_key in resolved]
                     
     # Randomly select questions
     selected = random.sample(filtered, min(num_questions, len(filtered)))
-    
+    return _build_quiz(skills, difficulty, selected, adaptive, ability)
+
+
+def _select_adaptive(bank, all_questions, skills, skill_set, ability, num_questions):
+    """Sample questions from the difficulty buckets nearest to ability."""
+    buckets = bank.stats.buckets(all_questions)
+    keys = [key for key in skill_set if key in buckets.by_skill]
+    if not keys:
+        resolver = bank.resolver()
+        keys = list({normalize_skill(r) for r in map(resolver.resolve, skills) if r})
+    return buckets.sample(keys, ability, num_questions)
+
+
+def _build_quiz(skills, difficulty, selected, adaptive, ability):
     # Remove correct answers and explanations from the response
     quiz_questions = []
     for q in selected:
         quiz_questions.append({
-            'id': q['id'],
-            'question': q['question'],
-            'options': q['options'],
-            'difficulty': q['difficulty']
+            'id': q.id,
+            'question': q.question,
+            'options': list(q.options),
+            'difficulty': q.difficulty_name
         })
     
     # Use the first matching skill as the display skill
     display_skill = skills[0]
     if selected:
-        display_skill = selected[0]['skill']
+        display_skill = selected[0].skill
 
     return {
         'quiz_id': f"quiz_{display_skill.replace(' ', '_')}_{difficulty}_{random.randint(1000, 9999)}",
         'skill': display_skill,
         'difficulty': difficulty,
         'total_questions': len(quiz_questions),
+        'adaptive': adaptive,
+        'ability': round(ability, 3) if adaptive else None,
         'questions': quiz_questions
     }
 
 
-def evaluate_quiz(quiz_id, answers):
+def evaluate_quiz(quiz_id, answers, bank=None):
     """
     Evaluate quiz answers and calculate score.
     
     Args:
         quiz_id: Quiz identifier
         answers: Dictionary mapping question IDs to selected answer indices
+        bank: QuestionBank the quiz was drawn from (default: the shared one)
     
     Returns:
         Dictionary with score, results, and feedback
     """
-    all_questions = load_questions()
-    question_map = {q['id']: q for q in all_questions}
+    bank = bank or DEFAULT_BANK
+    question_map = {q.id: q for q in bank.records()}
     
     results = []
     correct_count = 0
@@ -109,7 +192,7 @@ def evaluate_quiz(quiz_id, answers):
         try:
             # User answer might be None or invalid index
             if user_answer is not None:
-                is_correct = int(user_answer) == question['correctAnswer']
+                is_correct = int(user_answer) == question.correct_answer
         except (ValueError, TypeError):
             is_correct = False
             
@@ -119,22 +202,25 @@ def evaluate_quiz(quiz_id, answers):
         # Guard against invalid answer indices for display
         selected_option = None
         try:
-            if user_answer is not None and 0 <= int(user_answer) < len(question['options']):
-                selected_option = question['options'][int(user_answer)]
+            if user_answer is not None and 0 <= int(user_answer) < len(question.options):
+                selected_option = question.options[int(user_answer)]
         except (ValueError, TypeError):
             selected_option = "Invalid Answer"
 
         results.append({
             'question_id': question_id,
-            'question': question['question'],
+            'question': question.question,
             'user_answer': user_answer,
-            'correct_answer': question['correctAnswer'],
+            'correct_answer': question.correct_answer,
             'is_correct': is_correct,
-            'explanation': question['explanation'],
+            'explanation': question.explanation,
             'selected_option': selected_option,
-            'correct_option': question['options'][question['correctAnswer']]
+            'correct_option': question.options[question.correct_answer]
         })
     
+    # Feed the answer statistics adaptive quizzes select by
+    bank.stats.record((r['question_id'], r['is_correct']) for r in results)
+
     score_percentage = (correct_count / total_questions * 100) if total_questions > 0 else 0
     passed = score_percentage >= 60  # 60% passing grade
     
@@ -167,23 +253,24 @@ def get_feedback(score_percentage):
         return "Keep learning! Review the material and try again. 📚"
 
 
-def get_available_skills():
+def get_available_skills(bank=None):
     """Get list of skills that have quiz questions."""
-    all_questions = load_questions()
-    skills = set(q['skill'] for q in all_questions)
+    skills = set(q.skill for q in get_question_records(bank))
     return sorted(list(skills))
 
 
-def get_question_count(skill, difficulty=None):
+def get_question_count(skill, difficulty=None, bank=None):
     """Get count of available questions for a skill and optional difficulty."""
-    all_questions = load_questions()
+    all_questions = get_question_records(bank)
+    key = normalize_skill(skill)
     
     if difficulty:
+        level = difficulty_rank(difficulty)
         count = len([
             q for q in all_questions 
-            if q['skill'].lower() == skill.lower() and q['difficulty'] == difficulty
+            if q.skill_key == key and level is not None and q.difficulty == level
         ])
     else:
-        count = len([q for q in all_questions if q['skill'].lower() == skill.lower()])
+        count = len([q for q in all_questions if q.skill_key == key])
     
     return count
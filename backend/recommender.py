@@ -3,134 +3,503 @@ Learning path recommendation engine.
 Generates personalized learning paths based on target skill and user level.
 """
 
+import base64
+import bisect
+import heapq
+import json
+
+from course_repository import as_repository
+from records import difficulty_rank, normalize_skill
+from utils import format_duration, parse_duration
+
 
 def generate_path(courses, target_skill, level='Beginner', completed_courses=None):
     """
     Generate a learning path for a target skill.
     
     Args:
-        courses: List of course dictionaries
+        courses: List of course dictionaries or a CourseRepository
         target_skill: Target skill to learn
         level: User's current skill level (Beginner, Intermediate, Advanced)
-        completed_courses: List of course IDs already completed by user
+        completed_courses: Iterable of course IDs already completed by user
     """
-    if completed_courses is None:
-        completed_courses = []
+    completed_courses = set(completed_courses or ())
+    repo = as_repository(courses)
 
-    level_order = {'Beginner': 0, 'Intermediate': 1, 'Advanced': 2}
-    user_level = level_order.get(level, 0)
+    user_level = difficulty_rank(level) or 0
     
     # Find all courses teaching the target skill
-    target_courses = [
-        c for c in courses 
-        if target_skill.lower() in [s.lower() for s in c.get('skills', [])]
-    ]
+    target_courses = repo.by_skill(target_skill)
     
     if not target_courses:
         return []
     
-    def add_with_prerequisites(course, visited, output):
-        """Recursively add course with its prerequisites."""
-        course_id = course['id']
-        
-        # Skip if already visited or completed
-        if course_id in visited or course_id in completed_courses:
-            return
-        
-        # Add prerequisites first
-        for prereq_id in course.get('prerequisites', []):
-            # Skip prerequisites if they are already completed (assumed knowledge)
-            if prereq_id in completed_courses:
-                continue
-
-            prereq_course = next(
-                (c for c in courses if c['id'] == prereq_id), 
-                None
-            )
-            if prereq_course:
-                add_with_prerequisites(prereq_course, visited, output)
-        
-        visited.add(course_id)
-        output.append(course)
+    topology = repo.topology()
     
-    # Build learning path
-    result = []
-    visited = set()
+    # Only include target courses at or below the user's level that are
+    # not completed; courses on a prerequisite cycle are quarantined
+    stack = [
+        course for course in target_courses
+        if (course.difficulty or 0) <= user_level
+        and course.id not in completed_courses
+        and course.id not in topology.quarantined
+    ]
+    repo.prefetch(course.id for course in stack)
     
-    for course in target_courses:
-        course_level = level_order.get(course.get('difficulty', 'Beginner'), 0)
-        
-        # Only include courses at or below user's level
-        if course_level > user_level:
-            continue
-        
-        # Skip if the target course itself is completed
-        if course['id'] in completed_courses:
+    # Collect targets and their prerequisites, skipping completed courses
+    # (assumed knowledge) and anything reachable only through them
+    needed = {}
+    while stack:
+        course = stack.pop()
+        if course.id in needed:
             continue
-        
-        add_with_prerequisites(course, visited, result)
-    
-    # Remove duplicates and format output
-    final_path = []
-    seen_ids = set()
-    
-    for course in result:
-        course_id = course['id']
-        if course_id not in seen_ids:
-            final_path.append({
-                'id': course_id,
-                'title': course.get('title'),
-                'difficulty': course.get('difficulty'),
-                'time': course.get('time'),
-                'skills': course.get('skills', []),
-                'prerequisites': course.get('prerequisites', []),
-                'url': course.get('url', '#')
-            })
-            seen_ids.add(course_id)
+        needed[course.id] = course
+        for prereq_id in course.prerequisites:
+            if prereq_id in completed_courses or prereq_id in needed:
+                continue
+            prereq_course = repo.get(prereq_id)
+            if prereq_course and prereq_id not in topology.quarantined:
+                stack.append(prereq_course)
     
-    return final_path
+    # Topological rank puts every prerequisite before the courses needing it
+    ordered = sorted(needed.values(), key=lambda c: topology.sort_key(c.id))
+    return [format_path_course(course) for course in ordered]
+
+
+def format_path_course(course):
+    """Format a course record as a learning path item."""
+    return {
+        'id': course.id,
+        'title': course.title,
+        'difficulty': course.difficulty_name,
+        'time': course.time,
+        'minutes': course.minutes,
+        'skills': list(course.skills),
+        'prerequisites': list(course.prerequisites),
+        'url': course.url if course.url is not None else '#'
+    }
+
+
+class PrerequisiteClosures:
+    """
+    Memoized prerequisite closures with their cumulative durations.
+
+    A closure is a course plus all of its transitive prerequisites in
+    prerequisite-first order. Closures are computed iteratively, so
+    prerequisite cycles terminate, and the cache is cleared whenever the
+    catalog changes.
+    """
+
+    def __init__(self, courses):
+        self.repo = as_repository(courses)
+        self._cache = {}
+        self.repo.add_listener(lambda old, new: self._cache.clear())
+
+    def closure(self, course_id, stop=frozenset()):
+        """
+        Return (course IDs prerequisite-first, total minutes) for course_id.
+        Traversal does not descend into IDs in stop (e.g. completed courses).
+
+        The unrestricted closure is cached per course. With a stop set it
+        is narrowed by one reverse pass over the cached order, like
+        prune_completed, instead of a new traversal.
+        """
+        order, total, records = self._unrestricted(course_id)
+        if not stop:
+            return order, total
+
+        needed = {course_id} - set(stop)
+        for record in reversed(records):
+            if record.id in needed:
+                needed.update(p for p in record.prerequisites if p not in stop)
+        kept = [r for r in records if r.id in needed]
+        return tuple(r.id for r in kept), sum(r.minutes for r in kept)
+
+    def _unrestricted(self, course_id):
+        """(IDs, total minutes, records) of the full closure, computed once per course."""
+        cached = self._cache.get(course_id)
+        if cached is not None:
+            return cached
+
+        records = []
+        visited = set()
+        stack = [(course_id, None)]
+        while stack:
+            cid, course = stack.pop()
+            if course is not None:
+                records.append(course)
+                continue
+            if cid in visited:
+                continue
+            course = self.repo.get(cid)
+            if course is None:
+                continue
+            visited.add(cid)
+            stack.append((cid, course))
+            for prereq_id in reversed(course.prerequisites):
+                stack.append((prereq_id, None))
+
+        cached = (tuple(r.id for r in records), sum(r.minutes for r in records), tuple(records))
+        self._cache[course_id] = cached
+        return cached
+
+
+def plan_with_budget(courses, target_skills, budget_hours, level='Beginner',
+                     completed_courses=None, closures=None):
+    """
+    Choose a prerequisite-closed set of courses that covers as many target
+    skills as possible within a time budget.
+
+    Greedy on value per marginal minute: each step adds the target course
+    whose not-yet-selected prerequisite closure gains the most target skills
+    (then target courses) per minute and still fits the budget. Marginal
+    costs and gains are maintained incrementally, so a step only touches
+    the candidates sharing courses or skills with what it selected. The result
+    is compared with the best single closure, the usual guard that keeps
+    greedy knapsack within a constant factor of optimal.
+
+    Args:
+        courses: List of course dictionaries or a CourseRepository
+        target_skills: Skill name or list of skill names
+        budget_hours: Time budget in hours
+        level: Highest difficulty allowed for target courses
+        completed_courses: Iterable of completed course IDs (cost nothing)
+        closures: Optional shared PrerequisiteClosures cache
+
+    Returns:
+        Dictionary with path, stats, covered_skills, uncovered_skills,
+        budget_minutes and used_minutes
+    """
+    repo = as_repository(courses)
+    closures = closures or PrerequisiteClosures(repo)
+    if isinstance(target_skills, str):
+        target_skills = [target_skills]
+    targets = {normalize_skill(s): s for s in target_skills}
+    completed = frozenset(completed_courses or ())
+    budget = int(budget_hours * 60)
+    user_level = difficulty_rank(level) or 0
+
+    candidates = {}
+    for skill in target_skills:
+        for course in repo.by_skill(skill):
+            if (course.difficulty or 0) <= user_level and course.id not in completed:
+                candidates[course.id] = course
+    # Weight skills above any number of extra target courses
+    skill_weight = len(candidates) + 1
+    # Candidate ID -> position, the tie-breaker after ratio and cost
+    rank = {cid: n for n, cid in enumerate(candidates)}
+
+    # course ID -> (minutes, target skill keys) for every course in some closure
+    info = {}
+    # Per candidate: closure IDs, then the state of its not-yet-selected part
+    closure_ids = {}
+    cost = {}
+    key_counts = {}
+    course_gain = {}
+    # course ID / skill key -> candidates whose closure holds it
+    containing = {}
+    by_key = {}
+    for cid in candidates:
+        ids = closures.closure(cid, completed)[0]
+        closure_ids[cid] = ids
+        counts = {}
+        for i in ids:
+            if i not in info:
+                record = repo.get(i)
+                info[i] = (record.minutes, [k for k in record.skill_keys if k in targets])
+            for k in info[i][1]:
+                counts[k] = counts.get(k, 0) + 1
+                by_key.setdefault(k, set()).add(cid)
+            containing.setdefault(i, []).append(cid)
+        cost[cid] = sum(info[i][0] for i in ids)
+        key_counts[cid] = counts
+        course_gain[cid] = sum(1 for i in ids if i in candidates)
+
+    def gained_skills(cid, covered):
+        return {k for k, n in key_counts[cid].items() if n and k not in covered}
+
+    def value_of(cid, covered):
+        return len(gained_skills(cid, covered)) * skill_weight + course_gain[cid]
+
+    def greedy():
+        """
+        Value and marginal cost are kept per candidate and updated only for
+        candidates whose closure overlaps the courses just selected (or that
+        teach a skill just covered). A heap holds one entry per candidate
+        version; stale entries are skipped when popped.
+        """
+        selected, order, covered, used = set(), [], set(), 0
+        version = dict.fromkeys(candidates, 0)
+        heap = []
+
+        def push(cid):
+            value = value_of(cid, covered)
+            if value:
+                heapq.heappush(heap, (-value / max(cost[cid], 1), cost[cid], rank[cid], version[cid], cid))
+
+        for cid in candidates:
+            push(cid)
+        while heap:
+            _, entry_cost, _, entry_version, best = heapq.heappop(heap)
+            if best in selected or entry_version != version[best] or used + entry_cost > budget:
+                # Infeasible entries are pushed again only if their cost drops
+                continue
+
+            new_ids = [i for i in closure_ids[best] if i not in selected]
+            gained = gained_skills(best, covered)
+            dirty = set()
+            for i in new_ids:
+                minutes, keys = info[i]
+                for cid in containing[i]:
+                    cost[cid] -= minutes
+                    for k in keys:
+                        key_counts[cid][k] -= 1
+                    if i in candidates:
+                        course_gain[cid] -= 1
+                    dirty.add(cid)
+            selected.update(new_ids)
+            order.extend(new_ids)
+            used += entry_cost
+            for k in gained:
+                dirty |= by_key.get(k, set())
+            covered |= gained
+
+            for cid in dirty:
+                if cid not in selected:
+                    version[cid] += 1
+                    push(cid)
+        return order, covered, used
+
+    # Single closures, evaluated before greedy changes the per-candidate state
+    singles = [(cid, cost[cid], gained_skills(cid, set()), value_of(cid, set())) for cid in candidates]
+
+    order, covered, used = greedy()
+    value = len(covered) * skill_weight + sum(1 for i in order if i in candidates)
+
+    for cid, single_cost, gained, single_value in singles:
+        if single_cost <= budget and single_value > value:
+            order, covered, used, value = list(closure_ids[cid]), gained, single_cost, single_value
+
+    path = [format_path_course(repo.get(cid)) for cid in order]
+    return {
+        'path': path,
+        'stats': calculate_path_stats(path),
+        'covered_skills': [targets[k] for k in targets if k in covered],
+        'uncovered_skills': [targets[k] for k in targets if k not in covered],
+        'budget_minutes': budget,
+        'used_minutes': used
+    }
+
+
+def get_target_ids(courses, target_skill, level='Beginner'):
+    """IDs of courses teaching target_skill at or below the given level."""
+    user_level = difficulty_rank(level) or 0
+    return {
+        c.id for c in as_repository(courses).by_skill(target_skill)
+        if (c.difficulty or 0) <= user_level
+    }
+
+
+def prune_completed(path, target_ids, completed_courses):
+    """
+    Remove completed courses from a path generated without completions.
+
+    A course is kept when it is not completed and is either a target or a
+    prerequisite of a kept course, which yields the same course set as
+    generate_path with completed_courses in a single reverse pass over the
+    path instead of a graph traversal. The order is that of the original
+    path, so prerequisites still come first.
+
+    Args:
+        path: Path as returned by generate_path without completed courses
+        target_ids: IDs of the target courses used to build the path
+        completed_courses: Iterable of completed course IDs
+    """
+    completed = set(completed_courses or ())
+    if not completed:
+        return path
+
+    needed = set(target_ids) - completed
+    for course in reversed(path):
+        if course['id'] in needed:
+            needed.update(p for p in course['prerequisites'] if p not in completed)
+    return [c for c in path if c['id'] in needed]
+
+
+def path_dependents(path):
+    """Map each course ID to the IDs of courses on path that list it as a prerequisite."""
+    dependents = {}
+    for course in path:
+        for prereq in course['prerequisites']:
+            dependents.setdefault(prereq, []).append(course['id'])
+    return dependents
+
+
+def prune_newly_completed(path, target_ids, dependents, newly_completed):
+    """
+    Remove newly completed courses from a path already pruned for earlier completions.
+
+    Only the newly completed courses and the prerequisites no remaining
+    course needs any more are visited: a prerequisite is dropped once
+    every dependent of it has been dropped and it is not a target. The
+    result is the same as pruning the original path with the larger
+    completed set.
+
+    Args:
+        path: Path as returned by prune_completed
+        target_ids: IDs of the target courses used to build the path
+        dependents: path_dependents of the unpruned path
+        newly_completed: Iterable of course IDs completed since path was pruned
+    """
+    on_path = {c['id']: c for c in path}
+    stack = [course_id for course_id in set(newly_completed or ()) if course_id in on_path]
+    if not stack:
+        return path
+
+    removed = set()
+    while stack:
+        course_id = stack.pop()
+        if course_id in removed:
+            continue
+        removed.add(course_id)
+        for prereq in on_path[course_id]['prerequisites']:
+            if prereq not in on_path or prereq in removed or prereq in target_ids:
+                continue
+            if all(d in removed or d not in on_path for d in dependents.get(prereq, ())):
+                stack.append(prereq)
+    return [c for c in path if c['id'] not in removed]
+
+
+def encode_path_token(skill, level, completed_courses):
+    """Encode the inputs of a path request into an opaque, URL-safe token."""
+    payload = json.dumps({
+        'skill': skill,
+        'level': level,
+        'completed': sorted(set(completed_courses or ()))
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_path_token(token):
+    """
+    Decode a token from encode_path_token.
+
+    Returns:
+        Tuple of (skill, level, completed set)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        return data['skill'], data['level'], set(data['completed'])
+    except (AttributeError, TypeError, KeyError, UnicodeError, ValueError):
+        raise ValueError('Invalid path token')
+
+
+def is_unlocked(course, completed_courses):
+    """True when every prerequisite of a path course is completed."""
+    return all(p in completed_courses for p in course['prerequisites'])
+
+
+def diff_paths(old_path, new_path, old_completed, new_completed):
+    """
+    Describe how a path changed after more courses were completed.
+
+    Returns:
+        Dictionary with:
+            - removed: [{'id', 'reason'}] with reason 'completed' or 'not_needed'
+            - unlocked: IDs whose prerequisites are now all completed
+            - reordered: [{'id', 'from', 'to'}] for courses that moved relative
+              to the others; indexes shifting because courses were removed
+              or added do not count
+    """
+    new_ids = {c['id'] for c in new_path}
+    old_index = {c['id']: i for i, c in enumerate(old_path)}
+
+    removed = [
+        {'id': c['id'], 'reason': 'completed' if c['id'] in new_completed else 'not_needed'}
+        for c in old_path if c['id'] not in new_ids
+    ]
+    unlocked = [
+        c['id'] for c in new_path
+        if is_unlocked(c, new_completed) and not is_unlocked(c, old_completed)
+    ]
+    # Courses on both paths keep their relative order except the fewest
+    # needed to explain the change: those outside the longest run that is
+    # increasing in old index
+    kept = [(i, old_index[c['id']]) for i, c in enumerate(new_path) if c['id'] in old_index]
+    in_order = _longest_increasing([old for _, old in kept])
+    reordered = [
+        {'id': new_path[i]['id'], 'from': old, 'to': i}
+        for n, (i, old) in enumerate(kept)
+        if n not in in_order
+    ]
+    return {'removed': removed, 'unlocked': unlocked, 'reordered': reordered}
+
+
+def _longest_increasing(values):
+    """Positions of one longest strictly increasing subsequence of values."""
+    tails = []
+    tail_positions = []
+    previous = [None] * len(values)
+    for n, value in enumerate(values):
+        k = bisect.bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_positions.append(n)
+        else:
+            tails[k] = value
+            tail_positions[k] = n
+        previous[n] = tail_positions[k - 1] if k else None
+
+    positions = set()
+    n = tail_positions[-1] if tail_positions else None
+    while n is not None:
+        positions.add(n)
+        n = previous[n]
+    return positions
 
 
 def get_course_dependencies(courses, course_id):
-    """Get all dependencies (direct and transitive) for a course."""
-    dependencies = []
-    visited = set()
+    """Get all dependencies (direct and transitive) for a course, prerequisites first."""
+    repo = as_repository(courses)
+    visited = {course_id}
+    stack = [course_id]
     
-    def collect_deps(cid):
-        if cid in visited:
-            return
-        visited.add(cid)
-        
-        course = next((c for c in courses if c['id'] == cid), None)
+    while stack:
+        course = repo.get(stack.pop())
         if not course:
-            return
-        
-        for prereq in course.get('prerequisites', []):
-            collect_deps(prereq)
-            if prereq not in dependencies:
-                dependencies.append(prereq)
+            continue
+        for prereq in course.prerequisites:
+            if prereq not in visited:
+                visited.add(prereq)
+                stack.append(prereq)
     
-    collect_deps(course_id)
-    return dependencies
+    visited.discard(course_id)
+    return sorted(visited, key=repo.topology().sort_key)
 
 
 def calculate_path_stats(path):
     """Calculate statistics for a learning path."""
     if not path:
-        return {'total_courses': 0, 'total_time': '0h', 'difficulty_levels': []}
+        return {'total_courses': 0, 'total_time': '0h', 'total_minutes': 0, 'difficulty_levels': []}
     
-    total_hours = 0
+    total_minutes = 0
     difficulties = []
     
     for course in path:
-        time_str = course.get('time', '0h')
-        hours = int(time_str.replace('h', '').strip())
-        total_hours += hours
+        # Path items carry minutes parsed at load; parse 'time' only as a fallback
+        minutes = course.get('minutes')
+        if minutes is None:
+            minutes = parse_duration(course.get('time', '0h')) or 0
+        total_minutes += minutes
         difficulties.append(course.get('difficulty', 'Beginner'))
     
     return {
         'total_courses': len(path),
-        'total_time': f"{total_hours}h",
+        'total_time': format_duration(total_minutes),
+        'total_minutes': total_minutes,
         'difficulty_levels': difficulties,
         'average_difficulty': difficulties[len(difficulties)//2] if difficulties else 'N/A'
     }
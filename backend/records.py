@@ -0,0 +1,220 @@
+"""
+Compact in-memory records for courses and quiz questions.
+Slotted classes replace per-record dicts inside the engines. Skill names
+and course IDs are interned, skills carry a pre-normalized lookup key, and
+difficulty is stored as a small int. Records are converted back to dicts
+only when they are serialized.
+"""
+
+import sys
+
+from utils import parse_duration
+
+DIFFICULTY_LEVELS = ('Beginner', 'Intermediate', 'Advanced')
+DIFFICULTY_RANKS = {name: rank for rank, name in enumerate(DIFFICULTY_LEVELS)}
+
+# Display name -> interned normalized key, shared by every record
+_SKILL_KEYS = {}
+
+COURSE_FIELDS = ('id', 'title', 'description', 'skills', 'prerequisites',
+                 'difficulty', 'time', 'instructor', 'url')
+QUESTION_FIELDS = ('id', 'skill', 'difficulty', 'question', 'options',
+                   'correctAnswer', 'explanation')
+
+
+def normalize_skill(skill):
+    """Normalize a free-text skill name for lookups (not interned)."""
+    return skill.strip().lower()
+
+
+def skill_key(skill):
+    """Return the interned, normalized (stripped, lowercased) key for a skill name."""
+    key = _SKILL_KEYS.get(skill)
+    if key is None:
+        key = sys.intern(normalize_skill(skill))
+        _SKILL_KEYS[sys.intern(skill)] = key
+    return key
+
+
+def difficulty_rank(name):
+    """Map a difficulty name to its rank (0-2), or None if unknown."""
+    return DIFFICULTY_RANKS.get(name)
+
+
+def difficulty_name(rank):
+    """Map a difficulty rank back to its name (None stays None)."""
+    return DIFFICULTY_LEVELS[rank] if rank is not None else None
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class CourseRecord:
+    """A single course. Missing optional fields are stored as None."""
+
+    __slots__ = ('id', 'title', 'description', 'skills', 'skill_keys', 'prerequisites',
+                 'difficulty', 'time', 'minutes', 'instructor', 'url', 'extra')
+
+    def __init__(self, id, title=None, description=None, skills=(), prerequisites=(),
+                 difficulty=None, time=None, instructor=None, url=None, extra=None):
+        self.id = _intern(id)
+        self.title = title
+        self.description = description
+        self.skills = tuple(sys.intern(s) for s in skills)
+        self.skill_keys = tuple(skill_key(s) for s in self.skills)
+        self.prerequisites = tuple(_intern(p) for p in prerequisites)
+        self.difficulty = difficulty
+        self.time = time
+        # Duration parsed once at load; unparseable durations count as 0
+        self.minutes = parse_duration(time) or 0
+        self.instructor = _intern(instructor)
+        self.url = url
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a course dict as stored in courses.json."""
+        extra = {k: v for k, v in data.items() if k not in COURSE_FIELDS}
+        if data.get('difficulty') is not None and difficulty_rank(data['difficulty']) is None:
+            # Keep unrecognized difficulty labels so to_dict() round-trips them
+            extra['difficulty'] = data['difficulty']
+        return cls(
+            data.get('id'),
+            title=data.get('title'),
+            description=data.get('description'),
+            skills=data.get('skills') or (),
+            prerequisites=data.get('prerequisites') or (),
+            difficulty=difficulty_rank(data.get('difficulty')),
+            time=data.get('time'),
+            instructor=data.get('instructor'),
+            url=data.get('url'),
+            extra=extra or None
+        )
+
+    @property
+    def difficulty_name(self):
+        return difficulty_name(self.difficulty)
+
+    def to_dict(self):
+        """Convert back to the courses.json dict shape."""
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'skills': list(self.skills),
+            'prerequisites': list(self.prerequisites),
+            'difficulty': self.difficulty_name,
+            'time': self.time,
+            'instructor': self.instructor,
+            'url': self.url
+        }
+        data = {k: v for k, v in data.items() if v is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return f"CourseRecord({self.id!r}, {self.title!r})"
+
+
+class QuestionRecord:
+    """A single quiz question."""
+
+    __slots__ = ('id', 'skill', 'skill_key', 'difficulty', 'question', 'options',
+                 'correct_answer', 'explanation', 'extra')
+
+    def __init__(self, id, skill, difficulty, question, options, correct_answer,
+                 explanation=None, extra=None):
+        self.id = _intern(id)
+        self.skill = sys.intern(skill)
+        self.skill_key = skill_key(skill)
+        self.difficulty = difficulty
+        self.question = question
+        self.options = tuple(options)
+        self.correct_answer = correct_answer
+        self.explanation = explanation
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a question dict as stored in questions.json."""
+        extra = {k: v for k, v in data.items() if k not in QUESTION_FIELDS}
+        return cls(
+            data['id'],
+            data['skill'],
+            difficulty_rank(data.get('difficulty')),
+            data['question'],
+            data['options'],
+            data['correctAnswer'],
+            explanation=data.get('explanation'),
+            extra=extra or None
+        )
+
+    @property
+    def difficulty_name(self):
+        return difficulty_name(self.difficulty)
+
+    def to_dict(self):
+        """Convert back to the questions.json dict shape."""
+        data = {
+            'id': self.id,
+            'skill': self.skill,
+            'difficulty': self.difficulty_name,
+            'question': self.question,
+            'options': list(self.options),
+            'correctAnswer': self.correct_answer,
+            'explanation': self.explanation
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return f"QuestionRecord({self.id!r}, {self.skill!r})"
+
+
+def as_course_record(course):
+    """Return course as a CourseRecord, converting from a dict if needed."""
+    if isinstance(course, CourseRecord):
+        return course
+    return CourseRecord.from_dict(course)
+
+
+def build_course_index(courses):
+    """
+    Build lookup indexes derived from a list of course records.
+
+    Returns:
+        Dictionary with:
+            - by_id: course ID -> record
+            - by_skill: normalized skill key -> list of course IDs
+            - skills: sorted list of unique skill names
+    """
+    by_id = {}
+    by_skill = {}
+    skills = set()
+    for course in courses:
+        by_id[course.id] = course
+        skills.update(course.skills)
+        for key in course.skill_keys:
+            by_skill.setdefault(key, []).append(course.id)
+    return {
+        'by_id': by_id,
+        'by_skill': by_skill,
+        'skills': sorted(skills)
+    }
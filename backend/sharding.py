@@ -0,0 +1,555 @@
+"""
+Sharded course catalog.
+Partitions courses across shard processes, by connected prerequisite
+component or by primary skill, and exposes them to the API through
+ShardedCourseRepository, which scatters queries to the shards and gathers
+the results. Every shard also serves a small replicated edge index (course
+ID, shard and prerequisite IDs for the whole catalog), so the router can
+resolve prerequisites that live on other shards and compute the catalog
+topology without fetching full course records.
+
+Split a catalog and run it as local shard processes:
+    python backend/sharding.py partition data/courses.json data/shards --shards 3
+    python backend/sharding.py serve data/shards/shard-0.json --port 5101
+    SHARD_URLS=http://127.0.0.1:5101,... python backend/app.py
+
+Check that sharded results match the unsharded catalog:
+    python backend/sharding.py check data/courses.json --shards 3 --strategy skill
+"""
+
+import argparse
+import heapq
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, jsonify, request
+
+from catalog_compiler import compile_catalog
+from course_repository import CourseRepository, JsonCourseRepository
+from records import DIFFICULTY_LEVELS, CourseRecord, skill_key
+from recommender import generate_path
+from utils import load_courses, save_courses
+
+STRATEGIES = ('component', 'skill')
+
+EDGES_FILE = 'edges.json'
+
+# Courses per /shard/all page; the router streams full listings page by page
+PAGE_SIZE = 500
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ShardError(Exception):
+    """Raised when a shard cannot be reached or answers with an error."""
+
+
+# ==================== PARTITIONING ====================
+
+def _components(courses):
+    """Group course IDs into connected components of the prerequisite graph (union-find)."""
+    parent = {c['id']: c['id'] for c in courses}
+
+    def find(cid):
+        while parent[cid] != cid:
+            parent[cid] = parent[parent[cid]]
+            cid = parent[cid]
+        return cid
+
+    for course in courses:
+        for prereq in course.get('prerequisites') or ():
+            if prereq in parent:
+                a, b = find(course['id']), find(prereq)
+                if a != b:
+                    parent[a] = b
+
+    groups = {}
+    for course in courses:
+        groups.setdefault(find(course['id']), []).append(course['id'])
+    return list(groups.values())
+
+
+def assign_shards(courses, shards, strategy='component'):
+    """
+    Map each course ID to a shard number.
+
+    component: whole prerequisite components go to the least loaded
+        shard, largest first, so no prerequisite edge crosses shards.
+    skill: courses are hashed by their first skill, so a skill's courses
+        mostly share a shard and prerequisites may cross shards.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sharding strategy: {strategy}")
+    if strategy == 'skill':
+        assignment = {}
+        for course in courses:
+            skills = course.get('skills') or ()
+            key = skill_key(skills[0]) if skills else course['id']
+            assignment[course['id']] = zlib.crc32(key.encode('utf-8')) % shards
+        return assignment
+
+    loads = [0] * shards
+    assignment = {}
+    for component in sorted(_components(courses), key=len, reverse=True):
+        target = min(range(shards), key=lambda i: (loads[i], i))
+        loads[target] += len(component)
+        for course_id in component:
+            assignment[course_id] = target
+    return assignment
+
+
+def build_edge_index(courses, assignment, strategy):
+    """The replicated edge index: [id, shard, prerequisites] per course, in catalog order."""
+    return {
+        'version': 1,
+        'strategy': strategy,
+        'shards': max(assignment.values(), default=-1) + 1,
+        'courses': [
+            [c['id'], assignment[c['id']], list(c.get('prerequisites') or ())]
+            for c in courses
+        ]
+    }
+
+
+def partition(courses_file, out_dir, shards, strategy='component'):
+    """
+    Write shard-<n>.json course files and the edge index to out_dir.
+
+    Returns:
+        List of course counts per shard
+    """
+    courses = load_courses(courses_file)
+    # Only the first course with a given ID is kept
+    seen = set()
+    courses = [c for c in courses if not (c['id'] in seen or seen.add(c['id']))]
+    assignment = assign_shards(courses, shards, strategy)
+    edges = build_edge_index(courses, assignment, strategy)
+    edges['shards'] = shards
+
+    os.makedirs(out_dir, exist_ok=True)
+    counts = []
+    for shard in range(shards):
+        members = [c for c in courses if assignment[c['id']] == shard]
+        if not save_courses(os.path.join(out_dir, f'shard-{shard}.json'), members):
+            raise OSError(f"Could not write shard {shard} to {out_dir}")
+        counts.append(len(members))
+    with open(os.path.join(out_dir, EDGES_FILE), 'w', encoding='utf-8') as f:
+        json.dump(edges, f)
+    return counts
+
+
+# ==================== SHARD SERVER ====================
+
+def create_shard_app(repo, edges):
+    """Flask app serving one shard's courses and the replicated edge index."""
+    shard_app = Flask(__name__)
+
+    @shard_app.route('/shard/info', methods=['GET'])
+    def shard_info():
+        return jsonify({'courses': repo.count(), 'shards': edges['shards'], 'strategy': edges['strategy']})
+
+    @shard_app.route('/shard/edges', methods=['GET'])
+    def shard_edges():
+        return jsonify(edges)
+
+    @shard_app.route('/shard/courses', methods=['POST'])
+    def shard_courses():
+        ids = (request.get_json(silent=True) or {}).get('ids') or []
+        return jsonify({'courses': [c.to_dict() for c in map(repo.get, ids) if c]})
+
+    @shard_app.route('/shard/by-skill', methods=['GET'])
+    def shard_by_skill():
+        limit = request.args.get('limit', type=int)
+        courses = repo.by_skill(request.args.get('skill', ''), limit)
+        return jsonify({'courses': [c.to_dict() for c in courses]})
+
+    @shard_app.route('/shard/all', methods=['GET'])
+    def shard_all():
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), PAGE_SIZE)
+        courses = repo.page(offset, limit)
+        end = offset + len(courses)
+        return jsonify({
+            'courses': [c.to_dict() for c in courses],
+            'next_offset': end if end < repo.count() else None
+        })
+
+    @shard_app.route('/shard/skills', methods=['GET'])
+    def shard_skills():
+        # First course per skill and local order, so the router can merge
+        # display names and order by catalog position
+        first = {}
+        for course in repo.all():
+            for key in course.skill_keys:
+                first.setdefault(key, course.id)
+        counts = {
+            key: {**entry, 'first': first[key], 'order': i}
+            for i, (key, entry) in enumerate(repo.skill_counts().items())
+        }
+        return jsonify({'skills': repo.skills(), 'counts': counts})
+
+    return shard_app
+
+
+# ==================== ROUTER ====================
+
+class ShardClient:
+    """JSON-over-HTTP calls to one shard."""
+
+    def __init__(self, url, timeout=10.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.requests = 0
+        self.errors = 0
+
+    def call(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            self.errors += 1
+            raise ShardError(f"Shard {self.url} failed on {path}: {e}") from e
+
+
+class ShardedCourseRepository(CourseRepository):
+    """
+    Read-only repository over shard processes.
+
+    Lookups by skill are scattered to every shard and merged back into
+    catalog order. Single courses and pages are fetched from the shards the
+    edge index names (a course together with all of its prerequisites, in
+    one round trip per shard) and kept in an LRU record cache. Full
+    listings are streamed from the shards a page at a time and not cached,
+    so the router never holds the whole catalog.
+
+    Args:
+        urls: Shard base URLs, in shard number order
+        timeout: Seconds per shard request
+        cache_size: Course records kept in the local cache
+    """
+
+    in_memory = False
+
+    def __init__(self, urls, timeout=10.0, cache_size=50000):
+        self.shards = [ShardClient(url, timeout) for url in urls]
+        self.cache_size = cache_size
+        self._pool = ThreadPoolExecutor(max_workers=max(len(self.shards), 1), thread_name_prefix='shard')
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self._skills = None
+        self._skill_counts = None
+        self._load_edges(self._replicated_edges())
+
+    def _replicated_edges(self):
+        error = None
+        for shard in self.shards:
+            try:
+                return shard.call('GET', '/shard/edges')
+            except ShardError as e:
+                error = e
+        raise error or ShardError('No shards configured')
+
+    def _load_edges(self, edges):
+        if edges['shards'] != len(self.shards):
+            raise ShardError(f"Edge index describes {edges['shards']} shards, {len(self.shards)} configured")
+        self.strategy = edges['strategy']
+        self._shard_of = {}
+        self._prerequisites = {}
+        self._positions = {}
+        self._order = []
+        self._dependents = {}
+        for course_id, shard, prerequisites in edges['courses']:
+            self._shard_of[course_id] = shard
+            self._prerequisites[course_id] = tuple(prerequisites)
+            self._positions[course_id] = len(self._positions)
+            self._order.append(course_id)
+            for prereq in prerequisites:
+                self._dependents.setdefault(prereq, []).append(course_id)
+
+    def _scatter(self, method, path, bodies=None):
+        """
+        Call every shard (or, with bodies, only shards that have a body) in
+        parallel. Returns {shard number: response}.
+        """
+        targets = list(bodies) if bodies is not None else range(len(self.shards))
+        futures = {
+            i: self._pool.submit(self.shards[i].call, method, path, bodies[i] if bodies is not None else None)
+            for i in targets
+        }
+        return {i: future.result() for i, future in futures.items()}
+
+    def _gather_courses(self, responses):
+        records = [CourseRecord.from_dict(c) for response in responses.values() for c in response['courses']]
+        records.sort(key=lambda c: self._positions.get(c.id, len(self._positions)))
+        self._cache(records)
+        return records
+
+    def _cache(self, records):
+        with self._lock:
+            for record in records:
+                self._records[record.id] = record
+                self._records.move_to_end(record.id)
+            while len(self._records) > self.cache_size:
+                self._records.popitem(last=False)
+
+    def prefetch(self, course_ids):
+        """Fetch courses and their transitive prerequisites (via the edge index) in one scatter."""
+        closure = set()
+        stack = [cid for cid in course_ids if cid in self._shard_of]
+        while stack:
+            cid = stack.pop()
+            if cid in closure:
+                continue
+            closure.add(cid)
+            stack.extend(p for p in self._prerequisites[cid] if p in self._shard_of and p not in closure)
+
+        with self._lock:
+            missing = [cid for cid in closure if cid not in self._records]
+        return self._fetch(missing)
+
+    def _fetch(self, course_ids):
+        """Fetch courses from their shards, one request per shard, and cache them. Returns {id: record}."""
+        by_shard = {}
+        for cid in sorted(course_ids, key=self._positions.get):
+            by_shard.setdefault(self._shard_of[cid], []).append(cid)
+        if not by_shard:
+            return {}
+        records = self._gather_courses(self._scatter('POST', '/shard/courses', {
+            shard: {'ids': ids} for shard, ids in by_shard.items()
+        }))
+        return {record.id: record for record in records}
+
+    def get(self, course_id):
+        if course_id not in self._shard_of:
+            return None
+        with self._lock:
+            record = self._records.get(course_id)
+            if record is not None:
+                self._records.move_to_end(course_id)
+                return record
+        return self.prefetch([course_id]).get(course_id)
+
+    def _stream(self, shard):
+        """Every course of one shard, in its order, fetched a page at a time."""
+        offset = 0
+        while offset is not None:
+            response = self.shards[shard].call('GET', f'/shard/all?offset={offset}&limit={PAGE_SIZE}')
+            for course in response['courses']:
+                yield CourseRecord.from_dict(course)
+            offset = response['next_offset']
+
+    def all(self):
+        # Each shard lists its courses in catalog order, so a k-way merge restores the global order
+        streams = [self._stream(shard) for shard in range(len(self.shards))]
+        end = len(self._positions)
+        return heapq.merge(*streams, key=lambda c: self._positions.get(c.id, end))
+
+    def page(self, offset=0, limit=None):
+        ids = self._order[offset:None if limit is None else offset + limit]
+        with self._lock:
+            found = {cid: self._records[cid] for cid in ids if cid in self._records}
+        found.update(self._fetch([cid for cid in ids if cid not in found]))
+        return [found[cid] for cid in ids if cid in found]
+
+    def count(self):
+        return len(self._shard_of)
+
+    def by_skill(self, skill, limit=None):
+        query = urllib.parse.urlencode({'skill': skill, **({'limit': limit} if limit is not None else {})})
+        records = self._gather_courses(self._scatter('GET', f'/shard/by-skill?{query}'))
+        return records[:limit] if limit is not None else records
+
+    def _load_skills(self):
+        responses = self._scatter('GET', '/shard/skills')
+        names = set()
+        merged = {}
+        for response in responses.values():
+            names.update(response['skills'])
+            for key, entry in response['counts'].items():
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = dict(entry)
+                    continue
+                current['count'] += entry['count']
+                if self._positions[entry['first']] < self._positions[current['first']]:
+                    current.update(skill=entry['skill'], first=entry['first'], order=entry['order'])
+        # Skills first seen in the same course keep that course's skill order
+        ordered = sorted(merged.items(), key=lambda item: (self._positions[item[1]['first']], item[1]['order']))
+        self._skill_counts = {key: {'skill': e['skill'], 'count': e['count']} for key, e in ordered}
+        self._skills = sorted(names)
+
+    def skills(self):
+        if self._skills is None:
+            self._load_skills()
+        return self._skills
+
+    def skill_counts(self):
+        if self._skill_counts is None:
+            self._load_skills()
+        return self._skill_counts
+
+    def dependents(self, course_id):
+        return list(self._dependents.get(course_id, ()))
+
+    def topology(self):
+        """Topology compiled from the edge index alone."""
+        return self.derived('topology', lambda: compile_catalog(
+            {'id': cid, 'prerequisites': prereqs} for cid, prereqs in self._prerequisites.items()
+        ))
+
+    def stats(self):
+        return {
+            'strategy': self.strategy,
+            'shards': [{'url': s.url, 'requests': s.requests, 'errors': s.errors} for s in self.shards],
+            'cached_records': len(self._records)
+        }
+
+
+# ==================== LOCAL SHARDS ====================
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_shards(shard_dir, shards):
+    """
+    Start one `serve` subprocess per shard file in shard_dir and wait until
+    each answers. Returns (processes, urls).
+    """
+    processes, urls = [], []
+    try:
+        for shard in range(shards):
+            port = _free_port()
+            processes.append(subprocess.Popen(
+                [sys.executable, os.path.join(BACKEND_DIR, 'sharding.py'), 'serve',
+                 os.path.join(shard_dir, f'shard-{shard}.json'), '--port', str(port)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+            urls.append(f'http://127.0.0.1:{port}')
+        for process, url in zip(processes, urls):
+            client = ShardClient(url, timeout=1)
+            deadline = time.monotonic() + 30
+            while True:
+                if process.poll() is not None:
+                    raise ShardError(f"Shard at {url} exited during startup")
+                try:
+                    client.call('GET', '/shard/info')
+                    break
+                except ShardError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.1)
+    except BaseException:
+        stop_local_shards(processes)
+        raise
+    return processes, urls
+
+
+def stop_local_shards(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def check(courses_file, shards, strategy):
+    """
+    Partition a catalog into local shard processes and compare the router's
+    answers with the unsharded repository. Returns the number of mismatches.
+    """
+    local = JsonCourseRepository(load_courses(courses_file))
+    with tempfile.TemporaryDirectory() as shard_dir:
+        counts = partition(courses_file, shard_dir, shards, strategy)
+        print(f"Partitioned {sum(counts)} courses by {strategy}: {counts}")
+        processes, urls = start_local_shards(shard_dir, shards)
+        try:
+            router = ShardedCourseRepository(urls)
+            mismatches = 0
+
+            def expect(label, expected, actual):
+                nonlocal mismatches
+                if expected != actual:
+                    mismatches += 1
+                    print(f"MISMATCH {label}")
+
+            expect('skills', local.skills(), router.skills())
+            expect('skill_counts', list(local.skill_counts().items()), list(router.skill_counts().items()))
+            expect('topology', local.topology().order, router.topology().order)
+            expect('all', [c.to_dict() for c in local.all()], [c.to_dict() for c in router.all()])
+            for offset, limit in ((0, 5), (7, 11), (len(local.courses) - 3, 10)):
+                expect(f'page {offset}+{limit}', [c.to_dict() for c in local.page(offset, limit)],
+                       [c.to_dict() for c in router.page(offset, limit)])
+            for skill in local.skills():
+                expect(f'by_skill {skill}', [c.id for c in local.by_skill(skill)],
+                       [c.id for c in router.by_skill(skill)])
+                for level in DIFFICULTY_LEVELS:
+                    expect(f'path {skill}/{level}', generate_path(local, skill, level),
+                           generate_path(router, skill, level))
+            cross = sum(1 for cid, prereqs in router._prerequisites.items()
+                        for p in prereqs if p in router._shard_of and router._shard_of[p] != router._shard_of[cid])
+            print(f"{cross} cross-shard prerequisite edges; "
+                  f"{sum(s.requests for s in router.shards)} shard requests; {mismatches} mismatches")
+            return mismatches
+        finally:
+            stop_local_shards(processes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sharded course catalog tools.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    part = sub.add_parser('partition', help='Split a course file into shard files and an edge index')
+    part.add_argument('json_file')
+    part.add_argument('out_dir')
+    part.add_argument('--shards', type=int, default=2)
+    part.add_argument('--strategy', choices=STRATEGIES, default='component')
+
+    serve = sub.add_parser('serve', help='Serve one shard file (edges.json is read from the same directory)')
+    serve.add_argument('shard_file')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=5101)
+
+    chk = sub.add_parser('check', help='Compare sharded results with the unsharded catalog using local shards')
+    chk.add_argument('json_file')
+    chk.add_argument('--shards', type=int, default=3)
+    chk.add_argument('--strategy', choices=STRATEGIES, default='component')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'partition':
+        counts = partition(args.json_file, args.out_dir, args.shards, args.strategy)
+        print(f"Wrote {len(counts)} shards to {args.out_dir}: {counts} courses")
+        return 0
+
+    if args.command == 'serve':
+        with open(os.path.join(os.path.dirname(os.path.abspath(args.shard_file)), EDGES_FILE),
+                  'r', encoding='utf-8') as f:
+            edges = json.load(f)
+        repo = JsonCourseRepository(load_courses(args.shard_file))
+        create_shard_app(repo, edges).run(host=args.host, port=args.port, threaded=True,
+                                          debug=False, use_reloader=False)
+        return 0
+
+    return 1 if check(args.json_file, args.shards, args.strategy) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
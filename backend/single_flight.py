@@ -0,0 +1,72 @@
+"""
+Request coalescing (single-flight).
+Concurrent calls with the same key wait on one in-flight computation and
+share its result instead of each recomputing it. Results are not kept
+after the computation finishes; caching stays the job of the layer
+underneath.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent identical computations by key."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() for key, or wait for the call already running for key.
+
+        Every caller gets the same result object; if the computation
+        raises, every waiting caller re-raises the same exception.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+        else:
+            call.event.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        """Computations executed, and computations saved by sharing an in-flight result."""
+        return {
+            'executed': self.executed,
+            'saved': self.shared,
+            'in_flight': len(self._calls)
+        }
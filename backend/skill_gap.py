@@ -3,6 +3,13 @@ Skill gap analysis module.
 Identifies missing skills and suggests relevant courses.
 """
 
+import heapq
+import re
+from bisect import bisect_right
+from collections import Counter
+
+from course_repository import as_repository
+
 # Common skill aliases for better matching
 SKILL_ALIASES = {
     'web dev': 'Web Development',
@@ -30,7 +37,6 @@ def is_skill_mentioned(skill, text):
     Check if a skill (or its aliases) is mentioned in the text.
     Uses word boundary checks for better accuracy.
     """
-    import re
     skill_lower = skill.lower()
     
     # Check exact skill name first
@@ -69,85 +75,175 @@ def detect_goal(text):
                 return goal
     return None
 
-def analyze_profile(courses, profile_text):
+# Skills taught by fewer courses than this are left out when a goal is detected
+MIN_UNRELATED_GAP_COUNT = 3
+
+
+def _tokens(text):
+    return re.findall(r'\w+', text)
+
+
+class SkillGapIndex:
+    """
+    Skill rankings and a mention index derived from one catalog.
+
+    Every word of a skill (or alias) mentioned in a profile is a whole word
+    of the profile, so candidate skills are found by looking up the
+    profile's words and only candidates whose words all appear are checked
+    with is_skill_mentioned. Skills are pre-sorted by course count (ties in
+    catalog order), so the top gaps are read off the front of the ranking.
+    """
+
+    def __init__(self, repo):
+        skill_info = repo.skill_counts()
+        self.names = repo.skills()
+        self.display = {key: info['skill'] for key, info in skill_info.items()}
+        self.counts = {key: info['count'] for key, info in skill_info.items()}
+
+        # Stable sort keeps first-appearance order among equal counts
+        self.ranking = sorted(skill_info, key=lambda key: -self.counts[key])
+        self.position = {key: i for i, key in enumerate(self.ranking)}
+        # Skills in ranking[:common] have at least MIN_UNRELATED_GAP_COUNT courses
+        self.common = bisect_right([-self.counts[key] for key in self.ranking], -MIN_UNRELATED_GAP_COUNT)
+
+        # Rarest word of each skill name or alias -> names (or keys) to verify,
+        # kept separately for catalog spellings and for display names
+        self._name_lookup = self._word_index({name: name for name in self.names})
+        self._key_lookup = self._word_index(self.display)
+
+    @staticmethod
+    def _word_index(phrases):
+        """Index each phrase, and its aliases, under its least common word."""
+        by_lower = {}
+        for ident, phrase in phrases.items():
+            by_lower.setdefault(phrase.lower(), []).append(ident)
+        entries = list(by_lower.items())
+        for alias, full_name in SKILL_ALIASES.items():
+            entries.append((alias.lower(), by_lower.get(full_name.lower(), ())))
+
+        entries = [(frozenset(_tokens(phrase)), ids) for phrase, ids in entries]
+        frequency = Counter(word for words, _ in entries for word in words)
+        by_word = {}
+        always_check = set()
+        for words, ids in entries:
+            if words:
+                rarest = min(words, key=lambda w: (frequency[w], w))
+                by_word.setdefault(rarest, []).append((words, ids))
+            else:
+                always_check.update(ids)
+        return by_word, always_check
+
+    @staticmethod
+    def _candidates(lookup, text):
+        by_word, always_check = lookup
+        candidates = set(always_check)
+        words = set(_tokens(text))
+        for word in words:
+            for phrase_words, ids in by_word.get(word, ()):
+                if phrase_words <= words:
+                    candidates.update(ids)
+        return candidates
+
+    def mentioned_names(self, text):
+        """Catalog skill names (all spellings) mentioned in normalized text."""
+        return {name for name in self._candidates(self._name_lookup, text)
+                if is_skill_mentioned(name, text)}
+
+    def mentioned_keys(self, text):
+        """Normalized keys of skills whose display name is mentioned in normalized text."""
+        return {key for key in self._candidates(self._key_lookup, text)
+                if is_skill_mentioned(self.display[key], text)}
+
+    def top_gaps(self, mentioned, goal_skills, goal, limit=None, offset=0, priority_only=False):
+        """
+        Select ranked gap skill keys for one page.
+
+        Goal skills come first, then (unless priority_only) the remaining
+        skills by course count; with a goal, only skills taught by at least
+        MIN_UNRELATED_GAP_COUNT courses are included among the rest.
+
+        Returns:
+            Tuple of (list of skill keys for the page, total number of gaps)
+        """
+        end = None if limit is None else offset + limit
+
+        priority = [key for key in goal_skills if key in self.position and key not in mentioned]
+        if end is None:
+            page = sorted(priority, key=self.position.get)
+        else:
+            page = heapq.nsmallest(end, priority, key=self.position.get)
+        total = len(priority)
+        if priority_only:
+            return page[offset:end], total
+
+        # Remaining gaps are a prefix of the ranking minus goal and mentioned skills
+        stop = self.common if goal else len(self.ranking)
+        skipped = sum(1 for key in goal_skills.union(mentioned)
+                      if key in self.position and self.position[key] < stop)
+        total += stop - skipped
+
+        for key in self.ranking[:stop]:
+            if end is not None and len(page) >= end:
+                break
+            if key not in goal_skills and key not in mentioned:
+                page.append(key)
+        return page[offset:end], total
+
+
+def get_skill_gap_index(repo):
+    """SkillGapIndex for a repository, rebuilt after catalog changes."""
+    return repo.derived('skill_gap_index', lambda: SkillGapIndex(repo))
+
+
+def analyze_profile(courses, profile_text, limit=None, offset=0, priority_only=False):
     """
     Analyze user profile to identify skill gaps.
     Prioritizes skills if a career goal is detected.
+
+    Args:
+        courses: Course repository or list of courses
+        profile_text: User's background description
+        limit: Maximum number of gaps to return (None returns all)
+        offset: Number of ranked gaps to skip
+        priority_only: Only return gaps for skills required by the detected goal
+
+    Example courses are only looked up for the gaps returned.
     """
+    repo = as_repository(courses)
+    index = get_skill_gap_index(repo)
     text = normalize_text(profile_text)
     goal = detect_goal(text)
     roadmaps = get_roadmaps()
     goal_skills = set()
     if goal:
         goal_skills = set([s.lower() for s in roadmaps[goal].get('required_skills', [])])
-    
-    # Count skill occurrences across all courses
-    skill_counts = {}
-    skill_to_courses = {}
-    
-    for course in courses:
-        for skill in course.get('skills', []):
-            skill_key = skill.strip()
-            skill_lower = skill_key.lower()
-            skill_counts[skill_lower] = skill_counts.get(skill_lower, 0) + 1
-            
-            if skill_lower not in skill_to_courses:
-                skill_to_courses[skill_lower] = []
-            skill_to_courses[skill_lower].append(course)
-    
-    # Identify gaps
+
+    mentioned = index.mentioned_keys(text)
+    page, total = index.top_gaps(mentioned, goal_skills, goal, limit, offset, priority_only)
+
     gaps = []
-    
-    # Sort skills: prioritize goal-related skills, then by frequency
-    all_skills = list(skill_counts.keys())
-    
-    def sort_key(s_lower):
-        is_goal_skill = 1 if s_lower in goal_skills else 0
-        return (is_goal_skill, skill_counts[s_lower])
-        
-    sorted_skills = sorted(all_skills, key=sort_key, reverse=True)
-    
-    for skill_lower in sorted_skills:
-        # Find original display name
-        original_skill = skill_lower.title()
-        found = False
-        for c in courses:
-            for s in c.get('skills', []):
-                if s.lower() == skill_lower:
-                    original_skill = s
-                    found = True
-                    break
-            if found: break
-
-        if not is_skill_mentioned(original_skill, text):
-            # For non-goal skills, maybe only show them if they are common enough
-            # or if no goal is specified.
-            if goal and skill_lower not in goal_skills:
-                # If we have a goal, maybe don't clutter the results with unrelated gaps
-                # unless they are very important skills (frequency > 5).
-                if skill_counts[skill_lower] < 3:
-                    continue
-
-            example_courses = skill_to_courses[skill_lower][:3]
-            examples = [
-                {
-                    'id': c['id'],
-                    'title': c['title'],
-                    'difficulty': c.get('difficulty', 'Beginner'),
-                    'url': c.get('url', '#')
-                } 
-                for c in example_courses
-            ]
-            
-            gaps.append({
-                'skill': original_skill,
-                'count': skill_counts[skill_lower],
-                'is_priority': skill_lower in goal_skills,
-                'examples': examples
-            })
+    for skill_lower in page:
+        example_courses = repo.by_skill(skill_lower, limit=3)
+        examples = [
+            {
+                'id': c.id,
+                'title': c.title,
+                'difficulty': c.difficulty_name or 'Beginner',
+                'url': c.url if c.url is not None else '#'
+            } 
+            for c in example_courses
+        ]
+
+        gaps.append({
+            'skill': index.display[skill_lower],
+            'count': index.counts[skill_lower],
+            'is_priority': skill_lower in goal_skills,
+            'examples': examples
+        })
     
     return {
         'gaps': gaps,
+        'total_gaps': total,
         'detected_goal': goal,
         'roadmap': roadmaps.get(goal) if goal else None
     }
@@ -156,36 +252,19 @@ def analyze_profile(courses, profile_text):
 def get_mentioned_skills(courses, profile_text):
     """Get skills mentioned in the profile using robust matching."""
     text = normalize_text(profile_text)
-    mentioned = set()
-    
-    all_skills = set()
-    for course in courses:
-        for skill in course.get('skills', []):
-            all_skills.add(skill)
-    
-    for skill in all_skills:
-        if is_skill_mentioned(skill, text):
-            mentioned.add(skill)
-    
-    return sorted(list(mentioned))
+    mentioned = get_skill_gap_index(as_repository(courses)).mentioned_names(text)
+    return sorted(mentioned)
 
 
 def calculate_skill_coverage(courses, profile_text):
     """Calculate percentage of unique available skills mentioned in profile."""
     text = normalize_text(profile_text)
+    index = get_skill_gap_index(as_repository(courses))
     
-    all_skills = set()
-    for course in courses:
-        for skill in course.get('skills', []):
-            all_skills.add(skill)
-    
-    if not all_skills:
+    if not index.names:
         return 0
         
-    mentioned_unique_count = 0
-    for skill in all_skills:
-        if is_skill_mentioned(skill, text):
-            mentioned_unique_count += 1
+    mentioned_unique_count = len(index.mentioned_names(text))
     
-    coverage = (mentioned_unique_count / len(all_skills)) * 100
+    coverage = (mentioned_unique_count / len(index.names)) * 100
     return round(coverage, 2)
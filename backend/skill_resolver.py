@@ -0,0 +1,105 @@
+"""
+Fuzzy skill-name resolution.
+A trigram inverted index over skill names and SKILL_ALIASES maps free-text
+input such as "Pyhton" or "machine-learning" to a known skill name, and
+ranks suggestions for autocomplete.
+"""
+
+import re
+from collections import Counter
+
+from records import normalize_skill
+from skill_gap import SKILL_ALIASES
+
+# Minimum similarity for resolve() to accept a fuzzy match
+MIN_RESOLVE_SCORE = 0.4
+
+
+def canonical_form(text):
+    """Lowercase text and collapse punctuation and whitespace runs to single spaces."""
+    return ' '.join(re.findall(r'[\w+#]+', text.lower()))
+
+
+def trigrams(text):
+    """Set of character trigrams of a canonical string, padded to weight word starts."""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillResolver:
+    """
+    Trigram index over a set of skill names and their aliases.
+
+    Similarity is the Dice coefficient of trigram sets. Candidates are
+    gathered from the posting lists of the query's trigrams, so a lookup
+    only touches names sharing at least one trigram with the query.
+    """
+
+    def __init__(self, names, aliases=SKILL_ALIASES):
+        # normalize_skill key -> name, for exact (case-insensitive) matches
+        self._exact = {}
+        # canonical form of a name or alias -> name
+        self._canonical = {}
+        for name in names:
+            self._exact.setdefault(normalize_skill(name), name)
+            self._canonical.setdefault(canonical_form(name), name)
+        for alias, full_name in aliases.items():
+            name = self._exact.get(normalize_skill(full_name))
+            if name is not None:
+                self._canonical.setdefault(canonical_form(alias), name)
+
+        # Every canonical form is a search term; postings hold term numbers
+        self._terms = [(term, name, len(trigrams(term))) for term, name in self._canonical.items() if term]
+        self._postings = {}
+        for i, (term, _, _) in enumerate(self._terms):
+            for gram in trigrams(term):
+                self._postings.setdefault(gram, []).append(i)
+
+    def search(self, query, limit=5, min_score=0.0):
+        """
+        Rank skill names by similarity to query.
+
+        Returns:
+            List of (name, score) pairs, best first, one per name. Exact
+            and alias matches score 1.0.
+        """
+        term = canonical_form(query)
+        if not term:
+            return []
+        grams = trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        best = {}
+        exact = self._exact.get(normalize_skill(query)) or self._canonical.get(term)
+        if exact is not None:
+            best[exact] = 1.0
+        for i, count in shared.items():
+            _, name, size = self._terms[i]
+            score = 2.0 * count / (len(grams) + size)
+            if score >= min_score and score > best.get(name, 0.0):
+                best[name] = score
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [(name, round(score, 3)) for name, score in ranked[:limit]]
+
+    def resolve(self, query, min_score=MIN_RESOLVE_SCORE):
+        """
+        Resolve free text to a skill name: exact match, then punctuation-
+        insensitive match or alias, then the most similar name. Returns
+        None when nothing scores at least min_score.
+        """
+        name = self._exact.get(normalize_skill(query))
+        if name is not None:
+            return name
+        name = self._canonical.get(canonical_form(query))
+        if name is not None:
+            return name
+        matches = self.search(query, limit=1, min_score=min_score)
+        return matches[0][0] if matches else None
+
+
+def get_skill_resolver(repo):
+    """SkillResolver over a course repository's skills, rebuilt after catalog changes."""
+    return repo.derived('skill_resolver', lambda: SkillResolver(repo.skills()))
@@ -0,0 +1,213 @@
+"""
+Subsystem startup tracking and warm-up.
+Each subsystem (path table, skill gap index, question bank, ...) registers
+an init function. Depending on STARTUP_MODE the API runs them at import
+(eager), in a background thread while it already serves requests
+(background), or not at all so the first request needing a subsystem
+warms it (lazy). /api/ready reports which subsystems are warm.
+
+Measure import and init cost per subsystem:
+    python backend/startup.py
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+STARTUP_MODES = ('eager', 'background', 'lazy')
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Line printed by the profiling subprocess ahead of its JSON status
+_STATUS_MARKER = '__startup_status__'
+
+
+class Subsystem:
+    """Init function and warm-up state of one subsystem."""
+
+    def __init__(self, name, init, required=False):
+        self.name = name
+        self.init = init
+        self.required = required
+        self.state = 'cold'
+        self.seconds = None
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'seconds': round(self.seconds, 4) if self.seconds is not None else None,
+            'error': self.error
+        }
+
+
+class Startup:
+    """
+    Registry of subsystems and their warm-up state.
+
+    Args:
+        mode: 'eager', 'background' or 'lazy' (see STARTUP_MODES)
+    """
+
+    def __init__(self, mode='background'):
+        if mode not in STARTUP_MODES:
+            raise ValueError(f"Unknown startup mode: {mode}")
+        self.mode = mode
+        self.started = time.time()
+        self.ready_at = None
+        self._subsystems = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Record a subsystem that was initialized at import, taking seconds."""
+        subsystem = Subsystem(name, None)
+        subsystem.state = 'warm'
+        subsystem.seconds = seconds
+        subsystem.done.set()
+        self._subsystems[name] = subsystem
+
+    def register(self, name, init, required=False):
+        """
+        Register init() to warm a subsystem; it must be safe to call while requests are served.
+        Requests needing a required subsystem wait for it in every mode (see use).
+        """
+        subsystem = Subsystem(name, init, required)
+        if self.mode == 'lazy':
+            subsystem.state = 'deferred'
+        self._subsystems[name] = subsystem
+
+    def ensure(self, name):
+        """
+        Warm a subsystem if it is not warm yet. Concurrent callers wait for
+        the first one. Returns True if it is warm.
+        """
+        subsystem = self._subsystems[name]
+        with self._lock:
+            owner = subsystem.state in ('cold', 'deferred')
+            if owner:
+                subsystem.state = 'warming'
+        if not owner:
+            subsystem.done.wait()
+            return subsystem.state == 'warm'
+
+        started = time.perf_counter()
+        try:
+            subsystem.init()
+        except Exception as e:
+            subsystem.state = 'failed'
+            subsystem.error = str(e)
+            print(f"Error warming {name}: {e}")
+        else:
+            subsystem.state = 'warm'
+        subsystem.seconds = time.perf_counter() - started
+        subsystem.done.set()
+        return subsystem.state == 'warm'
+
+    def use(self, name):
+        """
+        Called before a request uses a subsystem. In lazy mode, and for
+        required subsystems, the request warms it through ensure (or waits
+        for the warm-up already running), so its state and timing are
+        recorded. Other subsystems are left to the background warm-up, since
+        they build whatever a request needs on their own. Names that were
+        never registered are ignored.
+        """
+        subsystem = self._subsystems.get(name)
+        if subsystem is None or subsystem.done.is_set():
+            return True
+        if self.mode != 'lazy' and not subsystem.required:
+            return False
+        return self.ensure(name)
+
+    def warm(self):
+        """Warm every registered subsystem in registration order."""
+        for name in list(self._subsystems):
+            self.ensure(name)
+        self.ready_at = time.time()
+
+    def start(self):
+        """Warm according to the mode: now, in a daemon thread, or not at all."""
+        if self.mode == 'eager':
+            self.warm()
+        elif self.mode == 'background':
+            threading.Thread(target=self.warm, name='startup-warm', daemon=True).start()
+        else:
+            self.ready_at = time.time()
+
+    def is_ready(self):
+        """True once no subsystem is still waiting to be warmed. Failed subsystems do not block readiness."""
+        return all(s.state not in ('cold', 'warming') for s in self._subsystems.values())
+
+    def status(self):
+        return {
+            'ready': self.is_ready(),
+            'mode': self.mode,
+            'seconds_to_ready': round(self.ready_at - self.started, 3) if self.ready_at else None,
+            'subsystems': {name: s.to_dict() for name, s in self._subsystems.items()}
+        }
+
+
+def parse_import_times(stderr):
+    """
+    Parse `python -X importtime` output into {module: (self_us, cumulative_us)}.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)', line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def profile_startup():
+    """
+    Import the API in a fresh interpreter with subsystems deferred, then
+    warm each one in turn.
+
+    Returns:
+        (import times from parse_import_times, Startup status dict)
+    """
+    code = ('import json, app; app.STARTUP.warm(); '
+            f"print({_STATUS_MARKER!r}); print(json.dumps(app.STARTUP.status()))")
+    env = {**os.environ, 'STARTUP_MODE': 'lazy', 'ADMISSION_CONTROL': '0'}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0 or _STATUS_MARKER not in result.stdout:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'profiling failed')
+    status = json.loads(result.stdout.split(_STATUS_MARKER, 1)[1])
+    return parse_import_times(result.stderr), status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure import and init cost of each API subsystem.')
+    parser.add_argument('--top', type=int, default=10, help='Slowest library imports to list')
+    args = parser.parse_args(argv)
+
+    imports, status = profile_startup()
+    local = sorted(os.path.splitext(f)[0] for f in os.listdir(BACKEND_DIR) if f.endswith('.py'))
+
+    print('Imports (cumulative ms, includes dependencies):')
+    for module in local:
+        if module in imports:
+            print(f"  {module:<24}{imports[module][1] / 1000:>10.1f}")
+    libraries = sorted(((cumulative, module) for module, (_, cumulative) in imports.items()
+                          if '.' not in module and module not in local), reverse=True)
+    for cumulative, module in libraries[:args.top]:
+        print(f"  {module:<24}{cumulative / 1000:>10.1f}  (library)")
+
+    print('Init (ms):')
+    for name, subsystem in status['subsystems'].items():
+        seconds = subsystem['seconds']
+        note = f"  {subsystem['state']}: {subsystem['error']}" if subsystem['error'] else ''
+        print(f"  {name:<24}{(seconds or 0) * 1000:>10.1f}{note}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Fingerprinted, in-memory frontend assets.
+At startup every file in the frontend directory is read once, named by a
+hash of its content (script.js -> script.3f2a1b9c0d.js) and compressed
+ahead of time. index.html is rewritten to reference the fingerprinted
+names, so those can be cached by browsers forever: a changed file gets a
+new name. Requests are answered from the table without touching the
+filesystem; paths not in it get index.html, as before. brotli variants
+are added when the brotli package is installed.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INDEX = 'index.html'
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# index.html and unfingerprinted names must be revalidated to pick up new fingerprints
+REVALIDATE = 'no-cache'
+
+# Variants smaller than this share of the original are not worth keeping
+MIN_SAVING = 0.9
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# src="..." and href="..." attributes in index.html
+_REFERENCE = re.compile(r'''(\b(?:src|href)=)(["'])([^"']+)\2''')
+
+
+def fingerprint(name, digest):
+    """script.js -> script.<digest>.js"""
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest}{ext}"
+
+
+class Asset:
+    """One servable file: its bytes, precompressed variants and headers."""
+
+    __slots__ = ('name', 'body', 'variants', 'content_type', 'etag', 'cache_control')
+
+    def __init__(self, name, body, cache_control, variants=None):
+        self.name = name
+        self.body = body
+        self.cache_control = cache_control
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        # encoding -> compressed body
+        self.variants = variants
+        if variants is None:
+            self.variants = self._compress(body, content_type)
+
+    @staticmethod
+    def _compress(body, content_type):
+        variants = {}
+        if content_type.startswith(COMPRESSIBLE_TYPES):
+            candidates = [('gzip', gzip.compress(body, 9, mtime=0))]
+            if brotli is not None:
+                candidates.append(('br', brotli.compress(body)))
+            for encoding, compressed in candidates:
+                if len(compressed) < len(body) * MIN_SAVING:
+                    variants[encoding] = compressed
+        return variants
+
+
+class AssetTable:
+    """
+    Frontend files keyed by URL path, built once from a directory.
+
+    Args:
+        root: Frontend directory
+        digest_length: Hex digits of the content hash used in file names
+    """
+
+    def __init__(self, root, digest_length=10):
+        self.root = root
+        self.digest_length = digest_length
+        self._assets = {}
+        # original name -> fingerprinted name
+        self.manifest = {}
+        self.index = None
+
+    def build(self):
+        """Read, fingerprint and compress every file, then rewrite index.html. Returns self."""
+        assets = {}
+        manifest = {}
+        index_body = None
+        for directory, _, files in os.walk(self.root):
+            for filename in sorted(files):
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    body = f.read()
+                if name == INDEX:
+                    index_body = body
+                    continue
+                hashed = fingerprint(name, hashlib.sha256(body).hexdigest()[:self.digest_length])
+                manifest[name] = hashed
+                asset = assets[hashed] = Asset(hashed, body, IMMUTABLE)
+                # The plain name still works for links from outside index.html
+                assets[name] = Asset(name, body, REVALIDATE, asset.variants)
+
+        if index_body is not None:
+            index = Asset(INDEX, self.rewrite(index_body.decode('utf-8'), manifest).encode('utf-8'), REVALIDATE)
+            assets[INDEX] = index
+            self.index = index
+        self._assets = assets
+        self.manifest = manifest
+        return self
+
+    @staticmethod
+    def rewrite(html, manifest):
+        """Point src/href attributes naming frontend files at their fingerprinted names."""
+        def replace(match):
+            prefix, quote, target = match.groups()
+            name = target[2:] if target.startswith('./') else target
+            if name not in manifest:
+                return match.group(0)
+            return f"{prefix}{quote}{manifest[name]}{quote}"
+        return _REFERENCE.sub(replace, html)
+
+    def get(self, path):
+        """The asset for a URL path, index.html for unknown paths (None if there is no index)."""
+        return self._assets.get(path) or self.index
+
+    def response(self, path, request):
+        """Serve path, choosing a compressed variant by Accept-Encoding and honouring If-None-Match."""
+        asset = self.get(path)
+        if asset is None:
+            return None
+
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.variants and request.accept_encodings[candidate] > 0:
+                encoding = candidate
+                break
+        etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+
+        headers = {'Cache-Control': asset.cache_control, 'Vary': 'Accept-Encoding'}
+        if etag in request.if_none_match:
+            response = Response(status=304, headers=headers)
+        else:
+            response = Response(asset.variants[encoding] if encoding else asset.body,
+                                content_type=asset.content_type, headers=headers)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        return response
+
+    def stats(self):
+        assets = [self._assets[name] for name in self.manifest.values()]
+        if self.index:
+            assets.append(self.index)
+        return {
+            'files': len(assets),
+            'bytes': sum(len(a.body) for a in assets),
+            'gzip_bytes': sum(len(a.variants.get('gzip', a.body)) for a in assets),
+            'brotli': brotli is not None,
+            'manifest': self.manifest
+        }
@@ -0,0 +1,242 @@
+"""
+Tenant-scoped catalogs.
+Partner organizations each get a directory under the tenants root holding
+their own courses.json (required), questions.json and catalog.snapshot
+(optional; only used when signed with this server's snapshot key). A request selects its tenant with the X-Tenant header or a
+/t/<tenant>/ path prefix; requests without either use the default catalog.
+
+Tenants are loaded on first use and kept in LRU order. Their catalogs and
+derived indexes (path table, fragments, skill gap index, ...) are measured
+periodically in a background thread, and the least recently used tenants
+are evicted while the total is over the memory budget. The default catalog
+is never evicted.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from catalog_snapshot import load_catalog
+from co_completion import CoCompletionIndex
+from course_repository import JsonCourseRepository
+from memory_profile import deep_size
+from path_table import PathTable
+from question_stats import QuestionStats
+from quiz_generator import DEFAULT_BANK, QuestionBank
+from recommender import PrerequisiteClosures
+from single_flight import SingleFlight
+
+TENANT_HEADER = 'X-Tenant'
+PATH_PREFIX = '/t/'
+DEFAULT_TENANT_ID = 'default'
+
+# WSGI environ key TenantPathPrefix stores the tenant from the URL under
+ENVIRON_KEY = 'learning_path.tenant'
+
+# Tenant IDs double as directory names, so keep them to a safe alphabet
+TENANT_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+
+class UnknownTenant(Exception):
+    """Raised for a malformed tenant ID or one without a catalog."""
+
+
+class Tenant:
+    """One organization's catalog, question bank and the indexes built over them."""
+
+    def __init__(self, tenant_id, catalog, source, questions, path_table=None, closures=None,
+                 co_completion=None):
+        self.id = tenant_id
+        self.catalog = catalog
+        self.source = source
+        self.questions = questions
+        self.path_table = path_table if path_table is not None else PathTable(catalog)
+        self.closures = closures if closures is not None else PrerequisiteClosures(catalog)
+        self.co_completion = co_completion if co_completion is not None else CoCompletionIndex()
+        self.last_refresh = 0.0
+        self.size = 0
+        self.measured_at = 0.0
+        self.measuring = False
+
+    @classmethod
+    def load(cls, tenant_id, directory, co_completion_options=None, question_stats_options=None):
+        """
+        Load a tenant from its directory. Without a questions.json the
+        shared question bank, and its answer statistics, are used.
+        """
+        courses_file = os.path.join(directory, 'courses.json')
+        courses, index, source = load_catalog(courses_file, os.path.join(directory, 'catalog.snapshot'))
+        catalog = JsonCourseRepository(courses, courses_file, index)
+        topology = catalog.topology()
+        if not topology.ok:
+            print(f"Tenant {tenant_id} catalog issues: {len(topology.cycles)} prerequisite cycles, "
+                  f"{len(topology.dangling)} dangling prerequisites, "
+                  f"{len(topology.duplicates)} duplicate IDs")
+
+        questions_file = os.path.join(directory, 'questions.json')
+        questions = DEFAULT_BANK
+        if os.path.exists(questions_file):
+            stats = QuestionStats(os.path.join(directory, 'question_stats.json'), **(question_stats_options or {}))
+            questions = QuestionBank(questions_file, stats)
+        co_completion = CoCompletionIndex(os.path.join(directory, 'co_completion.json'),
+                                          **(co_completion_options or {}))
+        return cls(tenant_id, catalog, source, questions, co_completion=co_completion)
+
+
+class TenantPathPrefix:
+    """
+    WSGI middleware routing /t/<tenant>/<path> to /<path>.
+
+    The tenant ID goes into the environ under ENVIRON_KEY and the prefix
+    moves to SCRIPT_NAME, so routes and generated URLs are unchanged.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(PATH_PREFIX):
+            tenant_id, _, rest = path[len(PATH_PREFIX):].partition('/')
+            environ[ENVIRON_KEY] = tenant_id
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + PATH_PREFIX + tenant_id
+            environ['PATH_INFO'] = '/' + rest
+        return self.wsgi_app(environ, start_response)
+
+
+class TenantRegistry:
+    """
+    Lazily loaded tenants under a shared memory budget.
+
+    Args:
+        root: Directory holding one subdirectory per tenant
+        default: Tenant served when a request names none
+        memory_budget: Bytes the loaded (non-default) tenants may use together
+        measure_interval: Seconds between re-measuring a tenant as its indexes fill
+        co_completion_options: Keyword arguments for each tenant's CoCompletionIndex
+        question_stats_options: Keyword arguments for each tenant's QuestionStats
+    """
+
+    def __init__(self, root, default, memory_budget=256 * 1024 * 1024, measure_interval=60.0,
+                 co_completion_options=None, question_stats_options=None):
+        self.root = root
+        self.default = default
+        self.memory_budget = memory_budget
+        self.measure_interval = measure_interval
+        self.co_completion_options = co_completion_options or {}
+        self.question_stats_options = question_stats_options or {}
+        self._tenants = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = SingleFlight()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant_id):
+        """Return the Tenant for tenant_id (None or 'default' for the default), or raise UnknownTenant."""
+        if not tenant_id or tenant_id == DEFAULT_TENANT_ID:
+            return self.default
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise UnknownTenant(tenant_id)
+
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                self._tenants.move_to_end(tenant_id)
+                self.hits += 1
+        if tenant is None:
+            return self._loading.do(tenant_id, lambda: self._load(tenant_id))
+
+        if time.time() - tenant.measured_at > self.measure_interval:
+            self._schedule_measure(tenant)
+        return tenant
+
+    def _load(self, tenant_id):
+        directory = os.path.join(self.root, tenant_id)
+        if not os.path.isfile(os.path.join(directory, 'courses.json')):
+            raise UnknownTenant(tenant_id)
+        tenant = Tenant.load(tenant_id, directory, self.co_completion_options, self.question_stats_options)
+        with self._lock:
+            self._tenants[tenant_id] = tenant
+            self.loads += 1
+        self._schedule_measure(tenant)
+        return tenant
+
+    def _schedule_measure(self, tenant):
+        """
+        Measure tenant, then enforce the budget, in a background thread so
+        requests never wait for deep_size. At most one measurement per
+        tenant runs at a time; until the first finishes its size counts as 0.
+        """
+        with self._lock:
+            if tenant.measuring:
+                return
+            tenant.measuring = True
+        threading.Thread(target=self._measure_in_background, args=(tenant,),
+                         name=f'tenant-measure-{tenant.id}', daemon=True).start()
+
+    def _measure_in_background(self, tenant):
+        try:
+            self._measure(tenant)
+        except RuntimeError as e:
+            # A request resized a container mid-walk; keep the old size and retry next interval
+            print(f"Error measuring tenant {tenant.id}: {e}")
+            tenant.measured_at = time.time()
+        finally:
+            tenant.measuring = False
+        self._enforce_budget()
+
+    def _measure(self, tenant):
+        # The shared question bank belongs to the default tenant
+        tenant.size = deep_size(tenant, {id(DEFAULT_BANK)})
+        tenant.measured_at = time.time()
+
+    def _enforce_budget(self):
+        """Evict least recently used tenants, other than the most recent one, until the total fits the budget."""
+        evicted = []
+        with self._lock:
+            keep = next(reversed(self._tenants.values()), None)
+            used = sum(t.size for t in self._tenants.values())
+            for tenant_id in list(self._tenants):
+                if used <= self.memory_budget:
+                    break
+                tenant = self._tenants[tenant_id]
+                if tenant is keep:
+                    continue
+                del self._tenants[tenant_id]
+                used -= tenant.size
+                evicted.append(tenant)
+                self.evictions += 1
+        for tenant in evicted:
+            # Requests still holding the tenant keep working; its counts are saved now
+            self._flush(tenant)
+
+    @staticmethod
+    def _flush(tenant):
+        tenant.co_completion.flush()
+        # The shared bank's statistics belong to the default tenant
+        if tenant.questions is not DEFAULT_BANK:
+            tenant.questions.stats.flush()
+
+    def flush(self):
+        """Save the unsaved counts of every loaded tenant, e.g. at shutdown."""
+        for tenant in self.loaded():
+            self._flush(tenant)
+
+    def loaded(self):
+        """Loaded tenants, least recently used first."""
+        with self._lock:
+            return list(self._tenants.values())
+
+    def stats(self):
+        tenants = self.loaded()
+        return {
+            'loaded': {t.id: {'courses': t.catalog.count(), 'size_bytes': t.size} for t in tenants},
+            'used_bytes': sum(t.size for t in tenants),
+            'memory_budget_bytes': self.memory_budget,
+            'hits': self.hits,
+            'loads': self.loads,
+            'evictions': self.evictions
+        }
@@ -1,5 +1,7 @@
 ﻿import json
 import os
+import re
+import tempfile
 
 
 def load_courses(filepath):
@@ -15,12 +17,37 @@ def load_courses(filepath):
         return []
 
 
+def write_json_atomic(filepath, data, indent=None):
+    """
+    Write data as JSON to filepath through a uniquely named temporary file in
+    the same directory, so concurrent writers never share a temporary file
+    and readers only ever see a complete file. Raises OSError on failure.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(filepath) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(filepath) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def save_courses(filepath, courses):
-    """Save courses to JSON file."""
+    """
+    Save courses to JSON file.
+    Writes to a temporary file and renames it over filepath, so readers
+    and crashes never see a partially written catalog.
+    """
     try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(courses, f, indent=2)
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        write_json_atomic(filepath, courses, indent=2)
         return True
     except Exception as e:
         print(f"Error saving courses: {e}")
@@ -47,3 +74,52 @@ def get_all_skills(courses):
         for skill in course.get('skills', []):
             skills.add(skill)
     return sorted(list(skills))
+
+
+# One number with an optional unit. A unit may not run into a letter and a bare
+# number may not run into a letter, digit or dot, so a run of digits is never
+# split (no backtracking blow-up) and "-3h", "1e3h" or "2 days" fail
+_DURATION_PART = re.compile(
+    r'\s*(\d+(?:\.\d+)?)(?:\s*(hours?|hrs?|h|minutes?|mins?|m)(?![a-z])|(?![a-z\d.]))', re.IGNORECASE
+)
+
+
+def parse_duration(time_str):
+    """
+    Parse a course duration such as "3h", "1.5h", "90m" or "1h 30m" into minutes.
+    Bare numbers are treated as hours. Returns None for negative numbers and
+    strings that are not made up only of such parts.
+    """
+    if isinstance(time_str, (int, float)):
+        return int(round(time_str * 60)) if time_str >= 0 else None
+    if not time_str:
+        return None
+
+    # Parts must follow each other back to back up to trailing whitespace
+    minutes = 0.0
+    pos = 0
+    end = len(time_str.rstrip())
+    while pos < end:
+        match = _DURATION_PART.match(time_str, pos)
+        if not match:
+            return None
+        value, unit = match.groups()
+        if unit and unit.lower().startswith('m'):
+            minutes += float(value)
+        else:
+            minutes += float(value) * 60
+        pos = match.end()
+    return int(round(minutes)) if pos else None
+
+
+def format_duration(minutes):
+    """
+    Format minutes as hours, e.g. 180 -> "3h" and 90 -> "1.5h". Durations
+    too short to show in tenths of an hour are given in minutes ("1m").
+    """
+    hours = round(minutes / 60, 1)
+    if not hours and minutes:
+        return f"{int(round(minutes))}m"
+    if hours == int(hours):
+        return f"{int(hours)}h"
+    return f"{hours}h"
@@ -33,11 +33,56 @@ function initVisualizer() {
     }
 }
 
-function renderInteractivePath(path) {
-    const container = document.getElementById('path-visualizer');
-    if (!container) return;
+// Style a node the same way whether the layout came from the server or the client
+function styleNode(node, color) {
+    return Object.assign(node, {
+        color: {
+            background: '#1f2937',
+            border: color,
+            highlight: { background: color, border: '#fff' }
+        },
+        font: { color: '#f1f5f9', size: 14, face: 'Inter' },
+        shape: 'box',
+        margin: 10,
+        borderWidth: 2,
+        shadow: true
+    });
+}
+
+function styleEdge(edge) {
+    return Object.assign(edge, {
+        arrows: 'to',
+        color: { color: '#475569', highlight: '#38bdf8' },
+        width: 2
+    });
+}
+
+// Fetch nodes, edges and fixed coordinates laid out by the server
+async function fetchServerGraph(path) {
+    try {
+        const data = await window.apiCall('/path/graph', 'POST', {
+            course_ids: path.map(c => c.id)
+        });
+        const graph = data.graph;
+        return {
+            nodes: graph.nodes.map(n => styleNode({
+                id: n.id,
+                label: n.label,
+                title: n.title,
+                x: n.x,
+                y: n.y
+            }, n.color)),
+            edges: graph.edges.map(e => styleEdge({ from: e.from, to: e.to })),
+            positioned: true
+        };
+    } catch (error) {
+        console.error('Falling back to client-side graph layout:', error);
+        return null;
+    }
+}
 
-    // Prepare nodes and edges
+// Build the graph in the browser and let vis.js lay it out
+function buildClientGraph(path) {
     const nodes = [];
     const edges = [];
     const courseIds = new Set(path.map(c => c.id));
@@ -48,41 +93,35 @@ function renderInteractivePath(path) {
         if (course.difficulty === 'Beginner') color = '#10b981';
         if (course.difficulty === 'Advanced') color = '#ef4444';
 
-        nodes.push({
+        nodes.push(styleNode({
             id: course.id,
             label: course.title,
-            title: `Difficulty: ${course.difficulty}\nTime: ${course.time}`,
-            color: {
-                background: '#1f2937',
-                border: color,
-                highlight: { background: color, border: '#fff' }
-            },
-            font: { color: '#f1f5f9', size: 14, face: 'Inter' },
-            shape: 'box',
-            margin: 10,
-            borderWidth: 2,
-            shadow: true
-        });
+            title: `Difficulty: ${course.difficulty}\nTime: ${course.time}`
+        }, color));
 
         // Add edges from prerequisites (only if they are in the current path)
         if (course.prerequisites) {
             course.prerequisites.forEach(prereqId => {
                 if (courseIds.has(prereqId)) {
-                    edges.push({
-                        from: prereqId,
-                        to: course.id,
-                        arrows: 'to',
-                        color: { color: '#475569', highlight: '#38bdf8' },
-                        width: 2
-                    });
+                    edges.push(styleEdge({ from: prereqId, to: course.id }));
                 }
             });
         }
     });
 
+    return { nodes, edges, positioned: false };
+}
+
+async function renderInteractivePath(path) {
+    const container = document.getElementById('path-visualizer');
+    if (!container) return;
+
+    // Prefer the server's precomputed layout so the browser only draws
+    const graph = (await fetchServerGraph(path)) || buildClientGraph(path);
+
     const data = {
-        nodes: new vis.DataSet(nodes),
-        edges: new vis.DataSet(edges)
+        nodes: new vis.DataSet(graph.nodes),
+        edges: new vis.DataSet(graph.edges)
     };
 
     const options = {
@@ -97,7 +136,7 @@ function renderInteractivePath(path) {
                 roundness: 0.4
             }
         },
-        layout: {
+        layout: graph.positioned ? { hierarchical: { enabled: false } } : {
             hierarchical: {
                 direction: 'LR', // Left to Right
                 sortMethod: 'directed',